@@ -4,9 +4,6 @@
 # Importa o módulo 'os' para manipular variáveis de ambiente
 import os
 
-# Importa o módulo 'tempfile' para criação de diretórios e arquivos temporários
-import tempfile
-
 # Importa o Streamlit para criar a interface web interativa
 import streamlit as st
 
@@ -19,17 +16,14 @@ from langchain_core.prompts import ChatPromptTemplate
 # Importa o tipo de mensagem de sistema (usada para instruções de comportamento do modelo)
 from langchain_core.messages import SystemMessage
 
-# Importa o carregador de documentos PDF da comunidade LangChain
-from langchain_community.document_loaders import PyPDFLoader
-
 # Importa o divisor de texto que segmenta o conteúdo em partes menores
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-# Importa o gerador de embeddings baseados em modelos HuggingFace
-from langchain_huggingface import HuggingFaceEmbeddings
+# Importa o modelo de embeddings (carregado uma vez por processo, com lotes e backends de CPU configuráveis)
+from dsa_embeddings import DsaEmbeddings
 
-# Importa o repositório vetorial Chroma para armazenamento e busca de embeddings
-from langchain_community.vectorstores import Chroma
+# Importa o cache de embeddings por chunk (os chunks repetidos entre documentos não são vetorizados de novo)
+from dsa_cache_embeddings import DsaCacheEmbeddings
 
 # Importa utilitários para construção de pipelines paralelos de execução
 from langchain_core.runnables import RunnableParallel, RunnablePassthrough
@@ -37,9 +31,36 @@ from langchain_core.runnables import RunnableParallel, RunnablePassthrough
 # Importa o parser de saída para converter a resposta em texto simples
 from langchain_core.output_parsers import StrOutputParser
 
+# Importa a biblioteca de documentos (vários PDFs em uma coleção persistente, com metadados por documento)
+from dsa_biblioteca import DSA_TIPOS_DOCUMENTO, DsaBiblioteca, dsa_chave_documento, dsa_pasta_biblioteca
+
+# Importa a ingestão de PDFs em fluxo contínuo (extração em processos, chunks e gravação em lotes)
+from dsa_ingestao import DsaIngestao, DsaIngestoes
+
 # Desativa o paralelismo de tokenização para evitar conflitos com o HuggingFace
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+# Pasta da biblioteca de documentos e orçamento de chunks (acima dele, os documentos usados há mais tempo são removidos)
+DSA_DIR_BIBLIOTECA = os.environ.get("DSA_DIR_BIBLIOTECA", "biblioteca_chroma")
+DSA_LIMITE_CHUNKS_BIBLIOTECA = int(os.environ.get("DSA_LIMITE_CHUNKS_BIBLIOTECA", "500000"))
+
+# Inferência dos embeddings: backend de CPU (torch, onnx ou int8), tamanho do lote e threads (0 = padrão do PyTorch)
+DSA_BACKEND_EMBEDDINGS = os.environ.get("DSA_BACKEND_EMBEDDINGS", "torch")
+DSA_BATCH_EMBEDDINGS = int(os.environ.get("DSA_BATCH_EMBEDDINGS", "32"))
+DSA_THREADS_EMBEDDINGS = int(os.environ.get("DSA_THREADS_EMBEDDINGS", "0"))
+
+# Pasta do cache de embeddings por chunk (vazio = sem cache)
+DSA_DIR_CACHE_EMBEDDINGS = os.environ.get("DSA_DIR_CACHE_EMBEDDINGS", "cache_embeddings")
+
+# Configuração que define os vetores dos documentos (cada configuração tem a sua pasta na biblioteca)
+DSA_CONFIG_INDICE = {
+    "chunk_size": 1000,
+    "chunk_overlap": 150,
+    "modelo_embeddings": "sentence-transformers/msmarco-bert-base-dot-v5",
+    "backend_embeddings": DSA_BACKEND_EMBEDDINGS,
+    "precisao_vetores": "float16" if DSA_DIR_CACHE_EMBEDDINGS else "float32",
+}
+
 # Define as configurações da página principal do app Streamlit
 st.set_page_config(page_title = "Data Science Academy", page_icon = ":100:", layout = "wide")
 
@@ -71,57 +92,199 @@ os.environ["GROQ_API_KEY"] = api_key
 # Inicializa o modelo de linguagem via ChatGroq com temperatura e limite de tokens
 llm = ChatGroq(model = "openai/gpt-oss-20b", temperature = 0.2, max_tokens = 1024)
 
+# Carrega o modelo de embeddings uma única vez por processo (os pesos ficam na memória e servem todas as sessões)
+# (com o cache ligado, o modelo fica atrás do cache de embeddings por chunk, também compartilhado)
+@st.cache_resource
+def dsa_obtem_embeddings():
+    embeddings = DsaEmbeddings(
+        DSA_CONFIG_INDICE["modelo_embeddings"],
+        backend = DSA_BACKEND_EMBEDDINGS,
+        batch_size = DSA_BATCH_EMBEDDINGS,
+        threads = DSA_THREADS_EMBEDDINGS or None,
+    )
+    return DsaCacheEmbeddings(embeddings, DSA_DIR_CACHE_EMBEDDINGS) if DSA_DIR_CACHE_EMBEDDINGS else embeddings
+
+# Abre a biblioteca de documentos uma única vez por processo (compartilhada por todas as sessões)
+@st.cache_resource
+def dsa_obtem_biblioteca():
+    return DsaBiblioteca(
+        dsa_pasta_biblioteca(DSA_DIR_BIBLIOTECA, DSA_CONFIG_INDICE),
+        dsa_obtem_embeddings(),
+        limite_chunks = DSA_LIMITE_CHUNKS_BIBLIOTECA,
+    )
+
+# Cria o registro das ingestões em andamento uma única vez por processo (quem envia um PDF em indexação acompanha a mesma)
+@st.cache_resource
+def dsa_obtem_ingestoes():
+    return DsaIngestoes()
+
+# Define a ingestão de um PDF na biblioteca, executada em uma thread em segundo plano
+def dsa_trabalho_ingestao(ingestao, doc_id):
+
+    # Obtém a biblioteca e o modelo de embeddings compartilhados
+    biblioteca = dsa_obtem_biblioteca()
+    embeddings = dsa_obtem_embeddings()
+
+    # Mede a vazão dos embeddings nesta thread
+    embeddings.inicia_medida()
+
+    # Grava os chunks do documento em fluxo na coleção da biblioteca (em caso de falha, apaga o que foi gravado)
+    try:
+        ingestao.executa(biblioteca.vectordb)
+    except Exception:
+        biblioteca.remove(doc_id)
+        raise
+
+    # Marca o documento como pronto
+    ingestao.medida = embeddings.medida()
+    biblioteca.conclui(doc_id, ingestao.paginas_total, ingestao.chunks)
+
+# Obtém a biblioteca
+biblioteca = dsa_obtem_biblioteca()
+
 # Cria um campo para o upload de um arquivo PDF jurídico
 pdf_file = st.file_uploader("Envie um PDF da área jurídica (contrato, parecer, decisão, lei consolidada…)", type = ["pdf"])
 
-# Cria um diretório temporário para armazenar os vetores do ChromaDB
-if "chroma_dir" not in st.session_state:
-    st.session_state.chroma_dir = tempfile.mkdtemp(prefix = "chroma_rag_")
-
-# Define função para construir o índice vetorial a partir do PDF enviado
-def dsa_cria_banco_vetorial(pdf_bytes) -> Chroma:
-
-    # Cria um arquivo temporário e salva o conteúdo do PDF nele
-    with tempfile.NamedTemporaryFile(delete = False, suffix = ".pdf") as tmp:
-        tmp.write(pdf_bytes)
-        tmp_path = tmp.name
-
-    # Carrega o conteúdo do PDF usando o PyPDFLoader
-    docs = PyPDFLoader(tmp_path).load()
-    
-    # Cria o divisor de texto em blocos menores com sobreposição entre partes
-    splitter = RecursiveCharacterTextSplitter(chunk_size = 1000, chunk_overlap = 150)
-
-    # Aplica o divisor de texto e cria os chunks
-    chunks = splitter.split_documents(docs)
-
-    # Gera embeddings com um modelo da HuggingFace especializado em recuperação semântica
-    embeddings = HuggingFaceEmbeddings(model_name = "sentence-transformers/msmarco-bert-base-dot-v5")
-    
-    # Cria um banco de vetores persistente com o Chroma
-    vectordb = Chroma.from_documents(documents = chunks, embedding = embeddings, persist_directory = st.session_state.chroma_dir)
-
-    # Retorna o banco vetorial criado
-    return vectordb
-
-# Realiza a indexação do PDF quando enviado e ainda não processado
-if pdf_file and "vectordb_ready" not in st.session_state:
-    with st.spinner("Indexando o PDF no ChromaDB…"):
-        st.session_state.vectordb = dsa_cria_banco_vetorial(pdf_file.read())
-        st.session_state.vectordb_ready = True
-        st.success("Indexação concluída.")
+# Adiciona o PDF enviado à biblioteca (o doc_id é o conteúdo, não o nome do arquivo)
+if pdf_file:
+
+    # Calcula o doc_id do PDF
+    pdf_bytes = pdf_file.getvalue()
+    doc_id = dsa_chave_documento(pdf_bytes)
+    documento = biblioteca.documento(doc_id)
+
+    # O mesmo PDF já está na biblioteca (enviado nesta ou em outra sessão): nada a indexar
+    if documento is not None:
+        st.info(f"Este PDF já está na biblioteca: {documento['titulo']} ({documento['tipo']}).")
+
+    # PDF novo: pede os metadados do documento
+    else:
+        with st.form("dsa_form_documento"):
+            titulo = st.text_input("Título", value = os.path.splitext(pdf_file.name)[0])
+            col_tipo, col_data = st.columns(2)
+            tipo = col_tipo.selectbox("Tipo", DSA_TIPOS_DOCUMENTO)
+            data = col_data.date_input("Data do documento", value = None, format = "DD/MM/YYYY")
+            adicionar = st.form_submit_button("Adicionar à biblioteca")
+
+        if adicionar:
+
+            # Registra o documento e inicia a ingestão em segundo plano (ou acompanha a que outra sessão já iniciou)
+            def dsa_cria_ingestao():
+                biblioteca.registra(doc_id, titulo.strip() or pdf_file.name, tipo, data.isoformat() if data else None, pdf_file.name)
+                splitter = RecursiveCharacterTextSplitter(chunk_size = DSA_CONFIG_INDICE["chunk_size"], chunk_overlap = DSA_CONFIG_INDICE["chunk_overlap"])
+                return DsaIngestao(pdf_bytes, splitter, biblioteca.metadados_chunk(doc_id))
+
+            ingestao = dsa_obtem_ingestoes().inicia(doc_id, dsa_cria_ingestao, lambda ingestao: dsa_trabalho_ingestao(ingestao, doc_id))
+
+            # Espera só o primeiro lote de chunks: a partir dele as perguntas já consultam as páginas indexadas
+            with st.spinner("Indexando o PDF no ChromaDB…"):
+                barra = st.progress(0.0, text = "Extraindo as primeiras páginas…")
+                while not ingestao.aguarda_primeiro_lote(timeout = 0.5):
+                    barra.progress(ingestao.progresso(), text = f"Página {ingestao.paginas_lidas} de {ingestao.paginas_total or '?'}")
+                barra.empty()
+
+            # Interrompe se a ingestão falhou antes do primeiro lote
+            if ingestao.erro is not None:
+                st.error(f"Falha ao indexar o PDF: {ingestao.erro}")
+                st.stop()
+
+            # O novo documento entra na seleção de documentos consultados
+            st.session_state.ingestao = ingestao
+            st.session_state.docs_selecionados = st.session_state.get("docs_selecionados", []) + [doc_id]
+            st.rerun()
+
+# Mostra o progresso da ingestão em segundo plano (o fragmento é executado de novo a cada 2 segundos)
+@st.fragment(run_every = 2)
+def dsa_mostra_ingestao():
+
+    # Nada a mostrar sem uma ingestão iniciada nesta sessão
+    ingestao = st.session_state.get("ingestao")
+    if ingestao is None:
+        return
+
+    # Em andamento: barra de progresso (as perguntas já usam as páginas indexadas)
+    if not ingestao.concluida:
+        st.progress(
+            ingestao.progresso(),
+            text = f"Indexando em segundo plano: página {ingestao.paginas_lidas} de {ingestao.paginas_total}, "
+                   f"{ingestao.chunks} chunks. As perguntas já consultam as páginas indexadas.",
+        )
+        return
+
+    # Falhou: o documento sai da biblioteca e pode ser enviado de novo
+    if ingestao.erro is not None:
+        st.error(f"Falha ao indexar o PDF: {ingestao.erro}")
+        return
+
+    st.success(f"Indexação concluída: {ingestao.paginas_total} páginas, {ingestao.chunks} chunks em {ingestao.segundos or 0:.1f}s.")
+
+    # Mostra a vazão da vetorização (chunks por segundo nesta máquina), usada para dimensionar as máquinas de CPU
+    medida = ingestao.medida
+    if medida and medida["chunks"]:
+        st.caption(
+            f"Embeddings: {medida['chunks']} chunks em {medida['segundos']:.1f}s "
+            f"({medida['chunks_por_segundo']:.1f} chunks/s, backend {medida['backend']}, "
+            f"lote {medida['batch_size']}, {medida['threads']} threads)"
+        )
+
+    # Mostra quantos chunks vieram do cache de embeddings (sem executar o modelo)
+    if medida and medida.get("chunks_do_cache"):
+        st.caption(f"Cache de embeddings: {medida['chunks_do_cache']} de {medida['chunks_recebidos']} chunks reaproveitados.")
+
+dsa_mostra_ingestao()
+
+# Lista os documentos da biblioteca
+documentos = biblioteca.documentos()
+titulos = {d["doc_id"]: f"{d['titulo']} ({d['tipo']}{', ' + d['data'] if d['data'] else ''})" for d in documentos}
+
+# Mostra a biblioteca, com a opção de remover documentos (só os chunks do documento são apagados)
+with st.expander(f"📚 Biblioteca ({len(documentos)} documentos)"):
+
+    if documentos:
+        st.dataframe(
+            [
+                {"Título": d["titulo"], "Tipo": d["tipo"], "Data": d["data"] or "", "Páginas": d["paginas"],
+                 "Chunks": d["chunks"], "Situação": "pronto" if d["status"] == "pronto" else "indexando"}
+                for d in documentos
+            ],
+            hide_index = True,
+            width = "stretch",
+        )
+
+        col_remove, col_botao = st.columns([3, 1])
+        remover = col_remove.selectbox("Remover documento", list(titulos), format_func = titulos.get, index = None, placeholder = "Escolha um documento")
+
+        if col_botao.button("Remover", disabled = remover is None):
+            if dsa_obtem_ingestoes().obtem(remover) is not None:
+                st.warning("O documento ainda está sendo indexado. Aguarde o fim da indexação para removê-lo.")
+            else:
+                biblioteca.remove(remover)
+                st.rerun()
+    else:
+        st.write("Nenhum documento na biblioteca. Envie um PDF para começar.")
+
+# Filtros de metadados que definem em quais documentos a pergunta vai buscar
+col_tipos, col_docs = st.columns([1, 2])
+tipos = col_tipos.multiselect("Tipos de documento", sorted({d["tipo"] for d in documentos}), placeholder = "Todos os tipos")
+candidatos = [d["doc_id"] for d in documentos if not tipos or d["tipo"] in tipos]
+
+# Documentos consultados (sem seleção, todos os documentos dos tipos escolhidos)
+st.session_state.docs_selecionados = [d for d in st.session_state.get("docs_selecionados", []) if d in candidatos]
+selecionados = col_docs.multiselect("Documentos consultados", candidatos, format_func = titulos.get, key = "docs_selecionados", placeholder = "Todos os documentos")
+doc_ids = selecionados or candidatos
 
 # Inicializa o recuperador de contexto (retriever) como None
 retriever = None
 
-# Caso o vetor esteja pronto, cria o retriever com busca dos 3 blocos mais relevantes
-if st.session_state.get("vectordb_ready"):
-    retriever = st.session_state.vectordb.as_retriever(search_kwargs = {"k": 3})
+# Caso haja documentos, cria o retriever com busca dos 3 blocos mais relevantes, só nos documentos escolhidos
+if doc_ids:
+    retriever = biblioteca.retriever(doc_ids, k = 3)
 
 # Nesse trecho acima, a estratégia matemática é busca vetorial por similaridade, mais especificamente, 
 # uma busca por vizinhos mais próximos (k-NN, “k-nearest neighbors”) baseada em distância de similaridade coseno.
 
-# Quando você chama vectordb.as_retriever(search_kwargs={"k": 3}), o Chroma é instruído a, para cada nova consulta (query), 
+# O filtro {"doc_id": {"$in": [...]}} restringe a busca aos chunks dos documentos escolhidos; entre eles,
+# quando você chama vectordb.as_retriever(search_kwargs={"k": 3}), o Chroma é instruído a, para cada nova consulta (query), 
 # converter a pergunta em vetor de embeddings e depois calcular a proximidade angular entre esse vetor e os vetores armazenados dos chunks do PDF. 
 # Essa proximidade é medida pelo cosseno do ângulo entre os vetores: quanto menor o ângulo (maior o cosseno, mais próximo de 1), 
 # maior a similaridade semântica.
@@ -130,10 +293,10 @@ if st.session_state.get("vectordb_ready"):
 # a base matemática é: similaridade_coseno(A, B) = (A · B) / (||A|| × ||B||)
 
 # Define as instruções principais do assistente jurídico
-system_block = """Você é um assistente jurídico que responde usando estritamente o conteúdo do PDF fornecido quando possível.
-Se a resposta não estiver no PDF, diga que não encontrou no documento e ofereça passos de verificação.
-Formate a resposta com: Resumo, Fundamentação (com citações de trechos entre aspas) e Próximos passos.
-Se houver conflito entre o PDF e conhecimento externo, priorize o PDF e sinalize a divergência."""
+system_block = """Você é um assistente jurídico que responde usando estritamente o conteúdo dos documentos fornecidos quando possível.
+Se a resposta não estiver nos documentos, diga que não encontrou e ofereça passos de verificação.
+Formate a resposta com: Resumo, Fundamentação (com citações de trechos entre aspas, indicando o documento) e Próximos passos.
+Se houver conflito entre os documentos e conhecimento externo, priorize os documentos e sinalize a divergência."""
 
 # Cria o template de prompt que será usado para formatar perguntas e contexto do PDF
 qa_prompt = ChatPromptTemplate.from_messages(
@@ -142,7 +305,7 @@ qa_prompt = ChatPromptTemplate.from_messages(
         SystemMessage(content = system_block),
         
         # Define a estrutura da mensagem humana com pergunta e contexto
-        ("human", "Pergunta: {question}\n\nContexto do PDF:\n{context}\n\nResponda de forma sucinta, técnica e didática.")
+        ("human", "Pergunta: {question}\n\nContexto dos documentos:\n{context}\n\nResponda de forma sucinta, técnica e didática.")
     ]
 )
 
@@ -152,10 +315,10 @@ def dsa_formata_docs(docs):
     # Lista para armazenar trechos formatados
     out = []
     
-    # Percorre os documentos e extrai conteúdo e metadados (como número da página)
+    # Percorre os documentos e extrai conteúdo e metadados (como título do documento e número da página)
     for d in docs:
         meta = d.metadata or {}
-        where = f"p.{meta.get('page', '?')}"
+        where = f"{meta.get('titulo', meta.get('source', '?'))}, p.{meta.get('page', '?')}"
         out.append(f'[{where}] "{d.page_content.strip()[:800]}{"…" if len(d.page_content) > 800 else ""}"')
     
     # Junta todos os trechos formatados em um único texto
@@ -177,17 +340,25 @@ with col1:
 # Executa o pipeline quando o botão for clicado
 if btn:
 
-    # Verifica se há retriever disponível (PDF processado)
+    # Verifica se há retriever disponível (documentos na biblioteca)
     if not retriever:
         st.error("Envie um PDF primeiro para habilitar o RAG.")
         st.stop()
 
+    # Marca o uso dos documentos consultados (o LRU da biblioteca não remove documentos em uso)
+    biblioteca.toca(doc_ids)
+
     # Define o pipeline RAG: busca contexto no PDF, gera prompt e invoca o LLM
     rag_pipeline = RunnableParallel(
         context = retriever | dsa_formata_docs,
         question = RunnablePassthrough()
     ) | qa_prompt | llm | StrOutputParser()
 
+    # Avisa quando a resposta usa um documento ainda em indexação
+    ingestao = st.session_state.get("ingestao")
+    if ingestao is not None and not ingestao.concluida and ingestao.metadados["doc_id"] in doc_ids:
+        st.info(f"Indexação em andamento: a resposta considera as páginas já indexadas ({ingestao.paginas_lidas} de {ingestao.paginas_total}).")
+
     # Exibe o spinner enquanto gera a resposta
     with st.spinner("Gerando resposta…"):
         answer = rag_pipeline.invoke(pergunta)
@@ -203,7 +374,7 @@ if btn:
 # em que o retriever é executado quando você chama rag_pipeline.invoke(pergunta). O retriever criado a partir do Chroma chama internamente 
 # o vectordb.similarity_search(pergunta, k=3), que por sua vez executa embeddings.embed_query(pergunta) usando o modelo 
 # que você definiu (sentence-transformers/msmarco-bert-base-dot-v5). Esse vetor da query é então comparado aos vetores dos chunks já indexados 
-# (gerados antes em Chroma.from_documents(...)). Em paralelo, o RunnablePassthrough() só carrega a string da pergunta adiante, sem vetorização. 
+# (gerados antes, na ingestão, por vectordb.add_documents(...)). Em paralelo, o RunnablePassthrough() só carrega a string da pergunta adiante, sem vetorização. 
 # Ou seja, a query do usuário é vetorizada toda vez que o retriever roda, antes da busca de similaridade no Chroma, 
 # enquanto os vetores dos documentos já estavam persistidos desde a etapa de indexação.
 
@@ -0,0 +1,196 @@
+# Mini-Projeto 8 - IA Generativa, LLM e RAG Para Assistente Jurídico em Python com LangChain
+# Módulo da biblioteca de documentos (vários PDFs em uma coleção persistente do ChromaDB)
+
+# Todos os PDFs ficam em uma única coleção. Cada chunk leva os metadados do seu documento (doc_id, título, tipo,
+# data e página), e um catálogo (biblioteca.json) guarda uma linha por documento. Com isso:
+# - adicionar um documento é gravar só os chunks dele; remover é apagar os chunks com o seu doc_id (sem reconstruir nada)
+# - o retriever filtra pelos metadados e cada pergunta só busca nos documentos selecionados
+# - o doc_id é o hash do conteúdo do PDF: enviar de novo o mesmo PDF (em qualquer sessão) reaproveita o que já foi indexado
+# - o tamanho é limitado por um orçamento de chunks: acima dele, os documentos usados há mais tempo são removidos (LRU)
+# A coleção fica em uma pasta por configuração (chunking e embeddings): vetores de modelos diferentes não se misturam.
+
+# Importa o módulo 'hashlib' para o doc_id e o nome da pasta da configuração
+import hashlib
+
+# Importa o módulo 'json' para o catálogo
+import json
+
+# Importa o módulo 'os' para manipular arquivos e pastas
+import os
+
+# Importa o módulo 'threading' para a trava do catálogo (várias sessões do Streamlit rodam em threads do mesmo processo)
+import threading
+
+# Importa o módulo 'time' para as datas de inclusão e de último uso
+import time
+
+# Importa o repositório vetorial Chroma
+from langchain_community.vectorstores import Chroma
+
+# Tipos de documento da biblioteca
+DSA_TIPOS_DOCUMENTO = ("Contrato", "Parecer", "Decisão", "Lei", "Outro")
+
+# Nome da coleção e do arquivo do catálogo
+DSA_COLECAO_BIBLIOTECA = "biblioteca"
+DSA_ARQUIVO_CATALOGO = "biblioteca.json"
+
+# Função que calcula o doc_id (hash do conteúdo do PDF)
+def dsa_chave_documento(pdf_bytes):
+
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+# Função que devolve a pasta da biblioteca de uma configuração
+def dsa_pasta_biblioteca(diretorio, config):
+
+    # Mudar o tamanho dos chunks ou o modelo de embeddings gera outra pasta (e outra coleção)
+    nome = hashlib.sha256(json.dumps(config, sort_keys = True).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(diretorio, nome)
+
+# Classe da biblioteca de documentos
+class DsaBiblioteca:
+
+    # Construtor da classe
+    def __init__(self, diretorio, embeddings, limite_chunks, protecao_segundos = 600):
+
+        # Pasta, orçamento de chunks e tempo mínimo sem uso para um documento poder ser removido pelo LRU
+        self.diretorio = diretorio
+        self.limite_chunks = limite_chunks
+        self.protecao_segundos = protecao_segundos
+        os.makedirs(diretorio, exist_ok = True)
+
+        # Coleção única com os chunks de todos os documentos
+        self.vectordb = Chroma(collection_name = DSA_COLECAO_BIBLIOTECA, persist_directory = diretorio, embedding_function = embeddings)
+
+        # Catálogo (doc_id -> documento)
+        self._arquivo_catalogo = os.path.join(diretorio, DSA_ARQUIVO_CATALOGO)
+        self._lock = threading.Lock()
+        self._catalogo = {}
+
+        if os.path.exists(self._arquivo_catalogo):
+            with open(self._arquivo_catalogo, encoding = "utf-8") as f:
+                self._catalogo = json.load(f)
+
+        # Documentos que ficaram pela metade (processo encerrado durante a indexação): apaga os chunks gravados
+        for doc_id in [d for d, documento in self._catalogo.items() if documento["status"] != "pronto"]:
+            self.remove(doc_id)
+
+    # Método que grava o catálogo (arquivo temporário + troca atômica; chamado com a trava)
+    def _grava_catalogo(self):
+
+        temporario = self._arquivo_catalogo + ".tmp"
+        with open(temporario, "w", encoding = "utf-8") as f:
+            json.dump(self._catalogo, f, ensure_ascii = False, indent = 2)
+        os.replace(temporario, self._arquivo_catalogo)
+
+    # Método que devolve os documentos do catálogo (ordenados pelo título)
+    def documentos(self):
+
+        with self._lock:
+            return sorted((dict(d) for d in self._catalogo.values()), key = lambda d: d["titulo"].lower())
+
+    # Método que devolve um documento do catálogo (None se não estiver na biblioteca)
+    def documento(self, doc_id):
+
+        with self._lock:
+            documento = self._catalogo.get(doc_id)
+            return None if documento is None else dict(documento)
+
+    # Método que registra um documento em indexação
+    def registra(self, doc_id, titulo, tipo, data, arquivo):
+
+        with self._lock:
+            agora = time.time()
+            self._catalogo[doc_id] = {
+                "doc_id": doc_id,
+                "titulo": titulo,
+                "tipo": tipo,
+                "data": data,
+                "arquivo": arquivo,
+                "paginas": 0,
+                "chunks": 0,
+                "status": "indexando",
+                "adicionado_em": agora,
+                "ultimo_uso": agora,
+            }
+            self._grava_catalogo()
+
+    # Método que devolve os metadados gravados em cada chunk de um documento
+    def metadados_chunk(self, doc_id):
+
+        documento = self.documento(doc_id)
+
+        # O ChromaDB não aceita metadados nulos: a data só entra se foi informada
+        metadados = {"doc_id": doc_id, "titulo": documento["titulo"], "tipo": documento["tipo"], "source": documento["arquivo"]}
+        if documento["data"]:
+            metadados["data"] = documento["data"]
+
+        return metadados
+
+    # Método que marca um documento como pronto
+    def conclui(self, doc_id, paginas, chunks):
+
+        with self._lock:
+            documento = self._catalogo.get(doc_id)
+            if documento is not None:
+                documento.update(paginas = paginas, chunks = chunks, status = "pronto")
+                self._grava_catalogo()
+
+        # Aplica o orçamento de chunks, preservando o documento recém-indexado
+        self.limpa(manter = doc_id)
+
+    # Método que remove um documento (apaga só os chunks dele da coleção)
+    def remove(self, doc_id):
+
+        ids = self.vectordb.get(where = {"doc_id": doc_id}, include = [])["ids"]
+        if ids:
+            self.vectordb.delete(ids = ids)
+
+        with self._lock:
+            if self._catalogo.pop(doc_id, None) is not None:
+                self._grava_catalogo()
+
+    # Método que marca o uso de documentos (atualiza a ordem do LRU)
+    def toca(self, doc_ids):
+
+        with self._lock:
+            agora = time.time()
+            for doc_id in doc_ids:
+                if doc_id in self._catalogo:
+                    self._catalogo[doc_id]["ultimo_uso"] = agora
+            self._grava_catalogo()
+
+    # Método que aplica o orçamento de chunks (LRU)
+    def limpa(self, manter = None):
+
+        agora = time.time()
+
+        with self._lock:
+            total = sum(d["chunks"] for d in self._catalogo.values())
+            candidatos = sorted(
+                (d["ultimo_uso"], d["doc_id"], d["chunks"]) for d in self._catalogo.values()
+                if d["doc_id"] != manter and d["status"] == "pronto"
+            )
+
+        removidos = []
+
+        for ultimo_uso, doc_id, chunks in candidatos:
+
+            if total <= self.limite_chunks:
+                break
+
+            # Um documento consultado recentemente pode estar selecionado em alguma sessão: fica, mesmo acima do orçamento
+            if agora - ultimo_uso < self.protecao_segundos:
+                continue
+
+            self.remove(doc_id)
+            total -= chunks
+            removidos.append(doc_id)
+
+        # Retorna os documentos removidos
+        return removidos
+
+    # Método que cria o retriever restrito a um conjunto de documentos
+    def retriever(self, doc_ids, k = 3):
+
+        # O filtro de metadados é aplicado pelo ChromaDB antes da busca por similaridade
+        return self.vectordb.as_retriever(search_kwargs = {"k": k, "filter": {"doc_id": {"$in": list(doc_ids)}}})
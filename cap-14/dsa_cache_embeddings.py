@@ -0,0 +1,232 @@
+# Mini-Projeto 8 - IA Generativa, LLM e RAG Para Assistente Jurídico em Python com LangChain
+# Módulo do cache de embeddings por chunk
+
+# Documentos jurídicos repetem muito texto (cláusulas padrão, cabeçalhos, blocos de assinatura). O cache guarda
+# o vetor de cada chunk já vetorizado, identificado pelo hash do texto normalizado, e o indexador só executa o
+# modelo para os chunks nunca vistos (em qualquer documento).
+#
+# Arquivos do cache (uma pasta por modelo e backend, pois os vetores dependem dos dois):
+# - vetores.f16: matriz float16 (linhas x dimensão) acessada com memória mapeada (np.memmap); cresce dobrando de tamanho
+# - indice.bin: índice lateral com o hash (16 bytes) de cada linha, na ordem das linhas
+# - cache.json: modelo, backend e dimensão dos vetores
+# Os vetores de uma leva são gravados antes dos hashes: o índice só aponta para linhas completas.
+# O cache é compartilhado pelas sessões de um processo; dois processos não devem usar a mesma pasta ao mesmo tempo.
+
+# Importa o módulo 'hashlib' para o hash dos chunks
+import hashlib
+
+# Importa o módulo 'json' para a descrição do cache
+import json
+
+# Importa o módulo 'os' para manipular arquivos e pastas
+import os
+
+# Importa o módulo 'threading' para a trava e a medida por thread
+import threading
+
+# Importa o módulo 'unicodedata' para normalizar o texto dos chunks
+import unicodedata
+
+# Importa o NumPy para a matriz de vetores
+import numpy as np
+
+# Importa a interface de embeddings do LangChain (a usada pelo Chroma)
+from langchain_core.embeddings import Embeddings
+
+# Tamanho (bytes) do hash de cada chunk no índice lateral
+DSA_TAMANHO_HASH = 16
+
+# Capacidade inicial (linhas) da matriz de vetores
+DSA_CAPACIDADE_INICIAL = 4096
+
+# Função que normaliza o texto de um chunk
+def dsa_normaliza_chunk(texto):
+
+    # Unicode na forma NFKC e espaços em branco (quebras de linha, tabulações, espaços repetidos) reduzidos a um espaço
+    return " ".join(unicodedata.normalize("NFKC", texto).split())
+
+# Função que calcula o hash do texto normalizado de um chunk
+def dsa_hash_chunk(texto_normalizado):
+
+    return hashlib.blake2b(texto_normalizado.encode("utf-8"), digest_size = DSA_TAMANHO_HASH).digest()
+
+# Classe do cache de embeddings
+class DsaCacheEmbeddings(Embeddings):
+
+    # Construtor da classe
+    def __init__(self, embeddings, diretorio):
+
+        # 'embeddings' é o modelo (DsaEmbeddings) executado para os chunks que não estão no cache
+        self.embeddings = embeddings
+
+        # Uma pasta por modelo e backend
+        identificador = f"{embeddings.nome_modelo}|{embeddings.backend}"
+        nome = hashlib.sha256(identificador.encode("utf-8")).hexdigest()[:16]
+        self.diretorio = os.path.join(diretorio, nome)
+        os.makedirs(self.diretorio, exist_ok = True)
+
+        # Caminhos dos arquivos
+        self._arquivo_vetores = os.path.join(self.diretorio, "vetores.f16")
+        self._arquivo_indice = os.path.join(self.diretorio, "indice.bin")
+        self._arquivo_descricao = os.path.join(self.diretorio, "cache.json")
+
+        # Estado: hash -> linha, número de linhas válidas, dimensão e matriz mapeada
+        self._linhas = {}
+        self._n = 0
+        self._dimensao = None
+        self._vetores = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        # Abre o cache existente
+        self._abre(identificador)
+
+    # Método que abre os arquivos do cache
+    def _abre(self, identificador):
+
+        # Sem descrição, o cache está vazio: grava a descrição (a dimensão vem com o primeiro vetor)
+        if not os.path.exists(self._arquivo_descricao):
+            self._grava_descricao(identificador)
+            return
+
+        with open(self._arquivo_descricao, encoding = "utf-8") as f:
+            self._dimensao = json.load(f).get("dimensao")
+
+        if self._dimensao is None or not os.path.exists(self._arquivo_indice):
+            return
+
+        # Lê o índice lateral (descarta um registro incompleto no final, de uma gravação interrompida)
+        with open(self._arquivo_indice, "rb") as f:
+            dados = f.read()
+
+        n = len(dados) // DSA_TAMANHO_HASH
+        capacidade = os.path.getsize(self._arquivo_vetores) // (self._dimensao * 2) if os.path.exists(self._arquivo_vetores) else 0
+        n = min(n, capacidade)
+
+        for i in range(n):
+            self._linhas[dados[i * DSA_TAMANHO_HASH:(i + 1) * DSA_TAMANHO_HASH]] = i
+
+        # Acerta o índice para as linhas válidas e mapeia a matriz
+        if len(dados) != n * DSA_TAMANHO_HASH:
+            with open(self._arquivo_indice, "r+b") as f:
+                f.truncate(n * DSA_TAMANHO_HASH)
+
+        self._n = n
+        if capacidade:
+            self._vetores = np.memmap(self._arquivo_vetores, dtype = np.float16, mode = "r+", shape = (capacidade, self._dimensao))
+
+    # Método que grava a descrição do cache
+    def _grava_descricao(self, identificador):
+
+        modelo, backend = identificador.split("|")
+        with open(self._arquivo_descricao, "w", encoding = "utf-8") as f:
+            json.dump({"modelo": modelo, "backend": backend, "dimensao": self._dimensao}, f)
+
+    # Método que garante espaço para 'linhas' linhas na matriz (dobrando a capacidade)
+    def _reserva(self, linhas):
+
+        capacidade = 0 if self._vetores is None else self._vetores.shape[0]
+
+        if linhas <= capacidade:
+            return
+
+        nova = max(capacidade, DSA_CAPACIDADE_INICIAL)
+        while nova < linhas:
+            nova *= 2
+
+        # Libera o mapeamento atual antes de aumentar o arquivo
+        if self._vetores is not None:
+            self._vetores.flush()
+            self._vetores = None
+
+        with open(self._arquivo_vetores, "ab") as f:
+            f.truncate(nova * self._dimensao * 2)
+
+        self._vetores = np.memmap(self._arquivo_vetores, dtype = np.float16, mode = "r+", shape = (nova, self._dimensao))
+
+    # Método que acrescenta vetores novos ao cache
+    def _acrescenta(self, hashes, vetores):
+
+        # A primeira leva define a dimensão
+        if self._dimensao is None:
+            self._dimensao = vetores.shape[1]
+            self._grava_descricao(f"{self.embeddings.nome_modelo}|{self.embeddings.backend}")
+
+        # Grava os vetores primeiro e depois os hashes (o índice só aponta para linhas completas)
+        inicio = self._n
+        self._reserva(inicio + len(hashes))
+        self._vetores[inicio:inicio + len(hashes)] = vetores
+        self._vetores.flush()
+
+        with open(self._arquivo_indice, "ab") as f:
+            f.write(b"".join(hashes))
+
+        for i, h in enumerate(hashes):
+            self._linhas[h] = inicio + i
+
+        self._n = inicio + len(hashes)
+
+    # Método da interface do LangChain que vetoriza os chunks (só os que não estão no cache)
+    def embed_documents(self, texts):
+
+        if not texts:
+            return []
+
+        # Normaliza e calcula o hash de cada chunk
+        normalizados = [dsa_normaliza_chunk(t) for t in texts]
+        hashes = [dsa_hash_chunk(t) for t in normalizados]
+
+        # Chunks nunca vistos (sem repetir os que aparecem mais de uma vez na mesma leva)
+        with self._lock:
+            novos = {}
+            for h, texto in zip(hashes, normalizados):
+                if h not in self._linhas and h not in novos:
+                    novos[h] = texto
+
+        # Executa o modelo só para os chunks novos (fora da trava: outras sessões continuam lendo o cache)
+        if novos:
+            vetores = np.asarray(self.embeddings.embed_documents(list(novos.values())), dtype = np.float16)
+
+            with self._lock:
+                # Outra sessão pode ter gravado alguns dos mesmos chunks enquanto este modelo executava
+                pendentes = [i for i, h in enumerate(novos) if h not in self._linhas]
+                if pendentes:
+                    chaves = list(novos)
+                    self._acrescenta([chaves[i] for i in pendentes], vetores[pendentes])
+
+        # Monta o resultado a partir do cache (os vetores novos também passam pelo float16: mesmo texto, mesmo vetor)
+        with self._lock:
+            linhas = np.fromiter((self._linhas[h] for h in hashes), dtype = np.int64, count = len(hashes))
+            resultado = np.asarray(self._vetores[linhas], dtype = np.float32)
+
+        # Soma a medida da thread
+        medida = getattr(self._local, "medida", None)
+        if medida is not None:
+            medida[0] += len(texts)
+            medida[1] += len(texts) - len(novos)
+
+        return resultado.tolist()
+
+    # Método da interface do LangChain que vetoriza a pergunta (sem cache: as perguntas raramente se repetem)
+    def embed_query(self, text):
+
+        return self.embeddings.embed_query(text)
+
+    # Método que zera a medida da thread atual (do cache e do modelo)
+    def inicia_medida(self):
+
+        self._local.medida = [0, 0]
+        self.embeddings.inicia_medida()
+
+    # Método que devolve a medida da thread atual: a do modelo (só os chunks vetorizados) mais os acertos do cache
+    def medida(self):
+
+        chunks, acertos = getattr(self._local, "medida", [0, 0])
+        return {**self.embeddings.medida(), "chunks_recebidos": chunks, "chunks_do_cache": acertos}
+
+    # Método que resume o cache (vetores guardados e bytes em disco)
+    def resumo(self):
+
+        with self._lock:
+            capacidade = 0 if self._vetores is None else self._vetores.shape[0]
+            return {"vetores": self._n, "dimensao": self._dimensao, "bytes": capacidade * (self._dimensao or 0) * 2 + self._n * DSA_TAMANHO_HASH}
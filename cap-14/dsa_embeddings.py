@@ -0,0 +1,176 @@
+# Mini-Projeto 8 - IA Generativa, LLM e RAG Para Assistente Jurídico em Python com LangChain
+# Módulo do modelo de embeddings (Sentence Transformers) usado na indexação e nas perguntas
+
+# O modelo é carregado uma vez por processo (a app guarda a instância com st.cache_resource) e vetoriza
+# os chunks em lotes de tamanho configurável. Em CPU há dois backends opcionais mais rápidos:
+# - "onnx": o mesmo modelo executado pelo ONNX Runtime (o Sentence Transformers exporta o modelo na primeira
+#   carga se o repositório do modelo não tiver o arquivo ONNX; a exportação precisa do pacote optimum)
+# - "int8": o modelo PyTorch com as camadas lineares quantizadas para int8 (quantização dinâmica)
+# Os dois mudam levemente os vetores, por isso o backend faz parte da chave dos índices.
+# A vazão (chunks por segundo) é medida em cada chamada para dimensionar as máquinas de CPU.
+#
+# Exemplo de medição da vazão pelo terminal:
+# python dsa_embeddings.py --pdf Contrato.pdf --backend torch int8 --batch 16 32 64
+
+# Importa o módulo 'argparse' para os parâmetros da linha de comando
+import argparse
+
+# Importa o módulo 'threading' para a medida por thread (cada sessão do Streamlit roda em uma thread)
+import threading
+
+# Importa o módulo 'time' para medir a vazão
+import time
+
+# Importa o PyTorch para o número de threads e a quantização int8
+import torch
+
+# Importa a interface de embeddings do LangChain (a usada pelo Chroma)
+from langchain_core.embeddings import Embeddings
+
+# Importa o Sentence Transformers para carregar e executar o modelo
+from sentence_transformers import SentenceTransformer
+
+# Backends de inferência disponíveis
+DSA_BACKENDS_EMBEDDINGS = ("torch", "onnx", "int8")
+
+# Classe do modelo de embeddings
+class DsaEmbeddings(Embeddings):
+
+    # Construtor da classe
+    def __init__(self, modelo, backend = "torch", batch_size = 32, threads = None):
+
+        # Valida o backend
+        if backend not in DSA_BACKENDS_EMBEDDINGS:
+            raise ValueError(f"Backend de embeddings inválido: {backend} (use {', '.join(DSA_BACKENDS_EMBEDDINGS)})")
+
+        # Limita as threads de CPU do PyTorch, se pedido (a vazão por thread ajuda a dimensionar as máquinas)
+        if threads:
+            torch.set_num_threads(threads)
+
+        # Carrega o modelo na CPU (o backend ONNX usa o ONNX Runtime no lugar do PyTorch)
+        if backend == "onnx":
+            self.modelo = SentenceTransformer(modelo, device = "cpu", backend = "onnx")
+        else:
+            self.modelo = SentenceTransformer(modelo, device = "cpu")
+
+        # Quantização dinâmica: pesos das camadas lineares em int8, ativações quantizadas durante a execução
+        if backend == "int8":
+            self.modelo = torch.ao.quantization.quantize_dynamic(self.modelo, {torch.nn.Linear}, dtype = torch.qint8, inplace = True)
+
+        # Guarda a configuração
+        self.nome_modelo = modelo
+        self.backend = backend
+        self.batch_size = batch_size
+        self.threads = torch.get_num_threads()
+
+        # Acumulado do processo e medida da thread atual
+        self._lock = threading.Lock()
+        self._total = [0, 0.0]
+        self._local = threading.local()
+
+    # Método que vetoriza uma lista de textos em lotes
+    def _vetoriza(self, textos):
+
+        # Mede o tempo de inferência
+        inicio = time.perf_counter()
+
+        # O modelo msmarco-bert-base-dot-v5 usa produto escalar: os vetores não são normalizados
+        vetores = self.modelo.encode(
+            textos,
+            batch_size = self.batch_size,
+            convert_to_numpy = True,
+            normalize_embeddings = False,
+            show_progress_bar = False,
+        )
+
+        segundos = time.perf_counter() - inicio
+
+        # Soma a medida no acumulado e na medida da thread
+        with self._lock:
+            self._total[0] += len(textos)
+            self._total[1] += segundos
+
+        medida = getattr(self._local, "medida", None)
+        if medida is not None:
+            medida[0] += len(textos)
+            medida[1] += segundos
+
+        # Retorna os vetores
+        return vetores
+
+    # Método da interface do LangChain que vetoriza os chunks
+    def embed_documents(self, texts):
+
+        return self._vetoriza(list(texts)).tolist()
+
+    # Método da interface do LangChain que vetoriza a pergunta
+    def embed_query(self, text):
+
+        return self._vetoriza([text])[0].tolist()
+
+    # Método que zera a medida da thread atual (ex: antes de indexar um PDF)
+    def inicia_medida(self):
+
+        self._local.medida = [0, 0.0]
+
+    # Método que devolve a medida da thread atual desde 'inicia_medida'
+    def medida(self):
+
+        chunks, segundos = getattr(self._local, "medida", [0, 0.0])
+        return self._resume(chunks, segundos)
+
+    # Método que devolve o acumulado do processo
+    def total(self):
+
+        with self._lock:
+            chunks, segundos = self._total
+        return self._resume(chunks, segundos)
+
+    # Método que resume uma medida
+    def _resume(self, chunks, segundos):
+
+        return {
+            "chunks": chunks,
+            "segundos": segundos,
+            "chunks_por_segundo": chunks / segundos if segundos > 0 else 0.0,
+            "backend": self.backend,
+            "batch_size": self.batch_size,
+            "threads": self.threads,
+        }
+
+# Permite medir a vazão pelo terminal
+if __name__ == "__main__":
+
+    # Importa o carregador de PDF e o divisor de texto (só a medição usa)
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    parser = argparse.ArgumentParser(description = "Mede a vazão (chunks/s) do modelo de embeddings em CPU.")
+    parser.add_argument("--pdf", default = "Contrato.pdf", help = "PDF usado na medição")
+    parser.add_argument("--modelo", default = "sentence-transformers/msmarco-bert-base-dot-v5")
+    parser.add_argument("--backend", nargs = "+", default = ["torch"], choices = DSA_BACKENDS_EMBEDDINGS)
+    parser.add_argument("--batch", nargs = "+", type = int, default = [32], help = "Tamanhos de lote")
+    parser.add_argument("--threads", type = int, help = "Threads de CPU (padrão: as do PyTorch)")
+    args = parser.parse_args()
+
+    # Divide o PDF com a mesma configuração da app
+    docs = PyPDFLoader(args.pdf).load()
+    textos = [c.page_content for c in RecursiveCharacterTextSplitter(chunk_size = 1000, chunk_overlap = 150).split_documents(docs)]
+    print(f"{args.pdf}: {len(docs)} páginas, {len(textos)} chunks")
+
+    for backend in args.backend:
+
+        # Mede a carga do modelo e, com ele carregado, cada tamanho de lote
+        inicio = time.perf_counter()
+        embeddings = DsaEmbeddings(args.modelo, backend = backend, threads = args.threads)
+        print(f"\nbackend {backend}: modelo carregado em {time.perf_counter() - inicio:.1f}s ({embeddings.threads} threads)")
+
+        # Aquecimento (a primeira chamada inclui inicializações)
+        embeddings.embed_documents(textos[:8])
+
+        for batch_size in args.batch:
+            embeddings.batch_size = batch_size
+            embeddings.inicia_medida()
+            embeddings.embed_documents(textos)
+            m = embeddings.medida()
+            print(f"  batch {batch_size:>4}: {m['chunks_por_segundo']:8.1f} chunks/s ({m['segundos']:.1f}s)")
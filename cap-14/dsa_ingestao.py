@@ -0,0 +1,202 @@
+# Mini-Projeto 8 - IA Generativa, LLM e RAG Para Assistente Jurídico em Python com LangChain
+# Módulo da ingestão de PDFs em fluxo contínuo (streaming)
+
+# Em vez de carregar todas as páginas, dividir tudo e vetorizar tudo de uma vez, a ingestão é um fluxo:
+# 1. As páginas são extraídas por um pool de processos (cada tarefa extrai um intervalo de páginas)
+# 2. Um gerador divide cada página em chunks à medida que as páginas chegam, na ordem do documento
+# 3. Os chunks são vetorizados e gravados no banco vetorial em lotes, um lote de cada vez
+# A ingestão roda em uma thread em segundo plano: assim que o primeiro lote é gravado, o banco já responde
+# perguntas sobre as páginas indexadas, e a app acompanha o progresso pelos contadores da ingestão.
+
+# Importa o módulo 'multiprocessing' para o contexto 'spawn' do pool de processos
+import multiprocessing
+
+# Importa o módulo 'os' para o número de CPUs e a remoção do arquivo temporário
+import os
+
+# Importa o módulo 'tempfile' para gravar o PDF em um arquivo (os processos leem do disco)
+import tempfile
+
+# Importa o módulo 'threading' para a thread da ingestão e a sinalização do primeiro lote
+import threading
+
+# Importa o módulo 'time' para medir a duração
+import time
+
+# Importa a fila das tarefas em andamento
+from collections import deque
+
+# Importa o pool de processos
+from concurrent.futures import ProcessPoolExecutor
+
+# Importa o 'islice' para montar os lotes
+from itertools import islice
+
+# Importa o leitor de PDF (o mesmo usado pelo PyPDFLoader)
+from pypdf import PdfReader
+
+# Processos de extração, páginas por tarefa e chunks por lote gravado no banco vetorial
+DSA_PROCESSOS_PDF = min(4, os.cpu_count() or 1)
+DSA_PAGINAS_POR_TAREFA = 25
+DSA_CHUNKS_POR_LOTE = 64
+
+# Função (executada nos processos) que extrai o texto de um intervalo de páginas
+def dsa_extrai_paginas(caminho_pdf, inicio, fim):
+
+    leitor = PdfReader(caminho_pdf)
+    return [(i, leitor.pages[i].extract_text() or "") for i in range(inicio, fim)]
+
+# Função geradora das páginas (número, texto), na ordem do documento
+def dsa_gera_paginas(caminho_pdf, total_paginas, processos = DSA_PROCESSOS_PDF, paginas_por_tarefa = DSA_PAGINAS_POR_TAREFA):
+
+    # Intervalos de páginas de cada tarefa
+    intervalos = [(i, min(i + paginas_por_tarefa, total_paginas)) for i in range(0, total_paginas, paginas_por_tarefa)]
+
+    # Documento pequeno (ou um processo só): extrai na própria thread, sem o custo de iniciar processos
+    if processos <= 1 or len(intervalos) <= 1:
+        for inicio, fim in intervalos:
+            yield from dsa_extrai_paginas(caminho_pdf, inicio, fim)
+        return
+
+    # 'spawn': a app tem várias threads (Streamlit, PyTorch) e um 'fork' delas pode travar o processo filho
+    executor = ProcessPoolExecutor(max_workers = processos, mp_context = multiprocessing.get_context("spawn"))
+
+    try:
+
+        # No máximo duas tarefas por processo em andamento (a memória não cresce com o tamanho do documento)
+        proximos = iter(intervalos)
+        pendentes = deque(executor.submit(dsa_extrai_paginas, caminho_pdf, *intervalo) for intervalo in islice(proximos, 2 * processos))
+
+        # Entrega as páginas na ordem, repondo uma tarefa a cada intervalo concluído
+        while pendentes:
+            paginas = pendentes.popleft().result()
+            intervalo = next(proximos, None)
+            if intervalo is not None:
+                pendentes.append(executor.submit(dsa_extrai_paginas, caminho_pdf, *intervalo))
+            yield from paginas
+
+    finally:
+        executor.shutdown(wait = False, cancel_futures = True)
+
+# Função geradora dos chunks das páginas
+def dsa_gera_chunks(paginas, splitter, metadados):
+
+    # Cada página vira um ou mais documentos (chunks) com o número da página nos metadados, como no PyPDFLoader
+    for pagina, texto in paginas:
+        yield from splitter.create_documents([texto], metadatas = [{**metadados, "page": pagina}])
+
+# Função geradora de lotes de tamanho fixo (o último pode ser menor)
+def dsa_gera_lotes(itens, tamanho):
+
+    itens = iter(itens)
+    while lote := list(islice(itens, tamanho)):
+        yield lote
+
+# Classe de uma ingestão em andamento
+class DsaIngestao:
+
+    # Construtor da classe
+    def __init__(self, pdf_bytes, splitter, metadados, chunks_por_lote = DSA_CHUNKS_POR_LOTE, processos = DSA_PROCESSOS_PDF):
+
+        # Entrada da ingestão
+        self.pdf_bytes = pdf_bytes
+        self.splitter = splitter
+        self.metadados = metadados
+        self.chunks_por_lote = chunks_por_lote
+        self.processos = processos
+
+        # Progresso (lido pela app enquanto a thread da ingestão grava)
+        self.paginas_total = 0
+        self.paginas_lidas = 0
+        self.chunks = 0
+        self.inicio = time.time()
+        self.segundos = None
+        self.medida = None
+        self.erro = None
+        self.concluida = False
+
+        # Sinaliza o primeiro lote gravado (ou o fim da ingestão, se não houver lote)
+        self._primeiro_lote = threading.Event()
+
+    # Método que executa a ingestão no banco vetorial informado (chamado na thread da ingestão)
+    def executa(self, vectordb):
+
+        # Grava o PDF em um arquivo temporário (os processos de extração leem o arquivo)
+        with tempfile.NamedTemporaryFile(delete = False, suffix = ".pdf") as tmp:
+            tmp.write(self.pdf_bytes)
+            tmp_path = tmp.name
+
+        try:
+            self.paginas_total = len(PdfReader(tmp_path).pages)
+
+            # Conta as páginas à medida que o gerador as entrega
+            def dsa_paginas_contadas():
+                for pagina, texto in dsa_gera_paginas(tmp_path, self.paginas_total, processos = self.processos):
+                    self.paginas_lidas = pagina + 1
+                    yield pagina, texto
+
+            # Vetoriza e grava um lote de cada vez
+            chunks = dsa_gera_chunks(dsa_paginas_contadas(), self.splitter, self.metadados)
+            for lote in dsa_gera_lotes(chunks, self.chunks_por_lote):
+                vectordb.add_documents(lote)
+                self.chunks += len(lote)
+                self._primeiro_lote.set()
+
+        finally:
+            os.remove(tmp_path)
+
+        self.segundos = time.time() - self.inicio
+
+    # Método que espera o primeiro lote (retorna False se o tempo acabar antes)
+    def aguarda_primeiro_lote(self, timeout = None):
+
+        return self._primeiro_lote.wait(timeout)
+
+    # Método que devolve a fração concluída (páginas lidas / total)
+    def progresso(self):
+
+        if self.concluida:
+            return 1.0
+        return self.paginas_lidas / self.paginas_total if self.paginas_total else 0.0
+
+# Classe das ingestões em andamento no processo (compartilhada pelas sessões)
+class DsaIngestoes:
+
+    # Construtor da classe
+    def __init__(self):
+
+        self._ativas = {}
+        self._lock = threading.Lock()
+
+    # Método que devolve a ingestão em andamento de uma chave (None se não houver)
+    def obtem(self, chave):
+
+        with self._lock:
+            return self._ativas.get(chave)
+
+    # Método que inicia a ingestão de uma chave, ou devolve a que já está em andamento
+    def inicia(self, chave, cria_ingestao, trabalho):
+
+        # 'cria_ingestao()' cria a DsaIngestao; 'trabalho(ingestao)' roda na thread e chama 'ingestao.executa'
+        with self._lock:
+            ingestao = self._ativas.get(chave)
+            if ingestao is not None:
+                return ingestao
+            ingestao = self._ativas[chave] = cria_ingestao()
+
+        # Executa o trabalho na thread e, ao final (com ou sem erro), marca a ingestão como concluída
+        def dsa_alvo():
+            try:
+                trabalho(ingestao)
+            except Exception as erro:
+                ingestao.erro = erro
+            finally:
+                ingestao.concluida = True
+                ingestao._primeiro_lote.set()
+                with self._lock:
+                    self._ativas.pop(chave, None)
+
+        threading.Thread(target = dsa_alvo, name = f"dsa-ingestao-{chave[:8]}", daemon = True).start()
+
+        # Retorna a ingestão iniciada
+        return ingestao
@@ -0,0 +1,92 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de redução de pontos dos gráficos (downsampling).
+# Cada ponto de um gráfico Plotly vai para o navegador dentro do JSON da página: com milhões de
+# transações, os gráficos passam a mostrar uma versão reduzida, com a mesma forma visual.
+
+# Para as operações vetorizadas
+import numpy as np
+
+
+# Máximo de pontos do gráfico de linha (acima disso, aplica o LTTB)
+DSA_MAX_PONTOS_LINHA = 1500
+
+# Máximo de transações do gráfico de dispersão (acima disso, mostra as faixas agregadas no SQLite)
+DSA_MAX_PONTOS_DISPERSAO = 5000
+
+# Número de faixas de faturamento da dispersão agregada
+DSA_FAIXAS_FATURAMENTO = 60
+
+
+# Função que escolhe os pontos de uma série pelo algoritmo LTTB
+def dsa_lttb(x, y, n_saida):
+
+    """
+    Largest-Triangle-Three-Buckets: reduz uma série a 'n_saida' pontos preservando picos e vales.
+
+    A série é dividida em faixas; de cada faixa fica o ponto que forma o maior triângulo com
+    o ponto escolhido na faixa anterior e com a média da faixa seguinte.
+
+    Parâmetros:
+    x, y (array): Coordenadas da série, com 'x' em ordem crescente.
+    n_saida (int): Número de pontos desejado (o primeiro e o último são sempre mantidos).
+
+    Retorna:
+    (np.ndarray): Os índices dos pontos escolhidos, em ordem crescente.
+    """
+
+    x = np.asarray(x, dtype = np.float64)
+    y = np.asarray(y, dtype = np.float64)
+    n = len(x)
+
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+
+    # Limites das faixas internas (o primeiro e o último ponto ficam fora delas)
+    limites = (np.arange(n_saida - 1) * (n - 2) / (n_saida - 2)).astype(np.int64) + 1
+    limites[-1] = n - 1
+
+    indices = np.empty(n_saida, dtype = np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+
+    for i in range(n_saida - 2):
+
+        inicio, fim = limites[i], limites[i + 1]
+
+        # Média da faixa seguinte (na última faixa, o último ponto)
+        prox_inicio, prox_fim = fim, (limites[i + 2] if i + 2 < len(limites) else n)
+        media_x = x[prox_inicio:prox_fim].mean()
+        media_y = y[prox_inicio:prox_fim].mean()
+
+        # Área (o dobro) do triângulo de cada candidato da faixa atual
+        areas = np.abs(
+            (x[a] - media_x) * (y[inicio:fim] - y[a]) -
+            (x[a] - x[inicio:fim]) * (media_y - y[a])
+        )
+
+        a = inicio + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+
+# Função que reduz a série diária do gráfico de linha
+def dsa_reduz_serie(df, coluna_x = "date", coluna_y = "faturamento", max_pontos = DSA_MAX_PONTOS_LINHA):
+
+    """
+    Aplica o LTTB à série (ordenada por 'coluna_x') quando ela tem mais de 'max_pontos' linhas.
+
+    Retorna:
+    (tuple): O DataFrame (reduzido ou o original) e um booleano indicando se houve redução.
+    """
+
+    if len(df) <= max_pontos:
+        return df, False
+
+    # Datas viram números (nanossegundos) apenas para o cálculo das áreas
+    x = df[coluna_x].to_numpy().astype(np.int64) if np.issubdtype(df[coluna_x].dtype, np.datetime64) else df[coluna_x].to_numpy()
+
+    return df.iloc[dsa_lttb(x, df[coluna_y].to_numpy(), max_pontos)], True
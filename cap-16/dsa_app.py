@@ -3,23 +3,69 @@
 
 # --- Bloco 1: Importação de Bibliotecas e Configuração da Página ---
 
-# Para interagir com o banco de dados SQLite
-import sqlite3 
-
 # Importa bibliotecas de manipulação e análise de dados
-import numpy as np   # Para operações numéricas e geração de dados aleatórios
 import pandas as pd  # Para manipulação e análise de dados (DataFrames)
 
 # Importa bibliotecas de visualização e web app
 import plotly.express as px  # Para criação de gráficos interativos
 import streamlit as st       # A biblioteca principal para criar a Data App
 
-# Importa a biblioteca de geração de PDF e seus componentes
-from fpdf import FPDF
-from fpdf.enums import XPos, YPos  # Enumerações para posicionamento no PDF
-
 # Importa módulos de data e hora
-from datetime import datetime, date, timedelta  # Para manipular datas e calcular períodos
+from datetime import datetime, date  # Para manipular datas e calcular períodos
+
+# Para ler as variáveis de ambiente de configuração (ex: backend de dados)
+import os
+
+# Para o arquivo temporário da exportação
+import tempfile
+
+# Para o servidor do endpoint de métricas (em segundo plano) e para descontar a medição dos bytes dos gráficos
+import threading
+import time
+
+# Importa as funções do banco de dados SQLite (conexão, migrações e inicialização)
+from dsa_banco import dsa_caminho_banco
+
+# Importa o motor de consultas (pool de conexões de leitura e conexão de escrita separada)
+from dsa_conexoes import dsa_cria_motor
+
+# Importa a camada de consultas (filtros e agregações executados no SQLite)
+from dsa_consultas import (
+    dsa_compacta_tipos,
+    dsa_consulta_dimensoes,
+    dsa_consulta_dispersao_faixas,
+    dsa_consulta_kpis,
+    dsa_consulta_linhas,
+    dsa_consulta_pagina,
+    dsa_consulta_receita_dia_semana,
+    dsa_consulta_receita_diaria,
+    dsa_consulta_receita_por,
+    dsa_consulta_total_pagina,
+    dsa_consulta_versao,
+    dsa_hash_filtros,
+    dsa_memoria_por_coluna,
+    dsa_prefere_indice_ordem,
+    DSA_ORDENACOES_PAGINA,
+)
+
+# Importa os comparativos de período (somas acumuladas dos totais diários) e a meta padrão
+# (com outro nome: DSA_META_CRESCIMENTO, abaixo, é a meta da app, que pode vir da variável de ambiente)
+from dsa_comparativos import DSA_META_CRESCIMENTO as DSA_META_CRESCIMENTO_PADRAO, dsa_calcula_comparativos, dsa_consulta_somas_acumuladas
+
+# Importa a exportação em blocos (CSV, CSV compactado e Parquet)
+from dsa_exportacao import DSA_FORMATOS_EXPORTACAO, dsa_cria_servidor_downloads, dsa_exporta, dsa_novo_download
+
+# Importa a redução de pontos (downsampling) dos gráficos
+from dsa_amostragem import DSA_FAIXAS_FATURAMENTO, DSA_MAX_PONTOS_DISPERSAO, dsa_reduz_serie
+
+# Importa o cache incremental das transações filtradas e o cache dos resultados agregados
+from dsa_cache import DsaCacheAgregados, DsaCacheIncremental
+
+# Importa a instrumentação das etapas (painel de desempenho e endpoint do Prometheus)
+from dsa_metricas import DsaMetricas, DsaRegistroEtapa, dsa_cria_servidor_metricas
+
+# Importa a fila de relatórios PDF gerados em segundo plano
+from dsa_tarefas import DSA_ESTADO_CONCLUIDO, DSA_ESTADO_ERRO, DSA_ESTADO_FILA, DSA_ESTADO_GERANDO, DsaFilaRelatorios
 
 # Configuração Inicial da Aplicação Streamlit
 st.set_page_config(
@@ -30,205 +76,327 @@ st.set_page_config(
 )
 
 
-# --- Bloco 2: Inicialização e População do Banco de Dados ---
+# --- Blocos 2 e 3: Banco de Dados ---
+
+# A inicialização/população do banco ('dsa_init_db'), a conexão ('dsa_cria_conexao'),
+# as migrações versionadas do esquema e os PRAGMAs de desempenho ficam no módulo dsa_banco.py,
+# importado no Bloco 1. Assim outros scripts (ex: testes de carga) usam o banco sem o Streamlit.
+
+
+# --- Bloco 4: Função de Carregamento de Dados com Cache ---
+
+# --- Backend Colunar (Opcional) ---
+# Com DSA_FONTE_DADOS=parquet, as transações linha a linha são lidas de um snapshot Parquet
+# particionado por mês (gerado por 'python dsa_parquet.py'), em vez do SQLite.
+# Com DSA_FONTE_DADOS=arrow, são filtradas de uma tabela do Arrow em memória, única por servidor
+# e compartilhada por todas as sessões (ver dsa_armazem.py).
+# KPIs e gráficos agregados continuam vindo da tabela diária do SQLite.
+DSA_FONTE_DADOS = os.environ.get("DSA_FONTE_DADOS", "sqlite")
+DSA_PARQUET_DIR = os.environ.get("DSA_PARQUET_DIR", "vendas_parquet")
+
+# --- Modo Compacto ---
+# Com DSA_MODO_COMPACTO=1, as transações em cache usam dimensões 'category', int32 e float32
+# (ver 'dsa_compacta_tipos' em dsa_consultas.py): cada entrada do cache ocupa uma fração da memória.
+DSA_MODO_COMPACTO = os.environ.get("DSA_MODO_COMPACTO", "0") == "1"
+
+
+# --- Motor de Consultas ---
+# DSA_MOTOR escolhe o motor registrado em dsa_conexoes.py (padrão: "sqlite", com pool de conexões).
+# Com DSA_MOTOR=duckdb, as agregações (KPIs e gráficos) rodam no DuckDB (dependência opcional);
+# as transações linha a linha continuam vindo do SQLite.
+DSA_MOTOR = os.environ.get("DSA_MOTOR", "sqlite")
 
-# Função de inicialização do banco de dados
-def dsa_init_db(conn):
+
+# --- Meta de Receita ---
+# A meta do card de receita é a receita do mesmo período no ano anterior (ou, sem histórico
+# de um ano, a do período anterior) com DSA_META_CRESCIMENTO a mais (padrão: o de dsa_comparativos.py, 0.10 = 10%).
+DSA_META_CRESCIMENTO = float(os.environ.get("DSA_META_CRESCIMENTO", DSA_META_CRESCIMENTO_PADRAO))
+
+
+# --- Downloads da Exportação ---
+# Os arquivos exportados são servidos do disco por um servidor local na porta DSA_DOWNLOADS_PORTA (padrão: 9109),
+# em pedaços: a memória não cresce com o tamanho do arquivo. DSA_DOWNLOADS_URL é o endereço que o navegador
+# usa para chegar a esse servidor (padrão: http://localhost:<porta>; atrás de um proxy, o endereço público).
+# Sem o servidor (DSA_DOWNLOADS_PORTA=0, ou a porta ocupada), o arquivo passa pela memória do Streamlit e só
+# é entregue até DSA_LIMITE_DOWNLOAD_MB (pequeno, para o pico de memória continuar limitado).
+DSA_DOWNLOADS_PORTA = int(os.environ.get("DSA_DOWNLOADS_PORTA", "9109"))
+DSA_DOWNLOADS_HOST = os.environ.get("DSA_DOWNLOADS_HOST", "127.0.0.1")
+DSA_DOWNLOADS_URL = os.environ.get("DSA_DOWNLOADS_URL", f"http://localhost:{DSA_DOWNLOADS_PORTA}").rstrip("/")
+DSA_LIMITE_DOWNLOAD_MB = float(os.environ.get("DSA_LIMITE_DOWNLOAD_MB", "5"))
+
+
+# --- Instrumentação ---
+# O tempo, as linhas e os bytes de cada etapa (consultas, gráficos, tabela, exportação, PDF) são sempre medidos.
+# Com DSA_DEBUG=1, a sidebar mostra o painel de desempenho da execução atual e o acumulado do servidor.
+# Com DSA_METRICAS_PORTA (ex: 9108), o acumulado fica em http://127.0.0.1:<porta>/metrics (formato Prometheus).
+DSA_DEBUG = os.environ.get("DSA_DEBUG", "0") == "1"
+DSA_METRICAS_PORTA = int(os.environ.get("DSA_METRICAS_PORTA", "0"))
+
+# Medir os bytes de um gráfico exige serializá-lo mais uma vez: só é feito quando alguém vai ler o número
+DSA_MEDE_BYTES_GRAFICOS = DSA_DEBUG or DSA_METRICAS_PORTA > 0
+
+
+# --- Decorador de Recurso do Streamlit ---
+# @st.cache_resource: guarda um objeto compartilhado (não copiado) entre reruns e sessões.
+# É o lugar certo para o motor: o banco é inicializado e o pool de conexões criado uma única vez.
+@st.cache_resource
+def dsa_obtem_motor():
 
     """
-    Inicializa o banco de dados.
-    1. Cria a tabela 'tb_vendas' se ela não existir.
-    2. Verifica se a tabela está vazia.
-    3. Se estiver vazia, popula com 180 dias de dados fictícios.
+    Retorna o motor de consultas compartilhado.
+    1. Abre a conexão de escrita (Bloco 3, em dsa_banco.py).
+    2. Garante que o banco esteja inicializado e migrado (Bloco 2, em dsa_banco.py).
+    3. Cria o pool de conexões somente leitura (ver dsa_conexoes.py).
     """
 
-    # Cria um objeto 'cursor' para executar comandos SQL na conexão fornecida
-    cursor = conn.cursor()
-    
-    # Define o comando SQL para criar a tabela
-    # 'IF NOT EXISTS' é uma cláusula de segurança que impede erro se a tabela já existir
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tb_vendas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, 
-            date TEXT,
-            regiao TEXT,
-            categoria TEXT,
-            produto TEXT,
-            faturamento REAL,
-            quantidade INTEGER
-        )
-    """)
+    return dsa_cria_motor(DSA_MOTOR, "dsa_database.db")
 
-    # Confirma (commita) a transação de criação da tabela
-    conn.commit()
 
-    # Verifica quantos registros (linhas) existem na tabela
-    cursor.execute("SELECT COUNT(*) FROM tb_vendas")
+# Função que retorna a conexão de leitura da execução atual
+def dsa_obtem_conexao():
 
-    # .fetchone()[0] captura o primeiro valor da primeira linha do resultado (a contagem)
-    # Este 'if' garante que o código de popular dados SÓ rode se a tabela estiver vazia
-    if cursor.fetchone()[0] == 0:
+    """
+    Retorna a conexão somente leitura da thread atual (cada execução do script roda em uma thread).
+    Sessões simultâneas usam conexões diferentes e não esperam umas pelas outras.
+    A conexão volta ao pool ao final da execução (Bloco 10).
+    """
 
-        # --- Geração de Dados Fictícios ---
-        
-        # Define a "semente" (seed) para o gerador de números aleatórios
-        # Isso garante que os mesmos dados "aleatórios" sejam gerados toda vez
-        # que o script for executado, tornando os resultados reprodutíveis.
-        np.random.seed(42)
-        
-        # Define uma data de início fixa (1º de Jan de 2026) para os dados
-        start_date = date(2026, 1, 1)
-        
-        # Cria uma lista de 180 objetos 'date' consecutivos
-        datas = [start_date + timedelta(days = i) for i in range(180)]
-        
-        # Define as listas de dimensões para os dados
-        regioes = ["Norte", "Nordeste", "Sul", "Sudeste", "Centro-Oeste"]
-        categorias = ["Eletrônicos", "Roupas", "Alimentos", "Serviços"]
-        
-        # Dicionário aninhado para mapear produtos e seus preços base por categoria
-        # Isso é crucial para criar a correlação positiva entre quantidade e faturamento
-        dict_produtos = {
-            "Eletrônicos": {"Smartphone": 1200, "Laptop": 3500, "Tablet": 800},
-            "Roupas": {"Camiseta": 50, "Terno": 150, "Casaco": 300},
-            "Alimentos": {"Congelados": 40, "Bebidas": 15, "Limpeza": 25},
-            "Serviços": {"Consultoria": 1000, "Instalação": 400, "Suporte": 200}
-        }
-
-        # Lista vazia para armazenar todas as linhas (tuplas) de dados
-        rows = []
-
-        # Loop para cada dia na lista de datas
-        for d in datas:
-
-            # Simula um número aleatório de vendas (entre 5 e 14) para aquele dia
-            vendas_diarias = np.random.randint(5, 15)
-
-            # Loop para cada venda individual dentro do dia
-            # Usamos '_' como variável pois não precisamos do número do índice
-            for _ in range(vendas_diarias):
-
-                # Escolhe aleatoriamente os atributos da venda
-                r = np.random.choice(regioes)
-                c = np.random.choice(categorias)
-                
-                # Escolhe um produto aleatório *baseado* na categoria escolhida
-                p = np.random.choice(list(dict_produtos[c].keys()))
-                
-                # Obtém o preço base do produto escolhido
-                preco_base = dict_produtos[c][p]
-                
-                # Gera uma quantidade aleatória (entre 1 e 24)
-                quantidade = np.random.randint(1, 25) 
-                
-                # Calcula o faturamento base (preço * quantidade)
-                base_faturamento = preco_base * quantidade
-                
-                # Adiciona "ruído" (noise) de +/- 20% para tornar os dados mais realistas
-                # Isso simula descontos, impostos ou pequenas variações de preço
-                noise = np.random.uniform(-0.20, 0.20)
-                faturamento = base_faturamento * (1 + noise)
-                
-                # Garante que o faturamento nunca seja negativo
-                faturamento = max(0, faturamento)
-
-                # Adiciona a linha de venda (como uma tupla) à lista 'rows'
-                # O formato da tupla deve corresponder exatamente à ordem das colunas no INSERT
-                rows.append((d.isoformat(), r, c, p, round(faturamento, 2), quantidade))
-
-        # --- Inserção em Massa (Bulk Insert) ---
-        # 'executemany' é MUITO mais eficiente do que fazer um 'execute' para cada linha
-        # Insere todas as tuplas da lista 'rows' no banco de dados de uma só vez
-        cursor.executemany(
-            "INSERT INTO tb_vendas (date, regiao, categoria, produto, faturamento, quantidade) VALUES (?, ?, ?, ?, ?, ?)",
-            rows,
-        )
+    return dsa_obtem_motor().conexao()
+
+
+# Função que carrega as opções dos filtros
+# O argumento 'versao' (maior id, contador de alterações) faz parte da chave do cache:
+# quando os dados mudam, a versão muda e as opções são relidas na hora, sem esperar um TTL.
+@st.cache_data(max_entries = 8)
+def dsa_carrega_dimensoes(versao):
+
+    """
+    Carrega apenas o que a sidebar precisa para montar os filtros:
+    o intervalo de datas e os valores distintos de região, categoria e produto.
+
+    Parâmetros:
+    versao (tuple): A versão dos dados (ver 'dsa_consulta_versao'); usada só como chave do cache.
+    """
+
+    return dsa_consulta_dimensoes(dsa_obtem_conexao())
+
+
+# --- Cache Incremental das Transações ---
+# Em vez de um TTL fixo (que servia dados com até 10 minutos de atraso ou relia a tabela inteira),
+# o cache compara a versão dos dados a cada rerun. Quando chegam vendas novas, busca somente
+# as linhas com id acima do último visto e as anexa ao DataFrame guardado (ver dsa_cache.py).
+# @st.cache_resource: o objeto de cache é único e compartilhado entre reruns e sessões.
+@st.cache_resource
+def dsa_obtem_cache_dados():
+
+    """Retorna o cache incremental compartilhado das transações filtradas."""
+
+    return DsaCacheIncremental(max_entradas = 32, compacto = DSA_MODO_COMPACTO)
+
+
+# --- Cache dos Resultados Agregados ---
+# Cada rerun (trocar de aba, clicar em um botão) executaria de novo todas as consultas dos gráficos.
+# O cache guarda cada resultado pela consulta + hash canônico dos filtros + versão dos dados:
+# a mesma seleção, em qualquer sessão, é atendida sem ir ao banco (ver dsa_cache.py).
+@st.cache_resource
+def dsa_obtem_cache_agregados():
+
+    """Retorna o cache compartilhado dos resultados agregados (LRU limitado a 256 entradas e 64 MB)."""
+
+    return DsaCacheAgregados(max_entradas = 256, max_bytes = 64 * 1024**2)
+
+
+# Função que retorna as métricas compartilhadas das etapas
+# @st.cache_resource: um único registro por servidor (e um único endpoint, se DSA_METRICAS_PORTA estiver definida).
+@st.cache_resource
+def dsa_obtem_metricas():
+
+    metricas = DsaMetricas()
+
+    if DSA_METRICAS_PORTA:
+        try:
+            servidor = dsa_cria_servidor_metricas(metricas, porta = DSA_METRICAS_PORTA)
+        except OSError as erro:
+            # Ex: a porta já está em uso por outro processo; a app segue sem o endpoint
+            print(f"Endpoint de métricas indisponível na porta {DSA_METRICAS_PORTA}: {erro}")
+        else:
+            threading.Thread(target = servidor.serve_forever, daemon = True, name = "dsa-metricas").start()
+
+    return metricas
+
+
+# Função que retorna a pasta servida pelo servidor de downloads (None sem o servidor)
+# @st.cache_resource: um único servidor por processo, iniciado na primeira exportação.
+@st.cache_resource
+def dsa_obtem_pasta_downloads():
+
+    if not DSA_DOWNLOADS_PORTA:
+        return None
 
-        # Confirma (commita) a transação de inserção de dados
-        conn.commit()
+    pasta = os.path.join(tempfile.gettempdir(), f"dsa_downloads_{DSA_DOWNLOADS_PORTA}")
+    os.makedirs(pasta, exist_ok = True)
 
+    try:
+        servidor = dsa_cria_servidor_downloads(pasta, porta = DSA_DOWNLOADS_PORTA, host = DSA_DOWNLOADS_HOST)
+    except OSError as erro:
+        # Ex: a porta já está em uso por outro processo; a exportação volta a passar pela memória
+        print(f"Servidor de downloads indisponível na porta {DSA_DOWNLOADS_PORTA}: {erro}")
+        return None
 
-# --- Bloco 3: Função de Conexão com o Banco de Dados ---
+    threading.Thread(target = servidor.serve_forever, daemon = True, name = "dsa-downloads").start()
 
-# Função de conexão ao banco de dados
-def dsa_cria_conexao(db_path = "dsa_database.db"):
+    return pasta
+
+
+# Função que executa uma consulta do dashboard através do cache de agregados
+def dsa_agrega(versao, consulta, filtros, *args, **kwargs):
 
     """
-    Cria e retorna um objeto de conexão com o banco de dados SQLite.
-    
+    Retorna o resultado de 'consulta' (uma função 'dsa_consulta_*') para os filtros,
+    reaproveitando o resultado guardado enquanto a versão dos dados não mudar.
+
     Parâmetros:
-    db_path (str): O caminho e nome do arquivo .db a ser usado. 
-                   O padrão é "dsa_database.db".
-                   Se o arquivo não existir, o SQLite o criará.
+    versao (tuple): A versão dos dados lida no início do rerun.
+    consulta (function): A função de consulta.
+    filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
     """
 
-    # Cria a conexão com o banco de dados SQLite
-    # check_same_thread=False: Esta é uma configuração importante para o Streamlit.
-    # O Streamlit executa o código em diferentes threads (processos). 
-    # Por padrão, o SQLite só permite que a thread que o criou interaja com ele.
-    # Definir como 'False' permite que múltiplas threads (como as do Streamlit) 
-    # acessem a mesma conexão.
-    conn = sqlite3.connect(db_path, check_same_thread = False)
-    
-    # Retorna o objeto de conexão para ser usado por outras funções
-    return conn
+    # Nome da etapa: a consulta mais os argumentos de texto (ex: "sql.receita_por.categoria")
+    nome = ".".join(["sql", consulta.__name__.replace("dsa_consulta_", ""), *(a for a in args if isinstance(a, str))])
 
+    with dsa_obtem_metricas().etapa(nome) as registro:
+
+        # As agregações usam a conexão analítica do motor escolhido (SQLite ou DuckDB, ver DSA_MOTOR)
+        resultado = dsa_obtem_cache_agregados().obtem(versao, consulta, dsa_obtem_motor().conexao_analitica(), filtros, *args, **kwargs)
+        registro.linhas = len(resultado) if isinstance(resultado, pd.DataFrame) else 1
+
+    return resultado
 
-# --- Bloco 4: Função de Carregamento de Dados com Cache ---
 
-# --- Decorador de Cache do Streamlit ---
-# @st.cache_data: Este é um comando "mágico" do Streamlit.
-# Ele "memoriza" o resultado (o DataFrame) desta função.
-# Se a função for chamada novamente (ex: quando o usuário mexe um filtro),
-# o Streamlit usa o resultado salvo na memória em vez de rodar a função de novo.
-# ttl=600: (Time To Live) Define que o cache expira após 600 segundos (10 minutos).
-# Após 10 minutos, o Streamlit executará a função novamente para buscar dados frescos.
-@st.cache_data(ttl=600) 
-def dsa_carrega_dados():
+# Função que envia um gráfico ao navegador, registrando o número de pontos e os bytes
+def dsa_envia_grafico(fig, registro, pontos):
 
     """
-    Função principal para carregar os dados.
-    1. Conecta ao banco.
-    2. Garante que o banco esteja inicializado (chama Bloco 2).
-    3. Carrega a tabela 'tb_vendas' em um DataFrame do Pandas.
-    4. Fecha a conexão.
-    5. Retorna o DataFrame.
+    Renderiza 'fig' com st.plotly_chart dentro da etapa 'registro' (ver 'dsa_obtem_metricas').
+
+    Parâmetros:
+    fig (Figure): O gráfico do Plotly.
+    registro (DsaRegistroEtapa): O registro da etapa do gráfico.
+    pontos (int): Linhas de dados do gráfico.
     """
-    
-    # Chama a função do Bloco 3 para obter uma conexão com o DB
-    conn = dsa_cria_conexao()
-    
-    # Chama a função do Bloco 2 para garantir que o DB e a tabela existam
-    # Se a tabela estiver vazia, esta função também irá populá-la.
-    dsa_init_db(conn) 
-    
-    # Executa uma consulta SQL para selecionar TUDO (*) da 'tb_vendas'
-    # pd.read_sql_query: Função do Pandas que lê o resultado de um SQL direto para um DataFrame.
-    # parse_dates=["date"]: Instrui o Pandas a converter a coluna 'date' (que é TEXTO no SQLite)
-    # em um tipo de dado datetime, que é essencial para gráficos e filtros de tempo.
-    df = pd.read_sql_query("SELECT * FROM tb_vendas", conn, parse_dates = ["date"])
-    
-    # Boa prática: Fecha a conexão com o banco de dados após a consulta
-    conn.close()
-    
-    # Retorna o DataFrame carregado para ser usado pelo restante do app
-    return df
+
+    registro.linhas = pontos
+
+    if DSA_MEDE_BYTES_GRAFICOS:
+        # O JSON do gráfico é o que vai para o navegador; a serialização extra não entra no tempo da etapa
+        inicio = time.perf_counter()
+        registro.bytes = len(fig.to_json())
+        registro.desconto += time.perf_counter() - inicio
+
+    st.plotly_chart(fig, width = 'stretch')
+
+
+# Função que retorna o armazém compartilhado (backend "arrow")
+# @st.cache_resource: um único armazém por servidor, compartilhado por todas as sessões.
+@st.cache_resource
+def dsa_obtem_armazem():
+
+    """Retorna a tabela do Arrow compartilhada com todas as transações."""
+
+    # Importado aqui: o módulo só é carregado quando o backend Arrow está ativo
+    from dsa_armazem import DsaArmazemArrow
+
+    return DsaArmazemArrow()
+
+
+# Função que lê as transações filtradas do snapshot Parquet
+# @st.cache_resource (e não cache_data): o DataFrame é compartilhado sem ser copiado a cada rerun.
+# A pasta do snapshot faz parte da chave: um snapshot novo (outra subpasta) invalida as entradas antigas.
+@st.cache_resource(max_entries = 32)
+def dsa_carrega_dados_parquet(filtros, pasta_snapshot):
+
+    """
+    Lê as transações filtradas de um snapshot Parquet (ver 'dsa_le_parquet' em dsa_parquet.py).
+
+    Parâmetros:
+    filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+    pasta_snapshot (str): A subpasta do snapshot (ver 'dsa_pasta_parquet'); cada exportação grava uma nova.
+    """
+
+    # Importado aqui: o módulo só é carregado quando o backend Parquet está ativo
+    from dsa_parquet import dsa_le_parquet
+
+    df = dsa_le_parquet(pasta_snapshot, filtros)
+
+    return dsa_compacta_tipos(df) if DSA_MODO_COMPACTO else df
+
+
+# Função que carrega as transações filtradas
+def dsa_carrega_dados(filtros):
+
+    """
+    Carrega as transações usadas nas visões linha a linha (tabela, dispersão e CSV).
+
+    O filtro é aplicado pelo próprio SQLite (cláusula WHERE parametrizada),
+    então somente as linhas selecionadas chegam ao Pandas. O resultado vem do
+    cache incremental: novas vendas aparecem em segundos, sem recarregar tudo.
+    Com DSA_FONTE_DADOS=parquet, as linhas vêm do snapshot Parquet (se existir e estiver na versão atual dos dados);
+    com DSA_FONTE_DADOS=arrow, são um recorte da tabela compartilhada, que não fica em cache por sessão.
+
+    Parâmetros:
+    filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+    """
+
+    if DSA_FONTE_DADOS == "arrow":
+
+        df = dsa_obtem_armazem().filtra(dsa_obtem_conexao(), filtros)
+
+        return dsa_compacta_tipos(df) if DSA_MODO_COMPACTO else df
+
+    if DSA_FONTE_DADOS == "parquet":
+
+        from dsa_parquet import DSA_ARQUIVO_SNAPSHOT, dsa_pasta_parquet, dsa_versao_parquet
+
+        # A subpasta é resolvida uma vez: a versão e as linhas vêm do mesmo snapshot, mesmo que outro
+        # processo troque o snapshot atual durante esta execução
+        pasta_snapshot = dsa_pasta_parquet(DSA_PARQUET_DIR)
+        versao_snapshot = dsa_versao_parquet(pasta_snapshot) if pasta_snapshot is not None else None
+
+        # Snapshot em dia com o banco: as linhas vêm do Parquet (se a subpasta já tiver sido apagada
+        # por exportações mais novas, segue com o SQLite nesta execução)
+        if versao_snapshot is not None and versao_snapshot == dsa_consulta_versao(dsa_obtem_conexao()):
+            try:
+                return dsa_carrega_dados_parquet(filtros, pasta_snapshot)
+            except FileNotFoundError:
+                versao_snapshot = None
+
+        # Snapshot desatualizado (vendas novas, UPDATE ou DELETE depois da exportação): segue com o SQLite,
+        # para a tabela e a exportação não divergirem dos KPIs, e avisa que o snapshot precisa ser atualizado
+        if versao_snapshot is not None:
+            data_snapshot = datetime.fromtimestamp(os.path.getmtime(os.path.join(pasta_snapshot, DSA_ARQUIVO_SNAPSHOT)))
+            st.warning(
+                f"O snapshot Parquet (versão {versao_snapshot}, gerado em {data_snapshot:%d/%m/%Y %H:%M}) está desatualizado; "
+                "as transações vêm do SQLite. Atualize com: python dsa_parquet.py --db dsa_database.db --destino vendas_parquet"
+            )
+
+    # 'dsa_consulta_linhas' (usada pelo cache) converte a coluna 'date' (epoch days no banco) para datetime
+    return dsa_obtem_cache_dados().obtem(dsa_obtem_conexao(), filtros)
 
 
 # --- Bloco 5: Função da Sidebar e Filtros ---
 
 # Função com os filtros na barra lateral
-def dsa_filtros_sidebar(df):
+def dsa_filtros_sidebar(dimensoes):
 
     """
     Cria todos os widgets da sidebar (menu lateral).
     1. Exibe o banner da DSA.
     2. Cria os filtros de data, região, categoria e produto.
-    3. Aplica os filtros ao DataFrame.
-    4. Retorna o DataFrame filtrado.
-    
+    3. Retorna as escolhas do usuário em um dicionário de filtros,
+       que a camada de consultas transforma em SQL.
+
     Parâmetros:
-    df (pd.DataFrame): O DataFrame original completo (antes dos filtros).
+    dimensoes (dict): Limites de data e valores distintos (ver 'dsa_carrega_dimensoes').
     """
     
     # --- Banner da Sidebar ---
@@ -249,9 +417,9 @@ def dsa_filtros_sidebar(df):
     
     # --- Filtro de Data ---
 
-    # Encontra a data mínima e máxima no DataFrame para definir os limites do filtro
-    min_date = df["date"].min().date()
-    max_date = df["date"].max().date()
+    # Data mínima e máxima da tabela (já consultadas no banco) para definir os limites do filtro
+    min_date = dimensoes["min_date"]
+    max_date = dimensoes["max_date"]
     
     # Cria o widget de seleção de intervalo de datas (calendário)
     # O valor padrão 'value' é uma tupla com o intervalo completo (min_date, max_date)
@@ -260,19 +428,19 @@ def dsa_filtros_sidebar(df):
     # --- Filtros de Seleção Múltipla (Multiselect) ---
 
     # Filtro de Região
-    # 1. Pega todos os valores únicos da coluna 'regiao'
-    # 2. 'sorted()' os coloca em ordem alfabética para o menu
-    all_regioes = sorted(df["regiao"].unique())
+    # 1. Pega todos os valores únicos da coluna 'regiao' (SELECT DISTINCT no banco)
+    # 2. A consulta já os devolve em ordem alfabética para o menu
+    all_regioes = dimensoes["regioes"]
     
     # 3. Cria o widget. 'default=all_regioes' faz com que todas as opções comecem selecionadas por padrão.
     selected_regioes = st.sidebar.multiselect("Regiões", all_regioes, default = all_regioes)
 
     # Filtro de Categoria (mesma lógica)
-    all_categorias = sorted(df["categoria"].unique())
+    all_categorias = dimensoes["categorias"]
     selected_categorias = st.sidebar.multiselect("Categorias", all_categorias, default = all_categorias)
     
     # Filtro de Produto (mesma lógica)
-    all_produtos = sorted(df["produto"].unique())
+    all_produtos = dimensoes["produtos"]
     selected_produtos = st.sidebar.multiselect("Produtos", all_produtos, default = all_produtos)
 
     # --- Lógica de Aplicação dos Filtros ---
@@ -284,18 +452,20 @@ def dsa_filtros_sidebar(df):
         # Fallback caso algo dê errado (ex: usuário limpa o campo)
         start_date, end_date = min_date, max_date
 
-    # Aplica a filtragem no DataFrame principal ('df') usando boolean indexing do Pandas
-    df_dsa_filtrado = df[
+    # Agrupa as escolhas em um dicionário de filtros.
+    # Nada é filtrado aqui: a camada de consultas (dsa_consultas.py) converte este
+    # dicionário em uma cláusula WHERE parametrizada e o SQLite faz a filtragem.
+    filtros = {
 
-        # 1. Filtro de Data: Compara a data da linha com o 'start_date' e 'end_date'
-        (df["date"].dt.date >= start_date) &
-        (df["date"].dt.date <= end_date) &
-        
-        # 2. Filtros de Categoria: '.isin()' verifica se o valor da linha está presente na lista de itens selecionados no multiselect
-        (df["regiao"].isin(selected_regioes)) &
-        (df["categoria"].isin(selected_categorias)) &
-        (df["produto"].isin(selected_produtos))
-    ].copy() # .copy() cria um novo DataFrame independente, em vez de uma "fatia"
+        # 1. Filtro de Data: intervalo fechado entre 'start_date' e 'end_date'
+        "data_inicio": start_date,
+        "data_fim": end_date,
+
+        # 2. Filtros de Categoria: viram cláusulas 'IN (...)' com os itens selecionados no multiselect
+        "regioes": selected_regioes,
+        "categorias": selected_categorias,
+        "produtos": selected_produtos,
+    }
 
     # --- Rodapé da Sidebar ---
     
@@ -310,45 +480,42 @@ def dsa_filtros_sidebar(df):
     # Adiciona uma legenda de rodapé com 'st.sidebar.caption'
     st.sidebar.caption("Dashboard Desenvolvido no Mini-Projeto 10 do Curso Gratuito de Python da Data Science Academy.")
 
-    # Retorna o DataFrame recém-filtrado para ser usado no corpo principal da página
-    return df_dsa_filtrado
+    # Retorna os filtros para serem usados nas consultas do corpo principal da página
+    return filtros
 
 
 # --- Bloco 6: Função para Renderizar os Cards de KPIs ---
 
 # Função para os KPIs
-def dsa_renderiza_cards_kpis(df):
+def dsa_renderiza_cards_kpis(kpis, comparativos):
 
     """
-    Calcula e exibe os 4 principais KPIs (Indicadores-Chave de Performance)
+    Exibe os 4 principais KPIs (Indicadores-Chave de Performance)
     em cards estilizados no topo da página.
     
-    Utiliza o DataFrame JÁ FILTRADO para fazer os cálculos.
+    Os KPIs chegam JÁ CALCULADOS pelo SQLite (ver 'dsa_consulta_kpis'),
+    com os filtros da sidebar aplicados.
     
     Parâmetros:
-    df (pd.DataFrame): O DataFrame filtrado pela sidebar.
+    kpis (dict): Resultado de 'dsa_consulta_kpis'.
+    comparativos (dict): Resultado de 'dsa_calcula_comparativos' (a meta vai no card de receita).
     
     Retorna:
     (tuple): Uma tupla com os valores calculados (total_faturamento, total_qty, avg_ticket)
              para que possam ser reutilizados (ex: no PDF).
     """
 
-    # --- 1. Cálculos dos KPIs ---
-    
-    # Soma a coluna 'faturamento' para obter o total
-    total_faturamento = df["faturamento"].sum()
+    # --- 1. Valores dos KPIs ---
     
-    # Soma a coluna 'quantidade'
-    total_qty = df["quantidade"].sum()
+    # SUM(faturamento), SUM(quantidade) e o Ticket Médio (Faturamento / Quantidade),
+    # calculados em uma única consulta agregada no banco
+    total_faturamento = kpis["total_faturamento"]
+    total_qty = kpis["total_qty"]
+    avg_ticket = kpis["avg_ticket"]
     
-    # Calcula o Ticket Médio (Faturamento / Quantidade)
-    # Inclui uma verificação 'if total_qty > 0' para evitar um erro de Divisão por Zero
-    # se o DataFrame filtrado estiver vazio.
-    avg_ticket = total_faturamento / total_qty if total_qty > 0 else 0
-    
-    # Gera um número aleatório para SIMULAR uma variação (delta) vs. meta.
-    # Este é um valor fictício apenas para fins de design do dashboard.
-    delta_rev = np.random.uniform(-5, 15)
+    # Variação da receita sobre a meta (ver DSA_META_CRESCIMENTO), quando há histórico para calculá-la
+    meta = comparativos.get("meta")
+    delta_rev = meta["variacao"] if meta is not None else None
     
     # --- 2. Criação do Layout ---
 
@@ -364,9 +531,7 @@ def dsa_renderiza_cards_kpis(df):
         <div class="metric-card">
             <h3>Receita Total</h3>
             <h2>R$ {total_faturamento:,.0f}</h2>
-            <div class="delta" style="color: {'#4CAF50' if delta_rev > 0 else '#FF5252'}">
-                {delta_rev:+.1f}% vs meta
-            </div>
+            {dsa_html_variacao(delta_rev, f"vs meta (R$ {meta['valor']:,.0f})" if meta is not None else "vs meta")}
         </div>
         """, unsafe_allow_html=True)
         
@@ -392,7 +557,7 @@ def dsa_renderiza_cards_kpis(df):
 
     # Renderiza o Card 4 na Coluna 4
     with c4:
-        transactions = df.shape[0]
+        transactions = kpis["transacoes"]
         st.markdown(f"""
         <div class="metric-card">
             <h3>Transações</h3>
@@ -405,142 +570,236 @@ def dsa_renderiza_cards_kpis(df):
     return total_faturamento, total_qty, avg_ticket
 
 
-# --- Bloco 7: Função de Geração de Relatório PDF ---
+# Função que formata a linha de variação de um card
+def dsa_html_variacao(variacao, legenda):
+
+    """Retorna o <div> da variação (verde se positiva, vermelho se negativa) ou o aviso de falta de histórico."""
+
+    if variacao is None:
+        return '<div class="delta" style="color: #AAA">Sem histórico para comparar</div>'
 
-# Função para gerar o relatório em pdf
-def dsa_gera_pdf_report(df_dsa_filtrado, total_faturamento, total_quantidade, avg_ticket):
+    cor = "#4CAF50" if variacao >= 0 else "#FF5252"
+
+    return f'<div class="delta" style="color: {cor}">{variacao:+.1f}% {legenda}</div>'
+
+
+# Função que renderiza os cards dos comparativos de período
+def dsa_renderiza_comparativos(comparativos):
 
     """
-    Gera um relatório PDF customizado usando a biblioteca FPDF.
-    
+    Exibe a receita do período anterior, do ano anterior e as médias móveis de 7 e 30 dias,
+    cada uma com a variação correspondente (ver 'dsa_calcula_comparativos').
+    """
+
+    cards = [
+        ("periodo_anterior", "Período Anterior", "R$ {:,.0f}", "atual vs anterior"),
+        ("ano_anterior", "Ano Anterior (YoY)", "R$ {:,.0f}", "atual vs ano anterior"),
+        ("media_7d", "Média 7 Dias", "R$ {:,.0f}/dia", "vs 7 dias anteriores"),
+        ("media_30d", "Média 30 Dias", "R$ {:,.0f}/dia", "vs 30 dias anteriores"),
+    ]
+
+    for coluna, (chave, titulo, formato, legenda) in zip(st.columns(len(cards)), cards):
+
+        comparativo = comparativos.get(chave)
+
+        with coluna:
+            st.markdown(f"""
+            <div class="metric-card">
+                <h3>{titulo}</h3>
+                <h2>{formato.format(comparativo["valor"]) if comparativo is not None else "-"}</h2>
+                {dsa_html_variacao(comparativo["variacao"] if comparativo is not None else None, legenda)}
+            </div>
+            """, unsafe_allow_html=True)
+
+
+# --- Bloco 6.1: Função da Tabela Paginada ---
+
+# Acima deste número de transações, a aba de dados mostra a tabela paginada no servidor
+# em vez de enviar todas as linhas filtradas ao navegador
+DSA_MAX_LINHAS_TABELA = 10_000
+
+# Linhas por página da tabela paginada
+DSA_LINHAS_POR_PAGINA = 50
+
+# Rótulos das colunas de ordenação
+DSA_ROTULOS_ORDENACAO = {"date": "Data", "faturamento": "Faturamento", "quantidade": "Quantidade"}
+
+
+# Função que desenha a tabela paginada
+def dsa_tabela_paginada(filtros, dimensoes, versao):
+
+    """
+    Mostra as transações filtradas uma página por vez, lida direto do SQLite.
+
+    A ordenação e a busca por produto rodam no banco, e cada página começa logo após
+    a última linha da página anterior (paginação por chave, ver 'dsa_sql_pagina').
+    Os cursores das páginas já visitadas ficam no 'st.session_state' para o botão "Anterior".
+
     Parâmetros:
-    df_dsa_filtrado (pd.DataFrame): O DataFrame filtrado.
-    total_faturamento (float): O valor do KPI de faturamento.
-    total_quantidade (int): O valor do KPI de quantidade.
-    avg_ticket (float): O valor do KPI de ticket médio.
-    
-    Retorna:
-    (bytes): Os bytes brutos do arquivo PDF gerado.
+    filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+    dimensoes (dict): Os valores distintos (ver 'dsa_carrega_dimensoes').
+    versao (tuple): A versão dos dados lida no início do rerun.
     """
-    
-    # --- 1. Configuração Inicial do PDF ---
 
-    # Inicializa o objeto FPDF
-    pdf = FPDF()
-    
-    # Habilita a quebra de página automática com 15mm de margem inferior
-    pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # Adiciona uma nova página ao documento
-    pdf.add_page()
+    # Controles de ordenação e busca
+    c_ordem, c_direcao, c_busca = st.columns([2, 1, 2])
+    ordenar_por = c_ordem.selectbox("Ordenar por", DSA_ORDENACOES_PAGINA, format_func = DSA_ROTULOS_ORDENACAO.get, key = "pagina-ordem")
+    decrescente = c_direcao.toggle("Decrescente", value = True, key = "pagina-decrescente")
+    busca = c_busca.text_input("Buscar produto", key = "pagina-busca").strip() or None
 
-    # --- 2. Título e Metadados ---
+    # Mudou o filtro, a ordenação ou a busca: volta para a primeira página
+    chave = (dsa_hash_filtros(filtros), ordenar_por, decrescente, busca)
+    if st.session_state.get("pagina-chave") != chave:
+        st.session_state["pagina-chave"] = chave
+        st.session_state["pagina-cursores"] = [None]
 
-    # Define a fonte ("Helvetica", Negrito, Tamanho 16)
-    # A fonte "Helvetica" é a substituta moderna da "Arial" para evitar warnings.
-    pdf.set_font("Helvetica", "B", 16)
-    
-    # Cria a célula do título.
-    # Parâmetros: (largura, altura, texto, alinhamento)
-    # new_x/new_y são a sintaxe moderna para substituir o 'ln=True' (quebra de linha)
-    pdf.cell(0, 10, "Relatorio Executivo de Vendas", align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    
-    # Adiciona um espaço vertical (quebra de linha) de 5 pontos
-    pdf.ln(5)
+    cursores = st.session_state["pagina-cursores"]
 
-    # Adiciona o carimbo de data/hora da geração
-    pdf.set_font("Helvetica", "", 10)
-    pdf.cell(0, 8, f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    
-    # --- 3. Bloco de Resumo de KPIs (com fundo cinza) ---
-    
-    # Define a cor de preenchimento (cinza claro) e desenha um retângulo
-    pdf.set_fill_color(240, 240, 240)
-    pdf.rect(10, 35, 190, 25, 'F')
-    
-    # Define a posição Y (vertical) do cursor para 40,
-    # para que o texto seja escrito EM CIMA do retângulo
-    pdf.set_y(40)
-    
-    # Escreve os cabeçalhos dos KPIs
-    pdf.set_font("Helvetica", "B", 12)
-    
-    # new_x=XPos.RIGHT, new_y=YPos.TOP: move o cursor para a direita, mas mantém na mesma linha
-    pdf.cell(60, 8, f"Receita Total", align="C", new_x=XPos.RIGHT, new_y=YPos.TOP)
-    pdf.cell(60, 8, f"Quantidade", align="C", new_x=XPos.RIGHT, new_y=YPos.TOP)
-    
-    # new_x=XPos.LMARGIN, new_y=YPos.NEXT: quebra a linha após esta célula
-    pdf.cell(60, 8, f"Ticket Medio", align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    
-    # Escreve os valores dos KPIs (logo abaixo dos cabeçalhos)
-    pdf.set_font("Helvetica", "", 12)
-    pdf.cell(60, 8, f"R$ {total_faturamento:,.2f}", align="C", new_x=XPos.RIGHT, new_y=YPos.TOP)
-    pdf.cell(60, 8, f"{total_quantidade:,}", align="C", new_x=XPos.RIGHT, new_y=YPos.TOP)
-    pdf.cell(60, 8, f"R$ {avg_ticket:,.2f}", align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    
-    # Adiciona um espaço vertical grande após o bloco de KPIs
-    pdf.ln(15)
+    # Total da seleção (contado na tabela agregada) e fração da tabela selecionada (MAX(id) ~ número de linhas)
+    total = dsa_agrega(versao, dsa_consulta_total_pagina, filtros, busca)
+    indice_ordem = dsa_prefere_indice_ordem(filtros, dimensoes, total / max(versao[0], 1), busca)
 
-    # --- 4. Tabela "Top 15 Vendas" ---
-    
-    # Adiciona o subtítulo da tabela
-    pdf.set_font("Helvetica", "B", 12)
-    pdf.cell(0, 8, "Top 15 Vendas (por receita):", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    
-    # Define as larguras de cada coluna da tabela e os nomes dos cabeçalhos
-    col_widths = [30, 30, 30, 40, 25, 30] 
-    headers = ["Data", "Regiao", "Categoria", "Produto", "Qtd", "Receita"]
-    
-    # Loop para desenhar o CABEÇALHO da tabela
-    pdf.set_font("Helvetica", "B", 9)
-    for i, h in enumerate(headers):
-        
-        # O '1' no quarto parâmetro desenha a borda da célula
-        pdf.cell(col_widths[i], 8, h, 1, align='C', new_x=XPos.RIGHT, new_y=YPos.TOP)
-    
-    pdf.ln() # Quebra a linha após o cabeçalho estar completo
-    
-    # --- 5. População da Tabela com Dados ---
+    # Busca somente a página visível
+    with dsa_obtem_metricas().etapa("tabela.pagina") as registro:
 
-    # Prepara os dados: ordena o DataFrame pelo faturamento e pega os 15 primeiros
-    pdf.set_font("Helvetica", "", 9)
-    df_top = df_dsa_filtrado.sort_values("faturamento", ascending=False).head(15)
-    
-    # Loop principal (externo): itera sobre cada linha do DataFrame df_top
-    for _, row in df_top.iterrows():
-        
-        # Extrai os dados da linha do Pandas para uma lista simples
-        # Trunca o nome do produto para 20 caracteres para caber na célula
-        data = [
-            str(row['date'].date()),
-            row['regiao'],
-            row['categoria'],
-            row['produto'][:20], 
-            str(row['quantidade']),
-            f"R$ {row['faturamento']:,.2f}"
-        ]
-        
-        # Loop interno: itera sobre cada item (célula) da linha atual
-        for i, d in enumerate(data):
-            
-            # TRATAMENTO DE ENCODING:
-            # O FPDF (baseado em Latin-1) quebra com caracteres especiais (ex: ç, ã).
-            # Esta linha força o texto para o encoding 'latin-1', substituindo
-            # caracteres inválidos por um '?' para evitar que o PDF quebre.
-            safe_txt = str(d).encode("latin-1", "replace").decode("latin-1")
-            
-            # Desenha a célula de dados com o texto seguro e borda
-            pdf.cell(col_widths[i], 7, safe_txt, 1, align=('C' if i==4 else 'L'), new_x=XPos.RIGHT, new_y=YPos.TOP)
-        
-        pdf.ln() # Quebra a linha após desenhar todas as células da linha
+        df_pagina, proxima = dsa_consulta_pagina(
+            dsa_obtem_conexao(), filtros, ordenar_por, decrescente, busca,
+            apos = cursores[-1], tamanho = DSA_LINHAS_POR_PAGINA, indice_ordem = indice_ordem
+        )
+
+        st.dataframe(df_pagina, width = 'stretch', hide_index = True)
+        registro.linhas = len(df_pagina)
+        registro.bytes = int(df_pagina.memory_usage(deep = True).sum())
+
+    # Navegação: os callbacks alteram a pilha de cursores antes do próximo rerun
+    c_anterior, c_info, c_proxima = st.columns([1, 2, 1])
+    c_anterior.button("◀ Anterior", disabled = len(cursores) == 1, on_click = cursores.pop, key = "pagina-anterior", width = 'stretch')
+    c_info.caption(f"Página {len(cursores):,} de {max(-(-total // DSA_LINHAS_POR_PAGINA), 1):,} · {total:,} transações")
+    c_proxima.button("Próxima ▶", disabled = proxima is None, on_click = cursores.append, args = (proxima,), key = "pagina-proxima", width = 'stretch')
+
+
+# --- Bloco 7: Relatório PDF em Segundo Plano ---
+
+# A geração do PDF (KPIs, gráficos e tabela de várias páginas) fica no módulo dsa_relatorio.py,
+# e a fila de processos trabalhadores que a executa fica no módulo dsa_tarefas.py.
+
+# Diretório dos PDFs prontos (cache em disco, reaproveitado enquanto os dados não mudarem)
+DSA_DIR_RELATORIOS = os.environ.get("DSA_DIR_RELATORIOS", "relatorios_pdf")
+
+# Número de relatórios acompanhados por sessão
+DSA_MAX_RELATORIOS_SESSAO = 3
+
+
+# Função que retorna a fila de relatórios compartilhada
+# (uma única fila e um único pool de processos para todas as sessões)
+@st.cache_resource
+def dsa_obtem_fila_relatorios():
+
+    return DsaFilaRelatorios(DSA_DIR_RELATORIOS, max_trabalhadores = 2)
+
+
+# Função que consulta a situação de um relatório
+def dsa_estado_relatorio(fila, chave):
+
+    """Retorna 'fila.estado(chave)' e, quando o relatório acabou de ser gerado, registra o tempo do trabalhador."""
+
+    estado = fila.estado(chave)
+
+    if "segundos" in estado:
+        dsa_obtem_metricas().registra(
+            DsaRegistroEtapa("pdf.geracao", segundos = estado["segundos"], bytes = os.path.getsize(estado["arquivo"]))
+        )
+
+    return estado
+
+
+# Função que acompanha os relatórios em andamento
+# @st.fragment(run_every=1): só este trecho é executado de novo a cada segundo, e não a página inteira
+@st.fragment(run_every = 1)
+def dsa_acompanha_relatorios():
 
-    # --- 6. Geração e Retorno do PDF ---
+    fila = dsa_obtem_fila_relatorios()
 
-    # .output() sem parâmetros retorna o conteúdo do PDF como bytes (substitui o antigo 'dest="S"')
-    result = pdf.output() 
+    for chave in st.session_state.get("relatorios-pdf", []):
 
-    # Retorna os bytes brutos do PDF, prontos para o botão de download
-    return result.encode("latin-1") if isinstance(result, str) else bytes(result)
+        estado = dsa_estado_relatorio(fila, chave)
+
+        if estado["estado"] in (DSA_ESTADO_FILA, DSA_ESTADO_GERANDO):
+            st.progress(estado["progresso"], text = f"Relatório: {estado['mensagem']}")
+
+        else:
+            # Terminou (ou falhou): executa a página de novo para mostrar o botão de download
+            st.rerun()
+
+
+# Função que mostra os relatórios da sessão
+def dsa_painel_relatorios():
+
+    fila = dsa_obtem_fila_relatorios()
+
+    estados = {chave: dsa_estado_relatorio(fila, chave) for chave in st.session_state.get("relatorios-pdf", [])}
+
+    for i, (chave, estado) in enumerate(estados.items()):
+
+        if estado["estado"] == DSA_ESTADO_CONCLUIDO:
+
+            # O PDF é lido do cache em disco; o botão só guarda os bytes deste arquivo
+            with open(estado["arquivo"], "rb") as f, dsa_obtem_metricas().etapa("pdf.download") as registro:
+                dados_pdf = f.read()
+                registro.bytes = len(dados_pdf)
+                st.download_button(
+                    label = "⬇️ Clique aqui para Salvar PDF" if i == 0 else f"⬇️ Relatório anterior ({i})",
+                    data = dados_pdf,
+                    file_name = f"Relatorio_Vendas_{date.today()}.pdf",
+                    mime = "application/pdf",
+                    width = 'stretch',
+                    key = f"pdf-download-{chave}",
+                    on_click = "ignore"  # Baixar não precisa executar o app de novo
+                )
+
+        elif estado["estado"] == DSA_ESTADO_ERRO:
+            st.error(f"Falha ao gerar o relatório: {estado['erro']}")
+
+    # Há relatórios em andamento: acompanha o progresso sem bloquear o restante da página
+    if any(estado["estado"] in (DSA_ESTADO_FILA, DSA_ESTADO_GERANDO) for estado in estados.values()):
+        dsa_acompanha_relatorios()
+
+
+# --- Bloco 7.1: Painel de Desempenho (DSA_DEBUG=1) ---
+
+# Função que mostra o tempo, as linhas e os bytes de cada etapa
+def dsa_painel_desempenho(metricas):
+
+    """
+    Mostra na sidebar as etapas da execução atual (na ordem em que rodaram) e o acumulado do servidor.
+    As etapas 'sql.*' atendidas pelo cache de agregados aparecem com tempo próximo de zero.
+
+    Parâmetros:
+    metricas (DsaMetricas): O registro retornado por 'dsa_obtem_metricas'.
+    """
+
+    with st.sidebar.expander("⏱️ Desempenho", expanded = True):
+
+        execucao = pd.DataFrame(
+            [(r.nome, r.segundos * 1000, r.linhas, r.bytes / 1024) for r in metricas.execucao()],
+            columns = ["Etapa", "ms", "Linhas", "KB"],
+        )
+
+        st.caption("Esta execução")
+        st.dataframe(execucao.style.format({"ms": "{:,.1f}", "Linhas": "{:,}", "KB": "{:,.1f}"}), hide_index = True, width = 'stretch')
+
+        resumo = pd.DataFrame(metricas.resumo())
+
+        if len(resumo):
+            st.caption("Acumulado do servidor (média por execução)")
+            st.dataframe(
+                resumo[["etapa", "execucoes", "ms_medio"]].rename(columns = {"etapa": "Etapa", "execucoes": "Vezes", "ms_medio": "ms"})
+                .style.format({"ms": "{:,.1f}"}),
+                hide_index = True, width = 'stretch',
+            )
+
+        if DSA_METRICAS_PORTA:
+            st.caption(f"Prometheus: http://127.0.0.1:{DSA_METRICAS_PORTA}/metrics")
 
 
 # --- Bloco 8: Função de Estilização (Tema Customizado) ---
@@ -646,7 +905,7 @@ def dsa_set_custom_theme():
 # Esta é a função que "orquestra" todo o aplicativo.
 # Ela define a ordem em que as coisas acontecem:
 # 1. Configura o tema
-# 2. Carrega os dados
+# 2. Carrega as opções dos filtros
 # 3. Renderiza a sidebar e obtém os filtros
 # 4. Renderiza o conteúdo da página principal (títulos, KPIs, abas)
 
@@ -656,14 +915,29 @@ def datascienceacademy_mp10():
     # Chama a função (Bloco 8) para injetar o CSS customizado
     dsa_set_custom_theme()
     
-    # Carrega o DataFrame principal. 
-    # Graças ao cache (@st.cache_data), isso só executa a consulta SQL
-    # uma vez a cada 10 minutos, tornando o app muito rápido.
-    df = dsa_carrega_dados()
-    
+    # Obtém a conexão de leitura desta execução (do pool de conexões; o banco já foi inicializado)
+    conn = dsa_obtem_conexao()
+
+    # Lê a versão atual dos dados (maior id e contador de alterações): uma consulta instantânea
+    versao = dsa_consulta_versao(conn)
+
+    # Carrega apenas as opções dos filtros (datas e valores distintos), não a tabela.
+    # Graças ao cache (@st.cache_data), as consultas SQL só rodam de novo quando a versão muda.
     # Chama a função (Bloco 5) que desenha a sidebar e retorna
-    # o DataFrame já filtrado (df_dsa_filtrado) com base nas seleções do usuário.
-    df_dsa_filtrado = dsa_filtros_sidebar(df)
+    # o dicionário de filtros com base nas seleções do usuário.
+    with dsa_obtem_metricas().etapa("sidebar") as registro:
+        dimensoes = dsa_carrega_dimensoes(versao)
+        filtros = dsa_filtros_sidebar(dimensoes)
+        registro.linhas = sum(len(dimensoes[chave]) for chave in ("regioes", "categorias", "produtos"))
+
+    # Calcula os KPIs no banco (uma única consulta agregada), ou os reaproveita do cache de agregados
+    kpis = dsa_agrega(versao, dsa_consulta_kpis, filtros)
+
+    # Comparativos de período: as somas acumuladas cobrem todo o histórico (só as dimensões vêm dos filtros),
+    # então ficam no cache enquanto apenas o período muda, e cada comparativo é uma subtração
+    historico = {**filtros, "data_inicio": dimensoes["min_date"], "data_fim": dimensoes["max_date"]}
+    somas = dsa_agrega(versao, dsa_consulta_somas_acumuladas, historico)
+    comparativos = dsa_calcula_comparativos(somas, filtros["data_inicio"], filtros["data_fim"], DSA_META_CRESCIMENTO)
 
     # --- Início: Layout da Página Principal ---
     
@@ -678,18 +952,21 @@ def datascienceacademy_mp10():
 
     # --- Verificação de Segurança ---
 
-    # Se os filtros do usuário resultarem em um DataFrame vazio,
+    # Se os filtros do usuário não encontrarem nenhuma transação,
     # exibe um aviso e para a execução da 'main' aqui.
-    # Isso evita que os cálculos de KPIs e gráficos quebrem.
-    if df_dsa_filtrado.empty:
+    # Isso evita que os gráficos quebrem.
+    if kpis["transacoes"] == 0:
         st.warning("⚠️ Nenhum dado encontrado com os filtros selecionados.")
         return # Para a execução da função
 
     # Chama a função (Bloco 6) para renderizar os 4 cards de KPI.
-    # Ela usa o DataFrame *filtrado* para os cálculos.
+    # Ela usa os KPIs já calculados com os filtros aplicados.
     # Também armazena os valores retornados (total_faturamento, etc.)
     # para usá-los mais tarde na geração do PDF.
-    total_faturamento, total_qty, avg_ticket = dsa_renderiza_cards_kpis(df_dsa_filtrado)
+    total_faturamento, total_qty, avg_ticket = dsa_renderiza_cards_kpis(kpis, comparativos)
+
+    # Comparativos de período (anterior, ano anterior e médias móveis), logo abaixo dos KPIs
+    dsa_renderiza_comparativos(comparativos)
 
     # Adiciona uma linha horizontal para separar os KPIs das abas
     st.markdown("---")
@@ -711,29 +988,39 @@ def datascienceacademy_mp10():
             
             st.subheader("Evolução da Receita Diária")
             
-            # Agrupa os dados por data e soma o faturamento
-            daily_rev = df_dsa_filtrado.groupby("date")[["faturamento"]].sum().reset_index()
-            
-            # Cria o gráfico de linha com Plotly Express
-            fig_line = px.line(daily_rev, x = "date", y = "faturamento", template = "plotly_dark", height = 400)
-            
-            # Adiciona uma estilização: preenchimento verde sob a linha
-            fig_line.update_traces(fill = 'tozeroy', line = dict(color = '#00CC96', width = 3))
-            
-            # Renderiza o gráfico no Streamlit, usando a largura total da coluna
-            st.plotly_chart(fig_line, width = 'stretch') 
+            # Agrupa os dados por data e soma o faturamento (GROUP BY date no SQLite)
+            daily_rev = dsa_agrega(versao, dsa_consulta_receita_diaria, filtros)
+
+            with dsa_obtem_metricas().etapa("grafico.receita_diaria") as registro:
+
+                # Períodos muito longos: mantém os pontos que preservam a forma da curva (LTTB)
+                total_dias = len(daily_rev)
+                daily_rev, reduzido = dsa_reduz_serie(daily_rev)
+                
+                # Cria o gráfico de linha com Plotly Express
+                fig_line = px.line(daily_rev, x = "date", y = "faturamento", template = "plotly_dark", height = 400)
+                
+                # Adiciona uma estilização: preenchimento verde sob a linha
+                fig_line.update_traces(fill = 'tozeroy', line = dict(color = '#00CC96', width = 3))
+                
+                # Renderiza o gráfico no Streamlit, usando a largura total da coluna
+                dsa_envia_grafico(fig_line, registro, len(daily_rev))
+
+            if reduzido:
+                st.caption(f"Visão reduzida: {len(daily_rev):,} de {total_dias:,} dias (picos e vales preservados pelo algoritmo LTTB).")
 
         # Bloco do Gráfico 2: Mix de Categorias (Coluna da Direita)
         with col_right:
             
             st.subheader("Mix de Categorias")
 
-            # Agrupa por categoria e soma o faturamento
-            cat_rev = df_dsa_filtrado.groupby("categoria")[["faturamento"]].sum().reset_index()
+            # Agrupa por categoria e soma o faturamento (GROUP BY categoria no SQLite)
+            cat_rev = dsa_agrega(versao, dsa_consulta_receita_por, filtros, "categoria")
             
             # Cria um gráfico de pizza (donut)
-            fig_pie = px.pie(cat_rev, values="faturamento", names="categoria", hole=0.4, template="plotly_dark", height=400)
-            st.plotly_chart(fig_pie, width='stretch') 
+            with dsa_obtem_metricas().etapa("grafico.categorias") as registro:
+                fig_pie = px.pie(cat_rev, values="faturamento", names="categoria", hole=0.4, template="plotly_dark", height=400)
+                dsa_envia_grafico(fig_pie, registro, len(cat_rev))
 
         # Cria a segunda linha de layout da aba: duas colunas de tamanho igual
         c_a, c_b = st.columns(2)
@@ -742,12 +1029,11 @@ def datascienceacademy_mp10():
         with c_a:
 
             st.subheader("Performance Regional")
-            fig_bar = px.bar(
-                df_dsa_filtrado.groupby("regiao")[["faturamento"]].sum().reset_index(),
-                x="regiao", y="faturamento", color="regiao", template="plotly_dark", text_auto='.2s'
-            )
+            reg_rev = dsa_agrega(versao, dsa_consulta_receita_por, filtros, "regiao")
 
-            st.plotly_chart(fig_bar, width='stretch') 
+            with dsa_obtem_metricas().etapa("grafico.regioes") as registro:
+                fig_bar = px.bar(reg_rev, x="regiao", y="faturamento", color="regiao", template="plotly_dark", text_auto='.2s')
+                dsa_envia_grafico(fig_bar, registro, len(reg_rev))
             
         # Bloco do Gráfico 4: Análise de Dia da Semana (com tradução)
         with c_b:
@@ -766,79 +1052,166 @@ def datascienceacademy_mp10():
                 "Quinta-feira", "Sexta-feira", "Sábado", "Domingo"
             ]
 
-            # Criação das colunas de dia da semana (número e nome em PT)
-            # .dt.dayofweek retorna o dia (Segunda=0, Domingo=6)
-            df_dsa_filtrado["weekday_num"] = df_dsa_filtrado["date"].dt.dayofweek
+            # Receita média por dia da semana, calculada no SQLite
+            # 'weekday_num' segue a convenção do Pandas (Segunda=0, Domingo=6)
+            wd_rev = dsa_agrega(versao, dsa_consulta_receita_dia_semana, filtros)
             
             # .map() usa o dicionário para "traduzir" os números
-            df_dsa_filtrado["dia_semana"] = df_dsa_filtrado["weekday_num"].map(dias_pt_map)
+            # ('assign' cria um novo DataFrame: o resultado em cache é compartilhado e não deve ser alterado)
+            wd_rev = wd_rev.assign(dia_semana = wd_rev["weekday_num"].map(dias_pt_map))
 
-            # Agrupa pelo nome em PT, calcula a média, e reordena
-            wd_rev = df_dsa_filtrado.groupby("dia_semana")[["faturamento"]].mean().reindex(dias_pt_ordem).reset_index()
+            # Indexa pelo nome em PT e reordena
+            wd_rev = wd_rev.set_index("dia_semana")[["faturamento"]].reindex(dias_pt_ordem).reset_index()
 
             # Cria o gráfico de barras
-            fig_heat = px.bar(wd_rev, x="dia_semana", y="faturamento", title="Receita Média x Dia", template="plotly_dark")
-            st.plotly_chart(fig_heat, width='stretch')
+            with dsa_obtem_metricas().etapa("grafico.dia_semana") as registro:
+                fig_heat = px.bar(wd_rev, x="dia_semana", y="faturamento", title="Receita Média x Dia", template="plotly_dark")
+                dsa_envia_grafico(fig_heat, registro, len(wd_rev))
             
         # Bloco do Gráfico 5: Dispersão (Scatter Plot)
         st.subheader("Dispersão: Quantidade x Faturamento x Produto")
         
-        # Este gráfico mostra a correlação positiva que criamos nos dados fictícios
-        fig_scat = px.scatter(
-            df_dsa_filtrado, x="quantidade", y="faturamento", color="categoria", size="faturamento",
-            hover_data=["produto"], template="plotly_dark", height=500
-        )
+        # Este gráfico mostra a correlação positiva que criamos nos dados fictícios.
+        if kpis["transacoes"] <= DSA_MAX_PONTOS_DISPERSAO:
+
+            # Poucas transações: um ponto por linha, buscando no banco apenas as 4 colunas que o gráfico usa
+            df_scat = dsa_agrega(versao, dsa_consulta_linhas, filtros, colunas = ("quantidade", "faturamento", "categoria", "produto"))
+            tamanho_ponto, detalhe = "faturamento", "produto"
+
+        else:
+
+            # Muitas transações: o SQLite agrupa as linhas em faixas de faturamento e só os grupos
+            # vão para o navegador; o tamanho do ponto mostra quantas transações ele representa
+            df_scat = dsa_agrega(versao, dsa_consulta_dispersao_faixas, filtros, DSA_FAIXAS_FATURAMENTO)
+            tamanho_ponto, detalhe = "transacoes", "transacoes"
         
-        st.plotly_chart(fig_scat, width='stretch') 
+        with dsa_obtem_metricas().etapa("grafico.dispersao") as registro:
+            fig_scat = px.scatter(
+                df_scat, x="quantidade", y="faturamento", color="categoria", size=tamanho_ponto,
+                hover_data=[detalhe], template="plotly_dark", height=500
+            )
+            dsa_envia_grafico(fig_scat, registro, len(df_scat))
+
+        if kpis["transacoes"] > DSA_MAX_PONTOS_DISPERSAO:
+            st.caption(
+                f"Visão reduzida: {kpis['transacoes']:,} transações agrupadas em {len(df_scat):,} pontos "
+                f"(faturamento médio por quantidade, categoria e faixa de faturamento)."
+            )
 
     # --- Conteúdo da Aba 2: Dados e Exportação ---
     with tab2:
 
-        # Exibe a tabela de dados filtrados
         st.subheader("Visualização Tabular")
-        st.dataframe(df_dsa_filtrado, width='stretch', height=400) 
+
+        if kpis["transacoes"] <= DSA_MAX_LINHAS_TABELA:
+
+            # Carrega as transações filtradas (o filtro é executado no SQLite)
+            with dsa_obtem_metricas().etapa("carga") as registro:
+                df_dsa_filtrado = dsa_carrega_dados(filtros)
+                registro.linhas = len(df_dsa_filtrado)
+
+            # Exibe a tabela de dados filtrados (os bytes são a memória do DataFrame enviado)
+            with dsa_obtem_metricas().etapa("tabela") as registro:
+                st.dataframe(df_dsa_filtrado, width='stretch', height=400) 
+                registro.linhas = len(df_dsa_filtrado)
+                registro.bytes = int(df_dsa_filtrado.memory_usage(deep = True).sum())
+
+            # Memória ocupada pelas transações filtradas, coluna a coluna (útil para comparar o modo compacto)
+            with st.expander("🧮 Memória por coluna", expanded = False):
+                st.dataframe(dsa_memoria_por_coluna(df_dsa_filtrado).style.format({"MB": "{:.3f}"}), width = 'stretch')
+
+        else:
+
+            # Muitas transações: tabela paginada no servidor (uma consulta pequena por página)
+            dsa_tabela_paginada(filtros, dimensoes, versao)
         
         st.markdown("### 📥 Área de Exportação")
         
         # Cria duas colunas para os botões de download
         c_exp1, c_exp2 = st.columns(2)
         
-        # Coluna do Botão 1: Download CSV
+        # Coluna do Botão 1: Exportação dos dados (CSV, CSV compactado ou Parquet)
         with c_exp1:
-            
-            # Converte o DataFrame filtrado para um string CSV em memória
-            csv = df_dsa_filtrado.to_csv(index=False).encode('utf-8')
-            
-            # Cria o botão de download
-            st.download_button(
-                label = "💾 Baixar CSV (Excel)",
-                data = csv,
-                file_name = "dados_filtrados.csv",
-                mime = "text/csv",
-                width = 'stretch' 
-            )
+
+            formato_exp = st.selectbox("Formato", list(DSA_FORMATOS_EXPORTACAO), key = "formato-exportacao")
+
+            # Lógica de 2 cliques (como no PDF): o arquivo só é gerado quando o usuário pede.
+            # As linhas são lidas do SQLite em blocos e gravadas em um arquivo em disco,
+            # então a memória não cresce com o número de linhas exportadas.
+            if st.button("💾 Preparar Exportação", width = 'stretch'):
+
+                formato, compressao, extensao, mime = DSA_FORMATOS_EXPORTACAO[formato_exp]
+                pasta_downloads = dsa_obtem_pasta_downloads()
+
+                with st.spinner("Exportando os dados..."), dsa_obtem_metricas().etapa(f"exportacao.{formato}") as registro:
+
+                    # Com o servidor de downloads, o arquivo é gravado na pasta dele; sem ele, em um arquivo temporário
+                    if pasta_downloads is not None:
+                        nome = dsa_novo_download(pasta_downloads, extensao)
+                        arquivo = open(os.path.join(pasta_downloads, nome), "w+b")
+                    else:
+                        arquivo = tempfile.TemporaryFile()
+
+                    with arquivo:
+
+                        try:
+                            registro.bytes = dsa_exporta(conn, filtros, arquivo, formato = formato, compressao = compressao)
+                        except RuntimeError as erro:
+                            # Ex: pacote 'zstandard' (opcional) não instalado
+                            st.error(str(erro))
+                            st.stop()
+
+                        # As transações exportadas são as da seleção (a contagem dos KPIs)
+                        registro.linhas = kpis["transacoes"]
+
+                        # Servidor de downloads: o navegador baixa o arquivo direto do disco, em pedaços
+                        if pasta_downloads is not None:
+                            st.link_button(
+                                f"⬇️ Baixar {formato_exp} ({registro.bytes / 1024**2:,.1f} MB)",
+                                f"{DSA_DOWNLOADS_URL}/{nome}?nome=dados_filtrados{extensao}",
+                                width = 'stretch',
+                            )
+
+                        # Sem o servidor, o Streamlit guarda o arquivo inteiro em memória para servi-lo ao navegador:
+                        # acima do limite, a exportação é recusada (um CSV de milhões de linhas ocuparia a memória toda)
+                        elif registro.bytes > DSA_LIMITE_DOWNLOAD_MB * 1024**2:
+                            st.warning(
+                                f"O arquivo tem {registro.bytes / 1024**2:,.1f} MB, acima do limite de {DSA_LIMITE_DOWNLOAD_MB:,.1f} MB "
+                                "para download pela memória do Streamlit (o servidor de downloads não está ativo). Use CSV (gzip), "
+                                "CSV (zstd) ou Parquet, reduza a seleção, inicie a app com DSA_DOWNLOADS_PORTA em uma porta livre "
+                                "(downloads servidos do disco) ou exporte pelo terminal: "
+                                "python dsa_exportacao.py --db dsa_database.db --saida vendas.csv.gz"
+                            )
+
+                        else:
+                            arquivo.seek(0)
+
+                            # O botão de download real aparece para o usuário clicar
+                            st.download_button(
+                                label = f"⬇️ Baixar {formato_exp}",
+                                data = arquivo.read(),
+                                file_name = f"dados_filtrados{extensao}",
+                                mime = mime,
+                                width = 'stretch',
+                                key = "exportacao-download-final",
+                                on_click = "ignore"  # Baixar não precisa executar o app de novo
+                            )
             
         # Coluna do Botão 2: Download PDF
         with c_exp2:
             
-            # Lógica de 2 cliques:
-            # 1. O usuário clica neste 'st.button'
-            if st.button("📄 Gerar Relatório PDF", width='stretch'): 
-                
-                # 2. O app mostra um "spinner" (loading)
-                with st.spinner("Renderizando PDF..."):
-                    
-                    # 3. A função de geração de PDF (Bloco 7) é executada
-                    pdf_bytes = dsa_gera_pdf_report(df_dsa_filtrado, total_faturamento, total_qty, avg_ticket)
-                    
-                    # 4. O botão de download real aparece para o usuário clicar
-                    st.download_button(
-                        label = "⬇️ Clique aqui para Salvar PDF",
-                        data = pdf_bytes,
-                        file_name = f"Relatorio_Vendas_{date.today()}.pdf",
-                        mime = "application/pdf",
-                        key = "pdf-download-final" # Chave única para o widget
-                    )
+            # O relatório é gerado por um processo trabalhador (Bloco 7): a página continua respondendo.
+            # Se o PDF destes filtros, nesta versão dos dados, já existe no cache em disco, fica pronto na hora.
+            if st.button("📄 Gerar Relatório PDF", width='stretch'):
+
+                with dsa_obtem_metricas().etapa("pdf.submete"):
+                    chave = dsa_obtem_fila_relatorios().submete(dsa_caminho_banco(conn), filtros, versao)
+
+                # Guarda a chave na sessão (o mais recente primeiro)
+                relatorios = [c for c in st.session_state.get("relatorios-pdf", []) if c != chave]
+                st.session_state["relatorios-pdf"] = [chave] + relatorios[:DSA_MAX_RELATORIOS_SESSAO - 1]
+
+            dsa_painel_relatorios()
 
     # --- Rodapé da Página Principal ---
     st.markdown("---")
@@ -850,8 +1223,8 @@ def datascienceacademy_mp10():
         **Recursos Integrados:**
         - **Engine:** Python + Streamlit + SQLite.
         - **Visualização:** Plotly Express e tema Dark no Streamlit.
-        - **Relatórios:** Geração de PDF com FPDF (compatível com Latin-1).
-        - **Performance:** Cache de dados (`@st.cache_data`).
+        - **Relatórios:** Geração de PDF com FPDF em processos de segundo plano, com cache por filtros e versão dos dados.
+        - **Performance:** Filtros e agregações executados no SQLite (`GROUP BY`) e cache incremental de dados.
         - **DSA:** Para conhecer mais sobre os cursos visite: www.datascienceacademy.com.br.
         """)
 
@@ -870,8 +1243,19 @@ def datascienceacademy_mp10():
 # e não se ele for apenas importado como um módulo.
 if __name__ == "__main__":
     
-    # Chama a função principal (Bloco 9) para iniciar o aplicativo.
-    datascienceacademy_mp10()
+    # Chama a função principal (Bloco 9) para iniciar o aplicativo, medindo a execução inteira.
+    # Ao final (inclusive em st.stop() e st.rerun()), a conexão de leitura volta ao pool.
+    metricas = dsa_obtem_metricas()
+    metricas.inicia_execucao()
+
+    try:
+        with metricas.etapa("execucao"):
+            datascienceacademy_mp10()
+
+        if DSA_DEBUG:
+            dsa_painel_desempenho(metricas)
+    finally:
+        dsa_obtem_motor().libera()
 
 
 # Obrigado DSA
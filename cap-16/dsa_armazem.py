@@ -0,0 +1,122 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo do armazém compartilhado: uma única tabela do Arrow, em memória, com todas as transações.
+# Todas as sessões de um servidor leem da mesma tabela; cada sessão recebe apenas o recorte
+# filtrado, criado a cada rerun e descartado em seguida. A memória cresce com os dados,
+# e não com (dados x usuários).
+
+# Para proteger a atualização da tabela do acesso simultâneo de várias sessões (threads)
+import threading
+
+# Importa o PyArrow (formato colunar em memória) e seu módulo de datasets
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Importa a versão dos dados, a leitura em blocos e os filtros do backend colunar
+from dsa_consultas import DSA_COLUNAS_VENDAS, DSA_DIMENSOES, dsa_consulta_versao
+from dsa_parquet import DSA_ESQUEMA_PARQUET, dsa_expressao_filtros, dsa_le_blocos_arrow, dsa_tabela_para_pandas
+
+
+# Esquema em memória: as dimensões ficam codificadas em dicionário
+# (cada linha guarda um índice inteiro; cada string distinta é guardada uma vez só)
+DSA_ESQUEMA_ARMAZEM = pa.schema([
+    pa.field(campo.name, pa.dictionary(pa.int32(), pa.string()) if campo.name in DSA_DIMENSOES.values() else campo.type)
+    for campo in DSA_ESQUEMA_PARQUET
+])
+
+
+# Classe do armazém compartilhado
+class DsaArmazemArrow:
+
+    """
+    Tabela do Arrow, somente leitura, com todas as transações de 'tb_vendas'.
+
+    Segue a mesma regra de versão do cache incremental (ver dsa_cache.py):
+    - versão igual: usa a tabela atual;
+    - só o maior id aumentou: lê apenas as linhas novas e as anexa como um novo bloco (sem copiar os antigos);
+    - contador de alterações mudou (UPDATE/DELETE): relê a tabela inteira.
+
+    A tabela nunca é alterada no lugar: cada atualização cria uma nova tabela e troca a referência,
+    então um rerun que está filtrando a versão anterior não é afetado.
+
+    O esquema em memória é o atributo de classe 'esquema' (subclasses podem trocá-lo).
+    """
+
+    esquema = DSA_ESQUEMA_ARMAZEM
+
+    # Construtor da classe
+    def __init__(self):
+
+        # Tabela atual e versão dos dados em que ela foi lida
+        self._tabela = self.esquema.empty_table()
+        self._versao = None
+
+        # Trava para que só uma sessão atualize a tabela por vez
+        self._lock = threading.Lock()
+
+    # Método que lê blocos do SQLite já no esquema do armazém
+    def _le(self, conn, id_apos = None, id_ate = None):
+
+        blocos = [bloco.cast(self.esquema) for bloco in dsa_le_blocos_arrow(conn, id_apos = id_apos, id_ate = id_ate)]
+
+        return pa.concat_tables(blocos) if blocos else self.esquema.empty_table()
+
+    # Método que sincroniza a tabela com a versão atual do banco
+    def atualiza(self, conn):
+
+        """Atualiza a tabela, se os dados mudaram, e a retorna."""
+
+        versao = dsa_consulta_versao(conn)
+
+        with self._lock:
+
+            if self._versao is None or self._versao[1] != versao[1]:
+
+                # Primeira leitura, ou houve UPDATE/DELETE: leitura completa
+                self._tabela = self._le(conn, id_ate = versao[0])
+
+            elif versao[0] > self._versao[0]:
+
+                # Só há vendas novas: anexa o bloco das linhas com id acima do último visto
+                novas = self._le(conn, id_apos = self._versao[0], id_ate = versao[0])
+                self._tabela = pa.concat_tables([self._tabela, novas])
+
+            self._versao = versao
+
+            return self._tabela
+
+    # Método que devolve o recorte filtrado para uma sessão
+    def filtra(self, conn, filtros, colunas = None):
+
+        """
+        Retorna as transações que atendem aos filtros, como DataFrame do Pandas.
+
+        Parâmetros:
+        conn (sqlite3.Connection): A conexão usada para conferir a versão dos dados.
+        filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+        colunas (list): Colunas desejadas (padrão: todas).
+
+        Retorna:
+        (pd.DataFrame): Mesmo formato de 'dsa_consulta_linhas'; as dimensões chegam como 'category'.
+        """
+
+        colunas = colunas or DSA_COLUNAS_VENDAS
+
+        if any(c not in DSA_COLUNAS_VENDAS for c in colunas):
+            raise ValueError(f"Colunas inválidas: {colunas}")
+
+        tabela = self.atualiza(conn)
+
+        # O filtro roda sobre a tabela compartilhada; só as linhas e colunas selecionadas são copiadas
+        recorte = ds.dataset(tabela).to_table(columns = colunas, filter = dsa_expressao_filtros(filtros, particao = False))
+
+        return dsa_tabela_para_pandas(recorte)
+
+    # Método que informa o tamanho da tabela compartilhada
+    def tamanho(self):
+
+        """Retorna (linhas, bytes) da tabela compartilhada."""
+
+        tabela = self._tabela
+
+        return tabela.num_rows, tabela.nbytes
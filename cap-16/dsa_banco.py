@@ -0,0 +1,505 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo do banco de dados: conexão, PRAGMAs de desempenho, migrações versionadas do esquema
+# e inicialização/população da tabela 'tb_vendas'.
+
+# Para interagir com o banco de dados SQLite
+import sqlite3
+
+# Para montar a URI (caminho absoluto, com os caracteres especiais codificados) das conexões somente leitura
+from pathlib import Path
+
+# Importa o gerador vetorizado de dados fictícios (usado no seed inicial)
+from dsa_gerador_dados import dsa_gera_lotes
+
+# Importa módulos de data e hora
+from datetime import date, timedelta
+
+
+# --- Conversão de Datas ---
+
+# A partir da versão 2 do esquema, a coluna 'date' guarda "dias desde 1970-01-01" (epoch days).
+# Inteiros ocupam menos espaço do que o texto 'AAAA-MM-DD', são comparados mais rápido
+# e deixam os índices menores.
+DSA_EPOCH = date(1970, 1, 1)
+
+
+# Função que converte um objeto date em epoch days
+def dsa_data_para_dia(d):
+
+    """Converte um objeto date para o número de dias desde 1970-01-01."""
+
+    return (d - DSA_EPOCH).days
+
+
+# Função que converte epoch days em um objeto date
+def dsa_dia_para_data(dia):
+
+    """Converte o número de dias desde 1970-01-01 para um objeto date."""
+
+    return DSA_EPOCH + timedelta(days = int(dia))
+
+
+# --- Índices da Tabela de Vendas ---
+
+# Índices atuais de 'tb_vendas' (estado após todas as migrações).
+# Ficam em uma constante porque a carga em massa em uma tabela vazia (ver 'dsa_carrega_lotes')
+# remove os índices e os recria depois: construir um índice de uma vez, já com todos os dados,
+# é bem mais rápido do que atualizá-lo a cada linha inserida.
+DSA_INDICES_VENDAS = {
+    # Índice de cobertura: contém todas as colunas usadas pelas consultas do dashboard,
+    # então filtros por período + IN (...) e as somas são respondidos só pelo índice
+    "ix_tb_vendas_cobertura": """
+        CREATE INDEX ix_tb_vendas_cobertura
+        ON tb_vendas (date, regiao, categoria, produto, faturamento, quantidade)
+        """,
+    # Índices de ordenação da tabela paginada (migração 6): a entrada do índice já é (coluna, id),
+    # a mesma chave da paginação, então cada página é uma busca + leitura de algumas linhas
+    "ix_tb_vendas_faturamento": "CREATE INDEX ix_tb_vendas_faturamento ON tb_vendas (faturamento)",
+    "ix_tb_vendas_quantidade": "CREATE INDEX ix_tb_vendas_quantidade ON tb_vendas (quantidade)",
+}
+
+
+# --- Gatilhos da Tabela Agregada ---
+
+# Os gatilhos mantêm 'tb_vendas_diario' em dia a cada INSERT/DELETE/UPDATE em tb_vendas,
+# somando (ou subtraindo) apenas a linha alterada, sem recalcular o resto.
+# Ficam em uma constante porque cargas em massa (ver dsa_gerador_dados.py) os removem
+# durante a carga e os recriam ao final (ver 'dsa_carrega_lotes').
+DSA_GATILHOS_DIARIO = {
+    "tr_tb_vendas_diario_insert": """
+        CREATE TRIGGER tr_tb_vendas_diario_insert AFTER INSERT ON tb_vendas
+        BEGIN
+            INSERT INTO tb_vendas_diario (date, regiao, categoria, produto, faturamento, quantidade, transacoes)
+            VALUES (NEW.date, NEW.regiao, NEW.categoria, NEW.produto, NEW.faturamento, NEW.quantidade, 1)
+            ON CONFLICT (date, regiao, categoria, produto) DO UPDATE SET
+                faturamento = faturamento + excluded.faturamento,
+                quantidade = quantidade + excluded.quantidade,
+                transacoes = transacoes + 1;
+        END
+        """,
+    "tr_tb_vendas_diario_delete": """
+        CREATE TRIGGER tr_tb_vendas_diario_delete AFTER DELETE ON tb_vendas
+        BEGIN
+            UPDATE tb_vendas_diario
+            SET faturamento = faturamento - OLD.faturamento,
+                quantidade = quantidade - OLD.quantidade,
+                transacoes = transacoes - 1
+            WHERE date = OLD.date AND regiao = OLD.regiao AND categoria = OLD.categoria AND produto = OLD.produto;
+            DELETE FROM tb_vendas_diario
+            WHERE date = OLD.date AND regiao = OLD.regiao AND categoria = OLD.categoria AND produto = OLD.produto
+              AND transacoes = 0;
+        END
+        """,
+    # UPDATE = remove a contribuição da linha antiga e soma a da nova (a chave pode mudar)
+    "tr_tb_vendas_diario_update": """
+        CREATE TRIGGER tr_tb_vendas_diario_update AFTER UPDATE ON tb_vendas
+        BEGIN
+            UPDATE tb_vendas_diario
+            SET faturamento = faturamento - OLD.faturamento,
+                quantidade = quantidade - OLD.quantidade,
+                transacoes = transacoes - 1
+            WHERE date = OLD.date AND regiao = OLD.regiao AND categoria = OLD.categoria AND produto = OLD.produto;
+            DELETE FROM tb_vendas_diario
+            WHERE date = OLD.date AND regiao = OLD.regiao AND categoria = OLD.categoria AND produto = OLD.produto
+              AND transacoes = 0;
+            INSERT INTO tb_vendas_diario (date, regiao, categoria, produto, faturamento, quantidade, transacoes)
+            VALUES (NEW.date, NEW.regiao, NEW.categoria, NEW.produto, NEW.faturamento, NEW.quantidade, 1)
+            ON CONFLICT (date, regiao, categoria, produto) DO UPDATE SET
+                faturamento = faturamento + excluded.faturamento,
+                quantidade = quantidade + excluded.quantidade,
+                transacoes = transacoes + 1;
+        END
+        """,
+}
+
+
+# --- Migrações Versionadas do Esquema ---
+
+# Cada migração é uma tupla (versão, descrição, comandos SQL).
+# A versão aplicada fica gravada no próprio arquivo .db em 'PRAGMA user_version',
+# então cada migração roda uma única vez, na ordem, e bancos antigos são atualizados
+# automaticamente na primeira conexão.
+DSA_MIGRACOES = [
+    (
+        1,
+        "Cria a tabela tb_vendas (esquema original, data como TEXT)",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS tb_vendas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                regiao TEXT,
+                categoria TEXT,
+                produto TEXT,
+                faturamento REAL,
+                quantidade INTEGER
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "Converte 'date' para epoch days (INTEGER) e cria os índices de cobertura",
+        [
+            # SQLite não altera o tipo de uma coluna: recria a tabela e copia os dados
+            """
+            CREATE TABLE tb_vendas_nova (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date INTEGER NOT NULL,
+                regiao TEXT,
+                categoria TEXT,
+                produto TEXT,
+                faturamento REAL,
+                quantidade INTEGER
+            )
+            """,
+            # julianday('1970-01-01') = 2440587.5
+            """
+            INSERT INTO tb_vendas_nova (id, date, regiao, categoria, produto, faturamento, quantidade)
+            SELECT id, CAST(julianday(date) - 2440587.5 AS INTEGER), regiao, categoria, produto, faturamento, quantidade
+            FROM tb_vendas
+            """,
+            "DROP TABLE tb_vendas",
+            "ALTER TABLE tb_vendas_nova RENAME TO tb_vendas",
+            # Índice de cobertura: contém todas as colunas usadas pelas consultas do dashboard,
+            # então filtros por período + IN (...) e as somas são respondidos só pelo índice
+            """
+            CREATE INDEX ix_tb_vendas_cobertura
+            ON tb_vendas (date, regiao, categoria, produto, faturamento, quantidade)
+            """,
+            # Índices das dimensões: listam os valores distintos sem varrer a tabela
+            "CREATE INDEX ix_tb_vendas_regiao ON tb_vendas (regiao)",
+            "CREATE INDEX ix_tb_vendas_categoria ON tb_vendas (categoria)",
+            "CREATE INDEX ix_tb_vendas_produto ON tb_vendas (produto)",
+            # Estatísticas para o otimizador de consultas escolher os índices
+            "ANALYZE",
+        ],
+    ),
+    (
+        3,
+        "Cria a tabela agregada tb_vendas_diario (dia x região x categoria x produto) e os gatilhos",
+        [
+            # Uma linha por combinação dia x região x categoria x produto, com somas e contagem.
+            # WITHOUT ROWID: a própria chave primária é o índice (date primeiro), sem tabela à parte.
+            """
+            CREATE TABLE tb_vendas_diario (
+                date INTEGER NOT NULL,
+                regiao TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                produto TEXT NOT NULL,
+                faturamento REAL NOT NULL,
+                quantidade INTEGER NOT NULL,
+                transacoes INTEGER NOT NULL,
+                PRIMARY KEY (date, regiao, categoria, produto)
+            ) WITHOUT ROWID
+            """,
+            # Carga inicial a partir das vendas já existentes
+            """
+            INSERT INTO tb_vendas_diario (date, regiao, categoria, produto, faturamento, quantidade, transacoes)
+            SELECT date, regiao, categoria, produto, SUM(faturamento), SUM(quantidade), COUNT(*)
+            FROM tb_vendas
+            GROUP BY date, regiao, categoria, produto
+            """,
+            # Gatilhos que mantêm a tabela agregada em dia (ver 'DSA_GATILHOS_DIARIO')
+            *DSA_GATILHOS_DIARIO.values(),
+            "ANALYZE",
+        ],
+    ),
+    (
+        4,
+        "Move os índices das dimensões de tb_vendas para a tabela agregada tb_vendas_diario",
+        [
+            # Os valores distintos de cada dimensão passam a ser lidos da tabela agregada,
+            # que é milhares de vezes menor: os índices na tabela de vendas só encareciam
+            # cada INSERT (e a criação dos índices nas cargas em massa)
+            "DROP INDEX IF EXISTS ix_tb_vendas_regiao",
+            "DROP INDEX IF EXISTS ix_tb_vendas_categoria",
+            "DROP INDEX IF EXISTS ix_tb_vendas_produto",
+            "CREATE INDEX ix_tb_vendas_diario_regiao ON tb_vendas_diario (regiao)",
+            "CREATE INDEX ix_tb_vendas_diario_categoria ON tb_vendas_diario (categoria)",
+            "CREATE INDEX ix_tb_vendas_diario_produto ON tb_vendas_diario (produto)",
+            "ANALYZE",
+        ],
+    ),
+    (
+        5,
+        "Cria a tabela de controle com o contador de alterações (UPDATE/DELETE) em tb_vendas",
+        [
+            # Uma única linha (id = 1). Junto com MAX(id), forma a "versão" dos dados usada pelo
+            # cache incremental: inserts aumentam MAX(id); updates e deletes aumentam o contador.
+            """
+            CREATE TABLE tb_controle (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                alteracoes INTEGER NOT NULL
+            )
+            """,
+            "INSERT INTO tb_controle (id, alteracoes) VALUES (1, 0)",
+            """
+            CREATE TRIGGER tr_tb_controle_update AFTER UPDATE ON tb_vendas
+            BEGIN
+                UPDATE tb_controle SET alteracoes = alteracoes + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER tr_tb_controle_delete AFTER DELETE ON tb_vendas
+            BEGIN
+                UPDATE tb_controle SET alteracoes = alteracoes + 1 WHERE id = 1;
+            END
+            """,
+        ],
+    ),
+    (
+        6,
+        "Cria os índices de ordenação da tabela paginada (faturamento e quantidade)",
+        [
+            DSA_INDICES_VENDAS["ix_tb_vendas_faturamento"],
+            DSA_INDICES_VENDAS["ix_tb_vendas_quantidade"],
+            "ANALYZE",
+        ],
+    ),
+]
+
+
+# Função que aplica as migrações pendentes
+def dsa_migra_banco(conn):
+
+    """
+    Aplica, em ordem, as migrações com versão maior que 'PRAGMA user_version'.
+
+    Cada migração roda em uma transação própria: ou é aplicada por inteiro
+    (junto com a nova 'user_version') ou não é aplicada.
+
+    Retorna:
+    (int): A versão do esquema após as migrações.
+    """
+
+    versao_atual = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    # Bancos criados antes das migrações têm user_version = 0, mas já possuem a tabela
+    # no formato da versão 1. O 'IF NOT EXISTS' da versão 1 cobre esse caso.
+    for versao, descricao, comandos in DSA_MIGRACOES:
+
+        if versao <= versao_atual:
+            continue
+
+        try:
+            conn.execute("BEGIN")
+            for sql in comandos:
+                conn.execute(sql)
+
+            # PRAGMA não aceita parâmetros ('?'); 'versao' é um inteiro definido no código
+            conn.execute(f"PRAGMA user_version = {int(versao)}")
+            conn.commit()
+
+        except Exception:
+            conn.rollback()
+            raise
+
+        versao_atual = versao
+
+    return versao_atual
+
+
+# --- Carga em Massa ---
+
+# INSERT de uma venda (o mesmo texto a cada chamada: o sqlite3 reaproveita o comando já preparado)
+DSA_SQL_INSERE_VENDA = "INSERT INTO tb_vendas (date, regiao, categoria, produto, faturamento, quantidade) VALUES (?, ?, ?, ?, ?, ?)"
+
+# Função que grava lotes de vendas em uma única transação
+def dsa_carrega_lotes(conn, lotes):
+
+    """
+    Grava lotes de vendas em 'tb_vendas' dentro de UMA transação.
+
+    Durante a carga os gatilhos da tabela agregada são removidos (eles atualizariam
+    'tb_vendas_diario' linha a linha); ao final, a tabela agregada é recalculada de uma vez
+    para o intervalo de dias carregado e os gatilhos são recriados, ainda na mesma transação.
+    Se a tabela estiver vazia, os índices também são removidos e recriados ao final.
+    Se algo falhar, nada é gravado.
+
+    Parâmetros:
+    lotes (iterable): Lotes (listas) de tuplas (date, regiao, categoria, produto, faturamento, quantidade),
+                      com 'date' em epoch days. Pode ser um gerador: só um lote fica em memória por vez.
+
+    Retorna:
+    (int): Número de linhas gravadas.
+    """
+
+    total = 0
+    dia_min = dia_max = None
+
+    try:
+        conn.execute("BEGIN")
+
+        for nome in DSA_GATILHOS_DIARIO:
+            conn.execute(f"DROP TRIGGER IF EXISTS {nome}")
+
+        # Em uma tabela vazia, é mais rápido criar os índices depois da carga.
+        # (Em uma tabela já grande, recriar os índices custaria mais do que mantê-los.)
+        tabela_vazia = conn.execute("SELECT 1 FROM tb_vendas LIMIT 1").fetchone() is None
+
+        if tabela_vazia:
+            for nome in DSA_INDICES_VENDAS:
+                conn.execute(f"DROP INDEX IF EXISTS {nome}")
+
+        for lote in lotes:
+
+            if not lote:
+                continue
+
+            # 'executemany' é MUITO mais eficiente do que fazer um 'execute' para cada linha
+            conn.executemany(DSA_SQL_INSERE_VENDA, lote)
+
+            # Acompanha o intervalo de dias afetado pela carga
+            dias = [linha[0] for linha in lote]
+            dia_min = min(dias) if dia_min is None else min(dia_min, min(dias))
+            dia_max = max(dias) if dia_max is None else max(dia_max, max(dias))
+            total += len(lote)
+
+        if tabela_vazia:
+            for sql in DSA_INDICES_VENDAS.values():
+                conn.execute(sql)
+
+        # Recalcula a tabela agregada apenas para os dias carregados (usa o índice de cobertura)
+        if total:
+            dsa_recalcula_diario(conn, dia_min, dia_max)
+
+        for sql in DSA_GATILHOS_DIARIO.values():
+            conn.execute(sql)
+
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Atualiza as estatísticas do otimizador para os novos volumes
+    conn.execute("ANALYZE")
+
+    return total
+
+
+# Função que recalcula a tabela agregada para um intervalo de dias
+def dsa_recalcula_diario(conn, dia_inicio, dia_fim):
+
+    """
+    Recalcula 'tb_vendas_diario' a partir de 'tb_vendas' para os dias entre
+    'dia_inicio' e 'dia_fim' (epoch days, inclusivo). Não faz commit.
+    """
+
+    conn.execute("DELETE FROM tb_vendas_diario WHERE date BETWEEN ? AND ?", (dia_inicio, dia_fim))
+    conn.execute(
+        """
+        INSERT INTO tb_vendas_diario (date, regiao, categoria, produto, faturamento, quantidade, transacoes)
+        SELECT date, regiao, categoria, produto, SUM(faturamento), SUM(quantidade), COUNT(*)
+        FROM tb_vendas
+        WHERE date BETWEEN ? AND ?
+        GROUP BY date, regiao, categoria, produto
+        """,
+        (dia_inicio, dia_fim),
+    )
+
+
+# --- Bloco 2: Inicialização e População do Banco de Dados ---
+
+# Função de inicialização do banco de dados
+def dsa_init_db(conn):
+
+    """
+    Inicializa o banco de dados.
+    1. Cria/atualiza o esquema da tabela 'tb_vendas' (migrações versionadas).
+    2. Verifica se a tabela está vazia.
+    3. Se estiver vazia, popula com 180 dias de dados fictícios.
+    """
+
+    # Aplica as migrações pendentes (cria as tabelas, converte as datas, cria os índices e os gatilhos)
+    dsa_migra_banco(conn)
+
+    # Verifica se existe ao menos um registro (linha) na tabela.
+    # 'LIMIT 1' para na primeira linha, ao contrário de COUNT(*), que percorreria a tabela inteira.
+    # Este 'if' garante que o código de popular dados SÓ rode se a tabela estiver vazia
+    if conn.execute("SELECT 1 FROM tb_vendas LIMIT 1").fetchone() is None:
+
+        # --- Geração de Dados Fictícios ---
+
+        # 180 dias a partir de 1º de Jan de 2026, entre 5 e 14 vendas por dia.
+        # A semente (seed) fixa garante que os mesmos dados "aleatórios" sejam gerados toda vez,
+        # tornando os resultados reprodutíveis. A geração é vetorizada (ver dsa_gerador_dados.py).
+        lotes = dsa_gera_lotes(dias = 180, vendas_min = 5, vendas_max = 14, data_inicio = date(2026, 1, 1), seed = 42)
+
+        # --- Inserção em Massa (Bulk Insert) ---
+        dsa_carrega_lotes(conn, lotes)
+
+
+# --- Bloco 3: Função de Conexão com o Banco de Dados ---
+
+# PRAGMAs de desempenho aplicados a cada nova conexão
+DSA_PRAGMAS = {
+    # WAL (Write-Ahead Log): leitores não bloqueiam o escritor e vice-versa
+    "journal_mode": "WAL",
+    # Com WAL, NORMAL é seguro contra corrupção e evita um fsync a cada commit
+    "synchronous": "NORMAL",
+    # Lê o arquivo via memória mapeada (até 256 MB), evitando cópias para o cache do SQLite
+    "mmap_size": 268435456,
+    # Valor negativo = tamanho em KiB: 64 MB de cache de páginas por conexão
+    "cache_size": -65536,
+    # Tabelas temporárias (GROUP BY / ORDER BY) em memória em vez de disco
+    "temp_store": "MEMORY",
+    # ANALYZE amostra até 1000 linhas por índice em vez de ler a tabela inteira
+    "analysis_limit": 1000,
+}
+
+
+# Função de conexão ao banco de dados
+def dsa_cria_conexao(db_path = "dsa_database.db", somente_leitura = False):
+
+    """
+    Cria e retorna um objeto de conexão com o banco de dados SQLite,
+    já configurado com os PRAGMAs de desempenho (ver 'DSA_PRAGMAS').
+
+    Parâmetros:
+    db_path (str): O caminho e nome do arquivo .db a ser usado.
+                   O padrão é "dsa_database.db".
+                   Se o arquivo não existir, o SQLite o criará.
+    somente_leitura (bool): Abre a conexão com a URI 'mode=ro': qualquer escrita falha.
+                   O arquivo precisa existir (e já estar em WAL, o que o escritor garante).
+    """
+
+    # Cria a conexão com o banco de dados SQLite
+    # check_same_thread=False: Esta é uma configuração importante para o Streamlit.
+    # O Streamlit executa o código em diferentes threads (processos).
+    # Por padrão, o SQLite só permite que a thread que o criou interaja com ele.
+    # Definir como 'False' permite que múltiplas threads (como as do Streamlit)
+    # acessem a mesma conexão.
+    if somente_leitura:
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri = True, check_same_thread = False)
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread = False)
+
+    # Aplica os PRAGMAs de desempenho
+    # (os nomes e valores vêm de 'DSA_PRAGMAS', definido no código, e não do usuário).
+    # O modo WAL fica gravado no arquivo: uma conexão somente leitura não pode (nem precisa) mudá-lo.
+    for pragma, valor in DSA_PRAGMAS.items():
+        if somente_leitura and pragma == "journal_mode":
+            continue
+        conn.execute(f"PRAGMA {pragma} = {valor}")
+
+    # Retorna o objeto de conexão para ser usado por outras funções
+    return conn
+
+
+# Função que retorna o caminho do arquivo de uma conexão
+def dsa_caminho_banco(conn):
+
+    """
+    Retorna o caminho absoluto do arquivo do banco 'main' da conexão.
+    Útil para que outros processos (ex: trabalhadores de relatórios) abram a sua própria conexão.
+    """
+
+    for _, nome, arquivo in conn.execute("PRAGMA database_list"):
+        if nome == "main":
+            return arquivo
+
+    return None
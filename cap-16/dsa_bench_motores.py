@@ -0,0 +1,263 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de comparação dos motores de consulta (Pandas, SQLite e DuckDB).
+# Para cada tamanho de base, executa as agregações do dashboard nos três caminhos, confere que os
+# resultados são iguais e mostra o tempo de cada um e o ganho do DuckDB sobre o SQLite e o Pandas.
+#
+# Exemplo (gera bases de 10 mil, 100 mil e 1 milhão de transações em uma pasta temporária):
+# python dsa_bench_motores.py --linhas 10000 100000 1000000
+#
+# Ou com bases já existentes:
+# python dsa_bench_motores.py --db dsa_database.db dsa_carga.db
+
+# Para ler os parâmetros da linha de comando
+import argparse
+
+# Para gravar o resultado em JSON
+import json
+
+# Para os caminhos das bases geradas
+import os
+
+# Para a pasta temporária das bases geradas
+import tempfile
+
+# Para medir os tempos
+import time
+
+# Importa módulos de data e hora
+from datetime import date
+
+# Importa o NumPy e o Pandas (o caminho de referência: tudo em memória)
+import numpy as np
+import pandas as pd
+
+# Importa a carga, a geração de dados, os motores e as consultas
+from dsa_banco import dsa_carrega_lotes, dsa_cria_conexao, dsa_migra_banco
+from dsa_conexoes import dsa_cria_motor
+from dsa_gerador_dados import dsa_gera_lotes
+from dsa_consultas import (
+    dsa_consulta_dimensoes,
+    dsa_consulta_dispersao_faixas,
+    dsa_consulta_kpis,
+    dsa_consulta_linhas,
+    dsa_consulta_receita_dia_semana,
+    dsa_consulta_receita_diaria,
+    dsa_consulta_receita_por,
+)
+
+
+# Vendas por dia das bases geradas (o número de dias sai do total de linhas pedido)
+DSA_VENDAS_POR_DIA = 1_000
+
+# Número de faixas da dispersão (o mesmo do dashboard)
+DSA_FAIXAS_BENCH = 60
+
+# Agregações comparadas: nome -> (consulta SQL, argumentos)
+DSA_CONSULTAS_BENCH = {
+    "kpis": (dsa_consulta_kpis, ()),
+    "receita_diaria": (dsa_consulta_receita_diaria, ()),
+    "receita_categoria": (dsa_consulta_receita_por, ("categoria",)),
+    "receita_regiao": (dsa_consulta_receita_por, ("regiao",)),
+    "receita_dia_semana": (dsa_consulta_receita_dia_semana, ()),
+    "dispersao_faixas": (dsa_consulta_dispersao_faixas, (DSA_FAIXAS_BENCH,)),
+}
+
+
+# Função com as mesmas agregações feitas no Pandas (o caminho original da app)
+def dsa_agrega_pandas(df, nome):
+
+    """Calcula a agregação 'nome' sobre o DataFrame de transações, no formato da consulta SQL equivalente."""
+
+    if nome == "kpis":
+        total_faturamento, total_qty = float(df["faturamento"].sum()), int(df["quantidade"].sum())
+        return {
+            "total_faturamento": total_faturamento,
+            "total_qty": total_qty,
+            "avg_ticket": total_faturamento / total_qty if total_qty > 0 else 0,
+            "transacoes": len(df),
+        }
+
+    if nome == "receita_diaria":
+        return df.groupby("date", as_index = False)["faturamento"].sum()
+
+    if nome in ("receita_categoria", "receita_regiao"):
+        coluna = nome.split("_")[1]
+        return df.groupby(coluna, as_index = False)["faturamento"].sum()
+
+    if nome == "receita_dia_semana":
+        return (
+            df.assign(weekday_num = df["date"].dt.weekday)
+            .groupby("weekday_num", as_index = False)["faturamento"].mean()
+        )
+
+    if nome == "dispersao_faixas":
+        largura = df["faturamento"].max() / DSA_FAIXAS_BENCH + 0.01
+        return (
+            df.assign(faixa = np.floor(df["faturamento"] / largura).astype("int64"))
+            .groupby(["quantidade", "categoria", "faixa"], as_index = False)
+            .agg(faturamento = ("faturamento", "mean"), transacoes = ("faturamento", "size"))
+        )
+
+    raise ValueError(f"Agregação inválida: {nome}")
+
+
+# Função que compara dois resultados (dicionários ou DataFrames), sem depender da ordem das linhas
+def dsa_resultados_iguais(a, b):
+
+    if isinstance(a, dict):
+        return all(np.isclose(a[chave], b[chave], rtol = 1e-9) for chave in a)
+
+    colunas = list(a.columns)
+    a = a.sort_values(colunas).reset_index(drop = True)
+    b = b[colunas].sort_values(colunas).reset_index(drop = True)
+
+    try:
+        pd.testing.assert_frame_equal(a, b, check_dtype = False, rtol = 1e-9)
+    except AssertionError:
+        return False
+
+    return True
+
+
+# Função que mede o menor tempo de 'repeticoes' execuções
+def dsa_cronometra(funcao, repeticoes):
+
+    tempos = []
+
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    return min(tempos), resultado
+
+
+# Função que gera uma base de teste com aproximadamente 'linhas' transações
+def dsa_gera_base(caminho, linhas):
+
+    conn = dsa_cria_conexao(caminho)
+    dsa_migra_banco(conn)
+
+    if conn.execute("SELECT 1 FROM tb_vendas LIMIT 1").fetchone() is None:
+        vendas_dia = min(DSA_VENDAS_POR_DIA, linhas)
+        dsa_carrega_lotes(conn, dsa_gera_lotes(
+            dias = max(linhas // vendas_dia, 1),
+            vendas_min = vendas_dia,
+            vendas_max = vendas_dia,
+            data_inicio = date(2026, 1, 1),
+            seed = 42,
+        ))
+
+    conn.close()
+
+
+# Função que compara os motores em uma base
+def dsa_compara_motores(db_path, repeticoes = 3):
+
+    """
+    Executa as agregações de 'DSA_CONSULTAS_BENCH' no Pandas, no SQLite e no DuckDB, sem filtros de dimensão.
+
+    Retorna:
+    (dict): Linhas da base, tempos de carga e, por agregação, o tempo (s) de cada motor e se os resultados conferem.
+    """
+
+    sqlite = dsa_cria_motor("sqlite", db_path)
+    conn = sqlite.conexao()
+
+    dimensoes = dsa_consulta_dimensoes(conn)
+    filtros = {
+        "data_inicio": dimensoes["min_date"],
+        "data_fim": dimensoes["max_date"],
+        "regioes": dimensoes["regioes"],
+        "categorias": dimensoes["categorias"],
+        "produtos": dimensoes["produtos"],
+    }
+
+    # Caminho Pandas: carrega todas as transações e agrega em memória
+    carga_pandas, df = dsa_cronometra(lambda: dsa_consulta_linhas(conn, filtros), 1)
+
+    # Motor DuckDB: anexa o arquivo SQLite ou, sem a extensão sqlite, espelha as tabelas (custo pago uma vez por versão dos dados)
+    inicio = time.perf_counter()
+    duckdb = dsa_cria_motor("duckdb", db_path)
+    conn_duck = duckdb.conexao_analitica()
+    carga_duckdb = time.perf_counter() - inicio
+
+    resultado = {
+        "db": db_path,
+        "linhas": len(df),
+        "carga_pandas_s": round(carga_pandas, 4),
+        "carga_duckdb_s": round(carga_duckdb, 4),
+        "modo_duckdb": duckdb.modo,
+        "consultas": {},
+    }
+
+    for nome, (consulta, args) in DSA_CONSULTAS_BENCH.items():
+
+        t_pandas, r_pandas = dsa_cronometra(lambda: dsa_agrega_pandas(df, nome), repeticoes)
+        t_sqlite, r_sqlite = dsa_cronometra(lambda: consulta(conn, filtros, *args), repeticoes)
+        t_duckdb, r_duckdb = dsa_cronometra(lambda: consulta(conn_duck, filtros, *args), repeticoes)
+
+        resultado["consultas"][nome] = {
+            "pandas_s": round(t_pandas, 5),
+            "sqlite_s": round(t_sqlite, 5),
+            "duckdb_s": round(t_duckdb, 5),
+            "duckdb_igual_sqlite": dsa_resultados_iguais(r_sqlite, r_duckdb),
+            "duckdb_igual_pandas": dsa_resultados_iguais(r_pandas, r_duckdb),
+        }
+
+    duckdb.libera()
+    sqlite.libera()
+
+    return resultado
+
+
+# Função que mostra o resultado de uma base como tabela
+def dsa_imprime_resultado(resultado):
+
+    print(f"\n{resultado['db']}: {resultado['linhas']:,} transações "
+          f"(carga Pandas {resultado['carga_pandas_s']:.2f}s, DuckDB {resultado['modo_duckdb']} {resultado['carga_duckdb_s']:.2f}s)")
+    print(f"{'agregação':<20}{'pandas (ms)':>12}{'sqlite (ms)':>12}{'duckdb (ms)':>12}{'x sqlite':>10}{'x pandas':>10}  iguais")
+
+    for nome, r in resultado["consultas"].items():
+        print(
+            f"{nome:<20}{r['pandas_s'] * 1000:>12.1f}{r['sqlite_s'] * 1000:>12.1f}{r['duckdb_s'] * 1000:>12.1f}"
+            f"{r['sqlite_s'] / max(r['duckdb_s'], 1e-9):>10.1f}{r['pandas_s'] / max(r['duckdb_s'], 1e-9):>10.1f}"
+            f"  {'sim' if r['duckdb_igual_sqlite'] and r['duckdb_igual_pandas'] else 'NÃO'}"
+        )
+
+
+# Permite comparar os motores pelo terminal
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Compara as agregações do dashboard no Pandas, no SQLite e no DuckDB.")
+    parser.add_argument("--db", nargs = "*", default = [], help = "Bases SQLite existentes")
+    parser.add_argument("--linhas", nargs = "*", type = int, default = [], help = "Tamanhos das bases geradas (ex: 10000 1000000)")
+    parser.add_argument("--pasta", help = "Pasta das bases geradas (padrão: pasta temporária; reaproveitadas entre execuções)")
+    parser.add_argument("--repeticoes", type = int, default = 3, help = "Execuções por medida (vale o menor tempo)")
+    parser.add_argument("--json", help = "Arquivo para gravar o resultado em JSON")
+    args = parser.parse_args()
+
+    if not args.db and not args.linhas:
+        args.linhas = [10_000, 100_000, 1_000_000]
+
+    pasta = args.pasta or os.path.join(tempfile.gettempdir(), "dsa_bench_motores")
+    os.makedirs(pasta, exist_ok = True)
+
+    bases = list(args.db)
+
+    for linhas in args.linhas:
+        caminho = os.path.join(pasta, f"dsa_bench_{linhas}.db")
+        dsa_gera_base(caminho, linhas)
+        bases.append(caminho)
+
+    resultados = []
+
+    for caminho in bases:
+        resultado = dsa_compara_motores(caminho, repeticoes = args.repeticoes)
+        dsa_imprime_resultado(resultado)
+        resultados.append(resultado)
+
+    if args.json:
+        with open(args.json, "w", encoding = "utf-8") as f:
+            json.dump(resultados, f, ensure_ascii = False, indent = 2)
@@ -0,0 +1,350 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de benchmark do caminho de dados do dashboard (sem navegador e sem Streamlit).
+# Para cada tamanho de base, mede o tempo e o pico de memória (RSS) de cada etapa do dashboard:
+# opções da sidebar, carga das transações, filtro, agregações dos gráficos, exportação CSV e relatório PDF.
+# Cada etapa roda em um processo novo, então o pico de memória de uma não contamina o da outra.
+# O resultado vai para um JSON; com --compara, o benchmark aponta as etapas que ficaram mais lentas
+# do que em uma execução anterior (ex: antes e depois de uma mudança no código).
+#
+# Exemplo (gera as bases na primeira execução e as reaproveita nas seguintes):
+# python dsa_benchmark.py --linhas 10000 1000000 10000000 --saida bench_atual.json
+# python dsa_benchmark.py --linhas 10000 1000000 --compara bench_atual.json
+
+# Para ler os parâmetros da linha de comando
+import argparse
+
+# Para gravar e ler o resultado em JSON
+import json
+
+# Para os caminhos e a pasta temporária das bases e dos arquivos gerados
+import os
+import tempfile
+
+# Para identificar o ambiente no resultado
+import platform
+
+# Para o código de saída da comparação
+import sys
+
+# Para medir os tempos
+import time
+
+# Para o contexto 'spawn' dos processos de cada etapa
+import multiprocessing
+
+# Importa o pool de processos (um processo novo por etapa)
+from concurrent.futures import ProcessPoolExecutor
+
+# Importa módulos de data e hora
+from datetime import datetime, timedelta
+
+# Pico de memória do processo; o módulo 'resource' não existe no Windows (lá o pico fica em branco)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Importa a conexão, as consultas e as etapas medidas
+from dsa_banco import dsa_caminho_banco, dsa_cria_conexao
+from dsa_bench_motores import dsa_gera_base
+from dsa_cache import DsaCacheIncremental
+from dsa_comparativos import dsa_calcula_comparativos, dsa_consulta_somas_acumuladas
+from dsa_exportacao import dsa_exporta
+from dsa_relatorio import dsa_renderiza_relatorio
+from dsa_consultas import (
+    dsa_consulta_dimensoes,
+    dsa_consulta_dispersao_faixas,
+    dsa_consulta_kpis,
+    dsa_consulta_receita_dia_semana,
+    dsa_consulta_receita_diaria,
+    dsa_consulta_receita_por,
+)
+
+
+# Tamanhos padrão das bases (transações)
+DSA_TAMANHOS_BENCHMARK = [10_000, 1_000_000, 10_000_000]
+
+# Dias do filtro estreito (a última parte do período, com uma região e uma categoria)
+DSA_DIAS_FILTRO = 30
+
+# Tolerância da comparação: etapas mais de 25% mais lentas que a base são apontadas
+DSA_TOLERANCIA_REGRESSAO = 0.25
+
+
+# Função que retorna o pico de memória do processo, em MB
+def dsa_pico_rss_mb():
+
+    if resource is None:
+        return None
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # O Linux informa em KB; o macOS, em bytes
+    return round(pico / (1024**2 if sys.platform == "darwin" else 1024), 1)
+
+
+# Função que monta os filtros completo (padrão da sidebar) e estreito
+def dsa_filtros_benchmark(conn):
+
+    dimensoes = dsa_consulta_dimensoes(conn)
+
+    completos = {
+        "data_inicio": dimensoes["min_date"],
+        "data_fim": dimensoes["max_date"],
+        "regioes": dimensoes["regioes"],
+        "categorias": dimensoes["categorias"],
+        "produtos": dimensoes["produtos"],
+    }
+
+    estreitos = {
+        **completos,
+        "data_inicio": max(dimensoes["min_date"], dimensoes["max_date"] - timedelta(days = DSA_DIAS_FILTRO - 1)),
+        "regioes": dimensoes["regioes"][:1],
+        "categorias": dimensoes["categorias"][:1],
+    }
+
+    return completos, estreitos
+
+
+# Etapa: opções da sidebar (datas e valores distintos)
+def dsa_etapa_dimensoes(conn, completos, estreitos, pasta):
+
+    dimensoes = dsa_consulta_dimensoes(conn)
+
+    return {"produtos": len(dimensoes["produtos"])}
+
+
+# Etapa: carga de todas as transações (a seleção padrão do dashboard, como em 'dsa_carrega_dados')
+def dsa_etapa_carga(conn, completos, estreitos, pasta):
+
+    df = DsaCacheIncremental(max_entradas = 1).obtem(conn, completos)
+
+    return {"linhas": len(df), "mb_dataframe": round(df.memory_usage(deep = True).sum() / 1024**2, 1)}
+
+
+# Etapa: filtro estreito (uma região, uma categoria, os últimos dias)
+def dsa_etapa_filtro(conn, completos, estreitos, pasta):
+
+    df = DsaCacheIncremental(max_entradas = 1).obtem(conn, estreitos)
+
+    return {"linhas": len(df)}
+
+
+# Etapa: agregações dos KPIs, dos gráficos e dos comparativos (com o tempo de cada consulta)
+def dsa_etapa_agregacao(conn, completos, estreitos, pasta):
+
+    consultas = {
+        "kpis": lambda: dsa_consulta_kpis(conn, completos),
+        "receita_diaria": lambda: dsa_consulta_receita_diaria(conn, completos),
+        "receita_categoria": lambda: dsa_consulta_receita_por(conn, completos, "categoria"),
+        "receita_regiao": lambda: dsa_consulta_receita_por(conn, completos, "regiao"),
+        "receita_produto": lambda: dsa_consulta_receita_por(conn, completos, "produto"),
+        "receita_dia_semana": lambda: dsa_consulta_receita_dia_semana(conn, completos),
+        "dispersao_faixas": lambda: dsa_consulta_dispersao_faixas(conn, completos, 60),
+        "comparativos": lambda: dsa_calcula_comparativos(
+            dsa_consulta_somas_acumuladas(conn, completos), estreitos["data_inicio"], estreitos["data_fim"]
+        ),
+    }
+
+    tempos = {}
+
+    for nome, consulta in consultas.items():
+        inicio = time.perf_counter()
+        consulta()
+        tempos[nome] = round(time.perf_counter() - inicio, 4)
+
+    return {"consultas": tempos}
+
+
+# Etapa: exportação CSV de todas as transações
+def dsa_etapa_exportacao_csv(conn, completos, estreitos, pasta):
+
+    with tempfile.TemporaryFile(dir = pasta) as arquivo:
+        tamanho = dsa_exporta(conn, completos, arquivo, formato = "csv")
+
+    return {"mb_arquivo": round(tamanho / 1024**2, 1)}
+
+
+# Etapa: relatório PDF (KPIs, gráficos e tabela das maiores vendas)
+def dsa_etapa_relatorio_pdf(conn, completos, estreitos, pasta):
+
+    destino = os.path.join(pasta, f"dsa_benchmark_{os.getpid()}.pdf")
+
+    try:
+        dsa_renderiza_relatorio(dsa_caminho_banco(conn), completos, destino)
+        return {"kb_arquivo": round(os.path.getsize(destino) / 1024, 1)}
+    finally:
+        if os.path.exists(destino):
+            os.remove(destino)
+
+
+# Etapas medidas, na ordem do dashboard
+DSA_ETAPAS_BENCHMARK = {
+    "dimensoes": dsa_etapa_dimensoes,
+    "carga": dsa_etapa_carga,
+    "filtro": dsa_etapa_filtro,
+    "agregacao": dsa_etapa_agregacao,
+    "exportacao_csv": dsa_etapa_exportacao_csv,
+    "relatorio_pdf": dsa_etapa_relatorio_pdf,
+}
+
+
+# Função que executa uma etapa (no processo novo)
+def dsa_executa_etapa(db_path, etapa, pasta):
+
+    """
+    Executa a etapa 'etapa' sobre a base 'db_path' e mede o tempo e a memória.
+    Precisa estar no nível do módulo para ser enviada a outro processo.
+
+    Retorna:
+    (dict): 'segundos', 'pico_rss_mb' (pico do processo), 'rss_base_mb' (pico antes da etapa,
+            com os módulos já importados) e os detalhes devolvidos pela etapa.
+    """
+
+    conn = dsa_cria_conexao(db_path, somente_leitura = True)
+
+    try:
+        completos, estreitos = dsa_filtros_benchmark(conn)
+        rss_base = dsa_pico_rss_mb()
+
+        inicio = time.perf_counter()
+        detalhes = DSA_ETAPAS_BENCHMARK[etapa](conn, completos, estreitos, pasta)
+        segundos = time.perf_counter() - inicio
+    finally:
+        conn.close()
+
+    return {"segundos": round(segundos, 4), "pico_rss_mb": dsa_pico_rss_mb(), "rss_base_mb": rss_base, **detalhes}
+
+
+# Função que mede todas as etapas em uma base
+def dsa_mede_base(db_path, etapas, repeticoes = 1, pasta = None):
+
+    """
+    Mede as etapas na base 'db_path', cada execução em um processo novo.
+    Com mais de uma repetição, vale o menor tempo e o maior pico de memória.
+
+    Retorna:
+    (dict): etapa -> medidas (ver 'dsa_executa_etapa').
+    """
+
+    pasta = pasta or tempfile.gettempdir()
+    resultado = {}
+
+    for etapa in etapas:
+
+        medidas = []
+
+        for _ in range(repeticoes):
+            with ProcessPoolExecutor(max_workers = 1, mp_context = multiprocessing.get_context("spawn")) as pool:
+                medidas.append(pool.submit(dsa_executa_etapa, db_path, etapa, pasta).result())
+
+        melhor = min(medidas, key = lambda m: m["segundos"])
+
+        if melhor["pico_rss_mb"] is not None:
+            melhor["pico_rss_mb"] = max(m["pico_rss_mb"] for m in medidas)
+
+        resultado[etapa] = melhor
+
+    return resultado
+
+
+# Função que compara o resultado com uma execução anterior
+def dsa_compara_benchmark(atual, anterior, tolerancia = DSA_TOLERANCIA_REGRESSAO):
+
+    """
+    Compara os tempos de cada etapa com os da execução anterior, para as bases do mesmo tamanho.
+
+    Retorna:
+    (list): Tuplas (linhas, etapa, segundos anteriores, segundos atuais) das etapas que ficaram
+            mais de 'tolerancia' mais lentas. Lista vazia = nenhuma regressão.
+    """
+
+    bases_anteriores = {base["linhas"]: base for base in anterior["bases"]}
+    regressoes = []
+
+    for base in atual["bases"]:
+
+        base_anterior = bases_anteriores.get(base["linhas"])
+
+        if base_anterior is None:
+            continue
+
+        for etapa, medidas in base["etapas"].items():
+
+            antes = base_anterior["etapas"].get(etapa)
+
+            if antes is not None and medidas["segundos"] > antes["segundos"] * (1 + tolerancia):
+                regressoes.append((base["linhas"], etapa, antes["segundos"], medidas["segundos"]))
+
+    return regressoes
+
+
+# Permite rodar o benchmark pelo terminal
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Mede o tempo e a memória de cada etapa do dashboard.")
+    parser.add_argument("--linhas", nargs = "*", type = int, default = DSA_TAMANHOS_BENCHMARK, help = "Tamanhos das bases geradas")
+    parser.add_argument("--db", nargs = "*", default = [], help = "Bases SQLite existentes (além das geradas)")
+    parser.add_argument("--pasta", help = "Pasta das bases geradas (padrão: pasta temporária; reaproveitadas entre execuções)")
+    parser.add_argument("--etapas", nargs = "*", choices = list(DSA_ETAPAS_BENCHMARK), default = list(DSA_ETAPAS_BENCHMARK))
+    parser.add_argument("--repeticoes", type = int, default = 1, help = "Execuções por etapa (vale o menor tempo)")
+    parser.add_argument("--saida", default = "benchmark.json", help = "Arquivo JSON do resultado")
+    parser.add_argument("--compara", help = "JSON de uma execução anterior: aponta as etapas mais lentas")
+    parser.add_argument("--tolerancia", type = float, default = DSA_TOLERANCIA_REGRESSAO, help = "Folga da comparação (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    pasta = args.pasta or os.path.join(tempfile.gettempdir(), "dsa_bench_motores")
+    os.makedirs(pasta, exist_ok = True)
+
+    # Bases geradas (com o tempo de geração, quando a base ainda não existia) e bases informadas
+    bases = []
+
+    for linhas in args.linhas:
+        caminho = os.path.join(pasta, f"dsa_bench_{linhas}.db")
+        existia = os.path.exists(caminho)
+        inicio = time.perf_counter()
+        dsa_gera_base(caminho, linhas)
+        bases.append((caminho, None if existia else round(time.perf_counter() - inicio, 1)))
+
+    bases.extend((caminho, None) for caminho in args.db)
+
+    resultado = {
+        "gerado_em": datetime.now().isoformat(timespec = "seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processadores": os.cpu_count(),
+        "bases": [],
+    }
+
+    for caminho, segundos_geracao in bases:
+
+        conn = dsa_cria_conexao(caminho, somente_leitura = True)
+        linhas = conn.execute("SELECT COALESCE(SUM(transacoes), 0) FROM tb_vendas_diario").fetchone()[0]
+        conn.close()
+
+        print(f"\n{caminho}: {linhas:,} transações" + (f" (gerada em {segundos_geracao}s)" if segundos_geracao else ""))
+
+        etapas = dsa_mede_base(caminho, args.etapas, repeticoes = args.repeticoes, pasta = pasta)
+
+        for etapa, medidas in etapas.items():
+            pico = "-" if medidas["pico_rss_mb"] is None else f"{medidas['pico_rss_mb']:,.0f} MB"
+            print(f"  {etapa:<16}{medidas['segundos']:>10.3f}s   pico RSS {pico}")
+
+        resultado["bases"].append({"db": caminho, "linhas": linhas, "segundos_geracao": segundos_geracao, "etapas": etapas})
+
+    with open(args.saida, "w", encoding = "utf-8") as f:
+        json.dump(resultado, f, ensure_ascii = False, indent = 2, default = str)
+
+    print(f"\nResultado gravado em '{args.saida}'.")
+
+    if args.compara:
+
+        with open(args.compara, encoding = "utf-8") as f:
+            regressoes = dsa_compara_benchmark(resultado, json.load(f), args.tolerancia)
+
+        for linhas, etapa, antes, agora in regressoes:
+            print(f"REGRESSÃO: {etapa} com {linhas:,} transações: {antes:.3f}s -> {agora:.3f}s")
+
+        print("Nenhuma etapa ficou mais lenta." if not regressoes else f"{len(regressoes)} etapa(s) mais lenta(s).")
+        sys.exit(1 if regressoes else 0)
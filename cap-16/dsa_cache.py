@@ -0,0 +1,211 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de cache incremental das transações filtradas.
+# Em vez de expirar por tempo (TTL), o cache compara a "versão" dos dados no banco
+# e, quando chegam vendas novas, busca somente as linhas novas e as anexa ao DataFrame guardado.
+# Inclui também o cache (memoização) dos resultados agregados do dashboard.
+
+# Para o dicionário ordenado usado como fila LRU (menos usado recentemente)
+from collections import OrderedDict
+
+# Para estimar o tamanho dos resultados que não são DataFrames
+import sys
+
+# Para proteger o cache do acesso simultâneo de várias sessões (threads) do Streamlit
+import threading
+
+# Importa o Pandas para concatenar as linhas novas ao DataFrame em cache
+import pandas as pd
+
+# Importa as consultas usadas pelo cache
+from dsa_consultas import dsa_chave_filtros, dsa_compacta_tipos, dsa_hash_filtros, dsa_consulta_linhas, dsa_consulta_versao
+
+
+# Classe do cache incremental
+class DsaCacheIncremental:
+
+    """
+    Cache das transações filtradas com invalidação por mudança nos dados.
+
+    Para cada combinação de filtros guarda o DataFrame e a versão dos dados
+    (maior id, contador de alterações) em que ele foi lido:
+    - versão igual: devolve o DataFrame guardado, sem ler a tabela;
+    - só o maior id aumentou (vendas novas): busca apenas 'id > maior id anterior' e anexa;
+    - contador de alterações mudou (UPDATE/DELETE): relê as linhas daquele filtro.
+
+    Os DataFrames devolvidos são compartilhados entre sessões: trate-os como somente leitura.
+    Com 'compacto = True', as linhas são guardadas com os tipos de DSA_TIPOS_COMPACTOS
+    (categorical/int32/float32), o que reduz a memória de cada entrada.
+    """
+
+    # Construtor da classe
+    def __init__(self, max_entradas = 32, compacto = False):
+
+        # Número máximo de combinações de filtros guardadas (as menos usadas saem primeiro)
+        self.max_entradas = max_entradas
+
+        # Guarda as linhas com tipos compactos
+        self.compacto = compacto
+
+        # Entradas do cache: chave dos filtros -> (versão, DataFrame)
+        self._entradas = OrderedDict()
+
+        # Trava para o acesso concorrente
+        self._lock = threading.Lock()
+
+    # Método que devolve as transações filtradas, atualizando o cache se necessário
+    def obtem(self, conn, filtros):
+
+        """Retorna o DataFrame com as transações que atendem aos filtros, sempre atualizado."""
+
+        chave = dsa_chave_filtros(filtros)
+
+        # Lê a versão ANTES das linhas e limita a busca a 'id <= max_id':
+        # vendas gravadas no meio da leitura ficam para a próxima atualização, sem duplicar linhas
+        versao = dsa_consulta_versao(conn)
+        max_id, alteracoes = versao
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+
+        if entrada is None or entrada[0][1] != alteracoes:
+
+            # Primeira leitura deste filtro, ou houve UPDATE/DELETE: leitura completa
+            df = self._prepara(dsa_consulta_linhas(conn, filtros, id_ate = max_id))
+
+        elif max_id > entrada[0][0]:
+
+            # Só há vendas novas: busca apenas as linhas com id acima do último visto
+            novas = dsa_consulta_linhas(conn, filtros, id_apos = entrada[0][0], id_ate = max_id)
+            df = self._prepara(pd.concat([entrada[1], novas], ignore_index = True)) if len(novas) else entrada[1]
+
+        else:
+
+            # Nada mudou: acerto de cache
+            df = entrada[1]
+
+        with self._lock:
+
+            # Se outra sessão gravou esta chave ao mesmo tempo, a última gravação vence:
+            # como a versão é conferida a cada chamada, uma entrada antiga só custa uma busca incremental
+            self._entradas[chave] = (versao, df)
+            self._entradas.move_to_end(chave)
+
+            # Remove as entradas menos usadas recentemente acima do limite
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last = False)
+
+        return df
+
+    # Método que aplica os tipos compactos, se o modo estiver ativo
+    def _prepara(self, df):
+
+        # Na busca incremental, o concat com as linhas novas (strings) devolve 'object':
+        # a conversão refaz as categorias sobre o DataFrame inteiro
+        return dsa_compacta_tipos(df) if self.compacto else df
+
+
+# Função que estima a memória ocupada por um resultado
+def dsa_tamanho_resultado(resultado):
+
+    """Retorna o tamanho aproximado, em bytes, de um DataFrame (contando as strings) ou de outro objeto."""
+
+    if isinstance(resultado, pd.DataFrame):
+        return int(resultado.memory_usage(index = True, deep = True).sum())
+
+    if isinstance(resultado, dict):
+        return sys.getsizeof(resultado) + sum(sys.getsizeof(v) for v in resultado.values())
+
+    return sys.getsizeof(resultado)
+
+
+# Classe do cache de resultados agregados
+class DsaCacheAgregados:
+
+    """
+    Memoização dos resultados das consultas do dashboard (KPIs, gráficos, dispersão).
+
+    A chave é (consulta, hash canônico dos filtros, argumentos extras): a mesma seleção feita
+    por qualquer sessão reaproveita o resultado. Cada entrada guarda a versão dos dados em que
+    foi calculada e só é usada se a versão atual for a mesma.
+
+    O cache é limitado pelo número de entradas e pelo total de bytes; ao passar de um dos limites,
+    saem as entradas menos usadas recentemente (LRU).
+
+    Os resultados devolvidos são compartilhados entre sessões: trate-os como somente leitura.
+    """
+
+    # Construtor da classe
+    def __init__(self, max_entradas = 256, max_bytes = 64 * 1024**2):
+
+        # Limites do cache
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+
+        # Entradas do cache: chave -> (versão, resultado, bytes)
+        self._entradas = OrderedDict()
+        self._bytes = 0
+
+        # Contadores de acertos e faltas (para diagnóstico)
+        self.acertos = 0
+        self.faltas = 0
+
+        # Trava para o acesso concorrente
+        self._lock = threading.Lock()
+
+    # Método que devolve o resultado de uma consulta, calculando-o só quando necessário
+    def obtem(self, versao, consulta, conn, filtros, *args, **kwargs):
+
+        """
+        Retorna 'consulta(conn, filtros, *args, **kwargs)', do cache quando possível.
+
+        Parâmetros:
+        versao (tuple): A versão atual dos dados (ver 'dsa_consulta_versao').
+        consulta (function): Uma função 'dsa_consulta_*' do módulo dsa_consultas.py.
+        conn (sqlite3.Connection): A conexão com o banco.
+        filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+        *args, **kwargs: Argumentos extras da consulta (fazem parte da chave).
+        """
+
+        chave = (consulta.__name__, dsa_hash_filtros(filtros), args, tuple(sorted(kwargs.items())))
+
+        with self._lock:
+
+            entrada = self._entradas.get(chave)
+
+            if entrada is not None and entrada[0] == versao:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return entrada[1]
+
+            self.faltas += 1
+
+        # Executa a consulta fora da trava: outras sessões continuam sendo atendidas
+        resultado = consulta(conn, filtros, *args, **kwargs)
+        tamanho = dsa_tamanho_resultado(resultado)
+
+        with self._lock:
+
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[2]
+
+            # Resultados maiores que o limite inteiro não são guardados
+            if tamanho <= self.max_bytes:
+                self._entradas[chave] = (versao, resultado, tamanho)
+                self._bytes += tamanho
+
+            # Remove as entradas menos usadas recentemente acima dos limites
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                _, (_, _, removido) = self._entradas.popitem(last = False)
+                self._bytes -= removido
+
+        return resultado
+
+    # Método que resume o estado do cache
+    def estatisticas(self):
+
+        """Retorna um dicionário com entradas, bytes, acertos e faltas."""
+
+        with self._lock:
+            return {"entradas": len(self._entradas), "bytes": self._bytes, "acertos": self.acertos, "faltas": self.faltas}
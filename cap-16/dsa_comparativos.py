@@ -0,0 +1,164 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo dos comparativos de período (período anterior, ano anterior, médias móveis e meta).
+# Os totais diários de todo o histórico (com os filtros de região, categoria e produto) são lidos
+# uma vez da tabela agregada e transformados em somas acumuladas (prefix sums): a soma de qualquer
+# intervalo de datas é a diferença entre duas posições, P[fim] - P[inicio - 1]. Assim, trocar o
+# período na sidebar não consulta o banco de novo, e cada comparativo custa O(1).
+
+# Importa o NumPy e o Pandas
+import numpy as np
+import pandas as pd
+
+# Importa módulos de data e hora
+from datetime import timedelta
+
+# Importa a conversão de datas para epoch days (o formato da coluna 'date' no banco)
+from dsa_banco import dsa_data_para_dia
+
+# Importa o SQL dos totais diários e a leitura do resultado
+from dsa_consultas import dsa_le_sql, dsa_sql_totais_diarios
+
+
+# Métricas acumuladas
+DSA_METRICAS_ACUMULADAS = ["faturamento", "quantidade", "transacoes"]
+
+# Crescimento da meta sobre a base de comparação (10% = 0.10)
+DSA_META_CRESCIMENTO = 0.10
+
+
+# Função que consulta as somas acumuladas dos totais diários
+def dsa_consulta_somas_acumuladas(conn, filtros):
+
+    """
+    Retorna as somas acumuladas por dia do intervalo de 'filtros' (normalmente todo o histórico).
+
+    Os dias sem vendas entram com total zero, então a linha de cada dia fica em uma posição fixa:
+    a linha i corresponde ao dia 'data_inicio + i - 1', e a linha 0 (o dia anterior ao início)
+    tem soma zero.
+
+    Retorna:
+    (DataFrame): Colunas 'date' (epoch day) e as somas acumuladas de 'DSA_METRICAS_ACUMULADAS'.
+    """
+
+    sql, params = dsa_sql_totais_diarios(filtros)
+    diario = dsa_le_sql(conn, sql, params)
+
+    primeiro = dsa_data_para_dia(filtros["data_inicio"])
+    ultimo = dsa_data_para_dia(filtros["data_fim"])
+    dias = max(ultimo - primeiro + 1, 0)
+
+    # Totais de cada dia nas posições 1..dias (a posição 0 fica zerada)
+    totais = np.zeros((dias + 1, len(DSA_METRICAS_ACUMULADAS)))
+    posicoes = diario["date"].to_numpy(dtype = np.int64) - primeiro + 1
+    totais[posicoes] = diario[DSA_METRICAS_ACUMULADAS].to_numpy(dtype = np.float64)
+
+    somas = pd.DataFrame(np.cumsum(totais, axis = 0), columns = DSA_METRICAS_ACUMULADAS)
+    somas.insert(0, "date", np.arange(primeiro - 1, ultimo + 1, dtype = np.int64))
+
+    return somas
+
+
+# Função que soma as métricas de um intervalo de datas
+def dsa_soma_intervalo(somas, inicio, fim):
+
+    """
+    Soma as métricas entre 'inicio' e 'fim' (datas, inclusive) com duas leituras das somas acumuladas.
+
+    Retorna:
+    (ndarray): As somas de 'DSA_METRICAS_ACUMULADAS', ou None se o intervalo sair do histórico
+               (um comparativo com dias faltando seria enganoso).
+    """
+
+    if len(somas) < 2:
+        return None
+
+    base = int(somas["date"].iat[0])
+    a = dsa_data_para_dia(inicio) - base
+    b = dsa_data_para_dia(fim) - base
+
+    if a < 1 or b >= len(somas) or a > b:
+        return None
+
+    # Leitura posicional de cada coluna (sem copiar o DataFrame): O(1) qualquer que seja o período
+    return np.array([somas[coluna].iat[b] - somas[coluna].iat[a - 1] for coluna in DSA_METRICAS_ACUMULADAS])
+
+
+# Função que desloca uma data em um ano
+def dsa_ano_anterior(data):
+
+    # 29/02 vira 28/02 no ano anterior
+    try:
+        return data.replace(year = data.year - 1)
+    except ValueError:
+        return data.replace(year = data.year - 1, day = 28)
+
+
+# Função que compara um valor com a base
+def dsa_variacao(valor, base):
+
+    """Variação percentual de 'valor' sobre 'base' (None quando não há base)."""
+
+    if base is None or base == 0:
+        return None
+
+    return (valor / base - 1) * 100
+
+
+# Função que calcula os comparativos da receita do período selecionado
+def dsa_calcula_comparativos(somas, inicio, fim, meta_crescimento = DSA_META_CRESCIMENTO):
+
+    """
+    Compara a receita do período [inicio, fim] com outros intervalos, todos lidos das somas acumuladas.
+
+    - 'periodo_anterior': os mesmos N dias imediatamente antes do início.
+    - 'ano_anterior': as mesmas datas um ano antes (YoY).
+    - 'media_7d' e 'media_30d': receita média por dia nos 7 / 30 dias que terminam em 'fim',
+      comparada com os 7 / 30 dias anteriores a eles.
+    - 'meta': a receita do ano anterior (ou, sem ela, a do período anterior) com 'meta_crescimento' a mais.
+
+    Parâmetros:
+    somas (DataFrame): O resultado de 'dsa_consulta_somas_acumuladas'.
+    inicio, fim (date): O período selecionado.
+    meta_crescimento (float): Crescimento esperado sobre a base da meta (0.10 = 10%).
+
+    Retorna:
+    (dict): Para cada comparativo, {'valor': ..., 'variacao': % ou None}, ou None quando o
+            intervalo de comparação não está inteiro no histórico.
+    """
+
+    atual = dsa_soma_intervalo(somas, inicio, fim)
+
+    if atual is None:
+        return {}
+
+    receita = atual[0]
+    dias = (fim - inicio).days + 1
+    comparativos = {}
+
+    # Mesmo tamanho de janela, imediatamente antes
+    anterior = dsa_soma_intervalo(somas, inicio - timedelta(days = dias), inicio - timedelta(days = 1))
+    comparativos["periodo_anterior"] = None if anterior is None else {"valor": anterior[0], "variacao": dsa_variacao(receita, anterior[0])}
+
+    # Mesmas datas no ano anterior
+    ano = dsa_soma_intervalo(somas, dsa_ano_anterior(inicio), dsa_ano_anterior(fim))
+    comparativos["ano_anterior"] = None if ano is None else {"valor": ano[0], "variacao": dsa_variacao(receita, ano[0])}
+
+    # Médias móveis que terminam no último dia selecionado
+    for janela in (7, 30):
+        recente = dsa_soma_intervalo(somas, fim - timedelta(days = janela - 1), fim)
+        previa = dsa_soma_intervalo(somas, fim - timedelta(days = 2 * janela - 1), fim - timedelta(days = janela))
+        comparativos[f"media_{janela}d"] = None if recente is None else {
+            "valor": recente[0] / janela,
+            "variacao": None if previa is None else dsa_variacao(recente[0], previa[0]),
+        }
+
+    # Meta: a base de comparação mais longa disponível, mais o crescimento esperado
+    base = comparativos["ano_anterior"] or comparativos["periodo_anterior"]
+    if base is None:
+        comparativos["meta"] = None
+    else:
+        meta = base["valor"] * (1 + meta_crescimento)
+        comparativos["meta"] = {"valor": meta, "variacao": dsa_variacao(receita, meta)}
+
+    return comparativos
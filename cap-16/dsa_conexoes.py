@@ -0,0 +1,314 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo do pool de conexões e dos motores de consulta.
+# Em vez de uma única conexão compartilhada por todas as sessões (que serializa as consultas),
+# cada thread recebe a sua própria conexão somente leitura ('mode=ro'), reaproveitada de um pool:
+# a abertura e os PRAGMAs são feitos uma vez por conexão, não a cada consulta. No modo WAL os
+# leitores não bloqueiam uns aos outros nem o escritor, que tem a sua conexão separada.
+#
+# O "motor" é o que a app usa para obter conexões. As consultas de dsa_consultas.py só precisam
+# de uma conexão com 'execute' (ver 'dsa_le_sql'), então outro motor (ex: o DuckDB, para as
+# agregações) pode ser registrado em 'DSA_MOTORES' sem mudar o código do dashboard.
+
+# Para a fila de conexões livres
+import queue
+
+# Para as conexões por thread e a trava do escritor
+import threading
+
+# Para devolver a conexão ao pool quando a thread termina sem devolvê-la
+import weakref
+
+# Para o gerenciador de contexto da escrita
+from contextlib import contextmanager
+
+# Importa o PyArrow (as tabelas espelhadas no motor DuckDB, quando a extensão sqlite não está disponível)
+import pyarrow as pa
+
+# Importa a criação das conexões e a inicialização do banco
+from dsa_banco import dsa_cria_conexao, dsa_init_db
+
+# Importa o armazém Arrow (cópia de 'tb_vendas' atualizada pela versão dos dados) e as consultas
+from dsa_armazem import DsaArmazemArrow
+from dsa_consultas import DSA_TABELA_DIARIA, dsa_consulta_versao, dsa_le_sql
+
+
+# Máximo de conexões de leitura abertas ao mesmo tempo
+DSA_MAX_LEITORES = 8
+
+# Espera máxima (segundos) por uma conexão livre quando todas estão em uso
+DSA_ESPERA_CONEXAO = 30
+
+
+# Classe do motor SQLite (pool de leitores + escritor)
+class DsaMotorSQLite:
+
+    """
+    Motor de consultas SQLite com um pool de conexões.
+
+    - 'conexao()' retorna a conexão somente leitura da thread atual. Na primeira chamada da thread,
+      pega uma conexão livre do pool (ou abre uma nova, até 'max_leitores'); as chamadas seguintes
+      da mesma thread retornam a mesma conexão.
+    - 'libera()' devolve a conexão da thread ao pool (ex: ao final de cada execução do script).
+      Se a thread terminar sem devolvê-la, a conexão volta ao pool quando a thread for coletada.
+    - 'escrita()' entrega a conexão de escrita, única, protegida por uma trava.
+    - 'conexao_analitica()' é a conexão das agregações; no SQLite é a mesma de 'conexao()'.
+    """
+
+    nome = "sqlite"
+
+    # Construtor da classe
+    def __init__(self, db_path, max_leitores = DSA_MAX_LEITORES):
+
+        self.db_path = db_path
+        self.max_leitores = max_leitores
+
+        # A conexão de escrita cria o arquivo, se preciso, e aplica as migrações (e o modo WAL)
+        # antes que qualquer leitor somente leitura seja aberto
+        self._escritor = dsa_cria_conexao(db_path)
+        dsa_init_db(self._escritor)
+        self._lock_escrita = threading.Lock()
+
+        self._livres = queue.LifoQueue()
+        self._abertas = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # Método que retorna a conexão de leitura da thread atual
+    def conexao(self):
+
+        conn = getattr(self._local, "conn", None)
+
+        if conn is not None:
+            return conn
+
+        try:
+            conn = self._livres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                pode_abrir = self._abertas < self.max_leitores
+                if pode_abrir:
+                    self._abertas += 1
+            if pode_abrir:
+                conn = dsa_cria_conexao(self.db_path, somente_leitura = True)
+            else:
+                try:
+                    conn = self._livres.get(timeout = DSA_ESPERA_CONEXAO)
+                except queue.Empty:
+                    raise RuntimeError(f"Nenhuma conexão de leitura livre após {DSA_ESPERA_CONEXAO}s ({self.max_leitores} em uso).")
+
+        self._local.conn = conn
+
+        # Rede de segurança: devolve a conexão se a thread acabar sem chamar 'libera'
+        self._local.finalizador = weakref.finalize(threading.current_thread(), self._livres.put, conn)
+
+        return conn
+
+    # Método que retorna a conexão das agregações
+    def conexao_analitica(self):
+
+        return self.conexao()
+
+    # Método que devolve a conexão da thread atual ao pool
+    def libera(self):
+
+        conn = getattr(self._local, "conn", None)
+
+        if conn is None:
+            return
+
+        # Uma transação de leitura esquecida aberta manteria um snapshot antigo (e impediria o checkpoint do WAL)
+        if conn.in_transaction:
+            conn.rollback()
+
+        self._local.conn = None
+
+        # Chamar o finalizador devolve a conexão uma única vez (ele não roda de novo quando a thread terminar)
+        self._local.finalizador()
+
+    # Método que entrega a conexão de escrita
+    @contextmanager
+    def escrita(self):
+
+        """Uso: 'with motor.escrita() as conn: ...'. Uma thread por vez; commit ao final, rollback em caso de erro."""
+
+        with self._lock_escrita:
+            with self._escritor:
+                yield self._escritor
+
+    # Método que informa o estado do pool
+    def estatisticas(self):
+
+        return {"motor": self.nome, "abertas": self._abertas, "livres": self._livres.qsize(), "max_leitores": self.max_leitores}
+
+
+# Classe do armazém com as datas em epoch days (o mesmo tipo da coluna 'date' no SQLite)
+class DsaArmazemDias(DsaArmazemArrow):
+
+    esquema = pa.schema([
+        pa.field(campo.name, pa.int32()) if campo.name == "date" else campo
+        for campo in DsaArmazemArrow.esquema
+    ])
+
+
+# Modos do motor DuckDB: leitura direta do arquivo SQLite (extensão sqlite) ou espelho Arrow em memória
+DSA_MODO_DUCKDB_SQLITE = "sqlite_scanner"
+DSA_MODO_DUCKDB_ESPELHO = "espelho_arrow"
+
+
+# Classe do motor DuckDB (agregações vetorizadas)
+class DsaMotorDuckDB(DsaMotorSQLite):
+
+    """
+    Motor que executa as agregações do dashboard no DuckDB (embutido, colunar e vetorizado).
+
+    As linhas individuais (tabela paginada, exportação, cache de transações) e a escrita continuam
+    no SQLite, com o pool herdado de 'DsaMotorSQLite'. Para as agregações, o DuckDB enxerga tabelas
+    com os mesmos nomes e colunas das tabelas do SQLite ('tb_vendas', 'tb_vendas_diario', 'tb_controle'),
+    então os mesmos textos SQL de dsa_consultas.py rodam nos dois motores. Há dois modos:
+
+    - 'sqlite_scanner' (preferido): o arquivo SQLite é anexado ao DuckDB com a extensão sqlite
+      (INSTALL sqlite; LOAD sqlite; ATTACH ... (TYPE sqlite)). Cada consulta lê o arquivo diretamente:
+      nada é copiado para a memória e não há sincronização a fazer quando os dados mudam.
+    - 'espelho_arrow' (alternativa): se a extensão não puder ser instalada ou carregada (ex: máquina
+      sem acesso à internet e sem a extensão no cache local), as tabelas são espelhadas no Arrow e
+      seguem a versão dos dados (ver 'dsa_consulta_versao'): 'tb_vendas' recebe apenas as vendas novas
+      (ou é relida após UPDATE/DELETE, ver dsa_armazem.py); a tabela agregada, pequena, é relida inteira.
+
+    O modo ativo aparece em 'estatisticas()'.
+
+    Dependência opcional: requer o pacote 'duckdb' (pip install duckdb).
+    """
+
+    nome = "duckdb"
+
+    # Construtor da classe
+    def __init__(self, db_path, max_leitores = DSA_MAX_LEITORES):
+
+        # Dependência opcional: só é necessária quando este motor é escolhido
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("O motor DuckDB requer o pacote 'duckdb' (pip install duckdb).")
+
+        super().__init__(db_path, max_leitores = max_leitores)
+
+        self._duck = duckdb.connect()
+        self._armazem = None
+        # Versão espelhada e as tabelas dessa versão, trocadas juntas (uma única atribuição)
+        self._espelho = (None, {})
+        self._lock_espelho = threading.Lock()
+
+        # Tenta anexar o arquivo SQLite; se não der, usa o espelho Arrow
+        try:
+            caminho = str(db_path).replace("'", "''")
+            self._duck.execute("INSTALL sqlite")
+            self._duck.execute("LOAD sqlite")
+            self._duck.execute(f"ATTACH '{caminho}' AS dsa_sqlite (TYPE sqlite, READ_ONLY)")
+            self.modo = DSA_MODO_DUCKDB_SQLITE
+            self.motivo_modo = None
+        except duckdb.Error as erro:
+            self._armazem = DsaArmazemDias()
+            self.modo = DSA_MODO_DUCKDB_ESPELHO
+            self.motivo_modo = str(erro).splitlines()[0]
+
+    # Método que sincroniza as tabelas do DuckDB com a versão atual do SQLite
+    def sincroniza(self):
+
+        """Atualiza as tabelas do espelho Arrow se os dados mudaram. Retorna (versão, tabelas)."""
+
+        conn = self.conexao()
+        versao = dsa_consulta_versao(conn)
+
+        if versao == self._espelho[0]:
+            return self._espelho
+
+        with self._lock_espelho:
+
+            if versao != self._espelho[0]:
+
+                tabelas = {
+                    "tb_vendas": self._armazem.atualiza(conn),
+                    DSA_TABELA_DIARIA: pa.Table.from_pandas(dsa_le_sql(conn, f"SELECT * FROM {DSA_TABELA_DIARIA}", []), preserve_index = False),
+                    "tb_controle": pa.table({"id": [1], "alteracoes": [versao[1]]}),
+                }
+
+                self._espelho = (versao, tabelas)
+
+        return self._espelho
+
+    # Método que retorna a conexão das agregações
+    def conexao_analitica(self):
+
+        """Retorna o cursor do DuckDB da thread atual (cada thread tem o seu), com as tabelas em dia."""
+
+        cursor = getattr(self._local, "duck", None)
+
+        if cursor is None:
+            cursor = self._local.duck = self._duck.cursor()
+            self._local.duck_versao = None
+
+            # No modo 'sqlite_scanner', os nomes sem prefixo passam a ser as tabelas do arquivo anexado
+            if self.modo == DSA_MODO_DUCKDB_SQLITE:
+                cursor.execute("USE dsa_sqlite")
+
+        if self.modo == DSA_MODO_DUCKDB_SQLITE:
+            return cursor
+
+        versao, tabelas = self.sincroniza()
+
+        # As tabelas registradas valem só para o cursor que as registrou; o cursor guarda a referência,
+        # então uma troca de versão em outra thread não afeta as consultas deste
+        if self._local.duck_versao != versao:
+            for nome, tabela in tabelas.items():
+                cursor.register(nome, tabela)
+            self._local.duck_versao = versao
+
+        return cursor
+
+    # Método que devolve as conexões da thread atual
+    def libera(self):
+
+        cursor = getattr(self._local, "duck", None)
+
+        if cursor is not None:
+            cursor.close()
+            self._local.duck = None
+
+        super().libera()
+
+    # Método que informa o estado do pool e o modo do DuckDB (e, no modo espelho, o tamanho do espelho)
+    def estatisticas(self):
+
+        estatisticas = {**super().estatisticas(), "modo_duckdb": self.modo}
+
+        if self.modo == DSA_MODO_DUCKDB_ESPELHO:
+            linhas, tamanho = self._armazem.tamanho()
+            estatisticas.update(motivo_espelho = self.motivo_modo, versao_espelhada = self._espelho[0], linhas_espelhadas = linhas, mb_espelhados = round(tamanho / 1024**2, 1))
+
+        return estatisticas
+
+
+# Motores disponíveis: nome -> classe (todas com conexao(), conexao_analitica(), libera() e estatisticas())
+DSA_MOTORES = {
+    "sqlite": DsaMotorSQLite,
+    "duckdb": DsaMotorDuckDB,
+}
+
+
+# Função que cria o motor de consultas pelo nome
+def dsa_cria_motor(nome = "sqlite", db_path = "dsa_database.db", **opcoes):
+
+    """
+    Cria o motor de consultas registrado em 'DSA_MOTORES' com o nome informado.
+
+    Parâmetros:
+    nome (str): O nome do motor (ex: "sqlite").
+    db_path (str): Caminho do arquivo SQLite (a fonte dos dados).
+    opcoes: Parâmetros extras do motor (ex: max_leitores).
+    """
+
+    if nome not in DSA_MOTORES:
+        raise ValueError(f"Motor inválido: {nome}. Opções: {', '.join(DSA_MOTORES)}")
+
+    return DSA_MOTORES[nome](db_path, **opcoes)
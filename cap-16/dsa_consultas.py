@@ -0,0 +1,833 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo com a camada de consultas: converte os filtros da sidebar em SQL parametrizado
+# e executa as agregações (GROUP BY) diretamente no SQLite.
+
+# Para o hash canônico dos filtros
+import hashlib
+
+# Para reconhecer as conexões do SQLite (as demais seguem o padrão do motor, ver dsa_conexoes.py)
+import sqlite3
+
+# Para ler os argumentos e o código de saída da verificação de planos
+import sys
+
+# Importa o Pandas para receber os resultados das consultas em DataFrames
+import pandas as pd
+
+# Importa as funções do banco de dados (conexão, migrações e conversão de datas)
+from dsa_banco import dsa_cria_conexao, dsa_data_para_dia, dsa_dia_para_data, dsa_init_db
+
+
+# Dimensões que podem ser usadas em filtros e agrupamentos.
+# Funciona como uma "lista branca": somente estes nomes de coluna são interpolados no SQL,
+# todos os valores escolhidos pelo usuário seguem como parâmetros ('?').
+DSA_DIMENSOES = {
+    "regioes": "regiao",
+    "categorias": "categoria",
+    "produtos": "produto",
+}
+
+# Tabela agregada (dia x região x categoria x produto) mantida pelos gatilhos da migração 3.
+# Todas as consultas que não precisam de linhas individuais leem desta tabela:
+# ela tem no máximo (dias x combinações) linhas, independentemente do volume de transações.
+DSA_TABELA_DIARIA = "tb_vendas_diario"
+
+# Colunas da tabela de vendas (na ordem em que foram criadas)
+DSA_COLUNAS_VENDAS = ["id", "date", "regiao", "categoria", "produto", "faturamento", "quantidade"]
+
+
+# Função que converte a coluna 'date' (epoch days) para datetime do Pandas
+def dsa_converte_datas(df):
+
+    """Converte a coluna 'date' de epoch days (INTEGER) para datetime64, se existir."""
+
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], unit = "D")
+
+    return df
+
+
+# Tipos compactos das colunas de transações (modo compacto do carregamento).
+# As dimensões têm poucos valores distintos: como 'category', cada linha guarda só um código
+# de 1 byte em vez de um objeto string do Python. 'faturamento' em float32 mantém os centavos
+# (7 dígitos significativos); os totais dos KPIs são somados no SQLite, em precisão dupla.
+DSA_TIPOS_COMPACTOS = {
+    "id": "int32",
+    "regiao": "category",
+    "categoria": "category",
+    "produto": "category",
+    "faturamento": "float32",
+    "quantidade": "int32",
+}
+
+
+# Função que converte as colunas de transações para os tipos compactos
+def dsa_compacta_tipos(df):
+
+    """
+    Converte as colunas presentes em 'df' para DSA_TIPOS_COMPACTOS (categorical/int32/float32).
+
+    Colunas que já estão no tipo compacto não são copiadas.
+
+    Retorna:
+    (pd.DataFrame): O DataFrame com os tipos compactos.
+    """
+
+    tipos = {c: t for c, t in DSA_TIPOS_COMPACTOS.items() if c in df.columns and str(df[c].dtype) != t}
+
+    # 'id' só cabe em int32 até ~2,1 bilhões de linhas
+    if "id" in tipos and len(df) and df["id"].max() > 2**31 - 1:
+        del tipos["id"]
+
+    return df.astype(tipos) if tipos else df
+
+
+# Função que mede a memória ocupada por cada coluna
+def dsa_memoria_por_coluna(df):
+
+    """
+    Retorna um DataFrame com o tipo e a memória (em MB, contando as strings) de cada coluna,
+    além da linha 'Total'.
+    """
+
+    memoria = df.memory_usage(index = True, deep = True)
+
+    relatorio = pd.DataFrame({
+        "tipo": [str(df.index.dtype)] + [str(t) for t in df.dtypes],
+        "MB": memoria.values / 1024**2,
+    }, index = memoria.index)
+
+    relatorio.loc["Total"] = ["", relatorio["MB"].sum()]
+
+    return relatorio
+
+
+# Função que traduz os filtros em uma cláusula WHERE
+def dsa_monta_where(filtros):
+
+    """
+    Converte o dicionário de filtros da sidebar em uma cláusula WHERE parametrizada.
+
+    Parâmetros:
+    filtros (dict): Dicionário com as chaves 'data_inicio', 'data_fim', 'regioes',
+                    'categorias' e 'produtos'.
+
+    Retorna:
+    (tuple): A cláusula SQL (sem a palavra WHERE) e a lista de parâmetros.
+    """
+
+    # Filtro de período: as datas são gravadas como epoch days (inteiros),
+    # então o intervalo vira uma comparação numérica que usa o índice de cobertura
+    clausulas = ["date >= ?", "date <= ?"]
+    params = [dsa_data_para_dia(filtros["data_inicio"]), dsa_data_para_dia(filtros["data_fim"])]
+
+    # Filtros de seleção múltipla: um 'IN (?, ?, ...)' por dimensão
+    for chave, coluna in DSA_DIMENSOES.items():
+
+        valores = list(filtros[chave])
+
+        # Multiselect vazio não retorna nenhuma linha (mesmo comportamento do '.isin([])' do Pandas)
+        if not valores:
+            return "1 = 0", []
+
+        clausulas.append(f"{coluna} IN ({', '.join('?' * len(valores))})")
+        params.extend(valores)
+
+    return " AND ".join(clausulas), params
+
+
+# Função que gera uma chave canônica para os filtros
+def dsa_chave_filtros(filtros):
+
+    """
+    Converte o dicionário de filtros em uma tupla imutável (hashable) que pode ser usada
+    como chave de cache. As listas são ordenadas: a ordem em que o usuário escolheu os itens
+    no multiselect não altera o resultado, então não deve alterar a chave.
+    """
+
+    return (
+        filtros["data_inicio"].isoformat(),
+        filtros["data_fim"].isoformat(),
+        *(tuple(sorted(filtros[chave])) for chave in DSA_DIMENSOES),
+    )
+
+
+# Função que gera um hash canônico dos filtros
+def dsa_hash_filtros(filtros):
+
+    """
+    Retorna um hash curto (hexadecimal) de 'dsa_chave_filtros': a mesma seleção gera sempre o mesmo hash,
+    em qualquer sessão ou processo, então ele pode identificar a seleção em caches e nomes de arquivos.
+    """
+
+    return hashlib.sha1(repr(dsa_chave_filtros(filtros)).encode("utf-8")).hexdigest()[:16]
+
+
+# --- Montagem do SQL ---
+# Cada consulta do dashboard é montada por uma função 'dsa_sql_*' que devolve (sql, params).
+# As funções 'dsa_consulta_*' executam esse SQL; a verificação de planos (ver final do módulo)
+# usa exatamente o mesmo SQL para conferir que nenhuma consulta varre a tabela.
+
+# SQL do valor distinto de uma dimensão
+def dsa_sql_distintos(dimensao):
+
+    """
+    Lista os valores distintos de uma dimensão com um "loose index scan" na tabela agregada:
+    a CTE recursiva salta de um valor para o próximo (MIN(coluna) WHERE coluna > anterior),
+    fazendo uma busca no índice por valor distinto em vez de ler todas as linhas.
+    """
+
+    return f"""
+        WITH RECURSIVE valores(v) AS (
+            SELECT MIN({dimensao}) FROM {DSA_TABELA_DIARIA}
+            UNION ALL
+            SELECT (SELECT MIN({dimensao}) FROM {DSA_TABELA_DIARIA} WHERE {dimensao} > v) FROM valores WHERE v IS NOT NULL
+        )
+        SELECT v FROM valores WHERE v IS NOT NULL
+        """, []
+
+
+# SQL dos limites de data
+def dsa_sql_min_max_datas():
+
+    # Duas subconsultas separadas: o SQLite só otimiza MIN() e MAX() para uma busca
+    # direta na ponta do índice quando cada um aparece sozinho no SELECT
+    return """
+        SELECT (SELECT MIN(date) FROM tb_vendas), (SELECT MAX(date) FROM tb_vendas)
+        """, []
+
+
+# SQL da versão dos dados
+def dsa_sql_versao():
+
+    # MAX(id) é uma busca direta na ponta da chave primária; tb_controle tem uma única linha
+    return """
+        SELECT (SELECT COALESCE(MAX(id), 0) FROM tb_vendas), (SELECT alteracoes FROM tb_controle WHERE id = 1)
+        """, []
+
+
+# SQL dos KPIs
+def dsa_sql_kpis(filtros):
+
+    where, params = dsa_monta_where(filtros)
+
+    # COALESCE garante 0 (e não NULL) quando o filtro não encontra nenhuma linha.
+    # O número de transações é a soma das contagens pré-agregadas.
+    return f"""
+        SELECT COALESCE(SUM(faturamento), 0), COALESCE(SUM(quantidade), 0), COALESCE(SUM(transacoes), 0)
+        FROM {DSA_TABELA_DIARIA}
+        WHERE {where}
+        """, params
+
+
+# SQL da receita diária
+def dsa_sql_receita_diaria(filtros):
+
+    where, params = dsa_monta_where(filtros)
+
+    return f"""
+        SELECT date, SUM(faturamento) AS faturamento
+        FROM {DSA_TABELA_DIARIA}
+        WHERE {where}
+        GROUP BY date
+        ORDER BY date
+        """, params
+
+
+# SQL dos totais por dia (base das somas acumuladas dos comparativos)
+def dsa_sql_totais_diarios(filtros):
+
+    where, params = dsa_monta_where(filtros)
+
+    return f"""
+        SELECT date, SUM(faturamento) AS faturamento, SUM(quantidade) AS quantidade, SUM(transacoes) AS transacoes
+        FROM {DSA_TABELA_DIARIA}
+        WHERE {where}
+        GROUP BY date
+        ORDER BY date
+        """, params
+
+
+# SQL da receita agrupada por dimensão
+def dsa_sql_receita_por(filtros, dimensao):
+
+    # Só aceita colunas conhecidas, pois o nome da coluna é interpolado no SQL
+    if dimensao not in DSA_DIMENSOES.values():
+        raise ValueError(f"Dimensão inválida: {dimensao}")
+
+    where, params = dsa_monta_where(filtros)
+
+    return f"""
+        SELECT {dimensao}, SUM(faturamento) AS faturamento
+        FROM {DSA_TABELA_DIARIA}
+        WHERE {where}
+        GROUP BY {dimensao}
+        ORDER BY {dimensao}
+        """, params
+
+
+# SQL da receita média por dia da semana
+def dsa_sql_receita_dia_semana(filtros):
+
+    where, params = dsa_monta_where(filtros)
+
+    # 1970-01-01 (dia 0) foi uma quinta-feira; '(date + 3) % 7' dá Segunda=0 ... Domingo=6.
+    # A média por transação é SUM(faturamento) / SUM(transacoes) (média ponderada dos grupos).
+    return f"""
+        SELECT (date + 3) % 7 AS weekday_num, SUM(faturamento) / SUM(transacoes) AS faturamento
+        FROM {DSA_TABELA_DIARIA}
+        WHERE {where}
+        GROUP BY weekday_num
+        ORDER BY weekday_num
+        """, params
+
+
+# SQL da dispersão agregada em faixas (quando há transações demais para um ponto por linha)
+def dsa_sql_dispersao_faixas(filtros, faixas):
+
+    where, params = dsa_monta_where(filtros)
+
+    # A largura das faixas divide o maior faturamento da seleção em 'faixas' partes.
+    # Cada ponto do resultado é uma combinação (quantidade, categoria, faixa de faturamento),
+    # com o faturamento médio e o número de transações que ela representa.
+    # A faixa é o piso da divisão, escrito com ROUND(x + 0.5) - 1 porque o CAST para inteiro
+    # trunca no SQLite mas arredonda em outros motores (ex: DuckDB): assim todos dão o mesmo resultado.
+    return f"""
+        WITH selecao AS (
+            SELECT quantidade, faturamento, categoria FROM tb_vendas WHERE {where}
+        ),
+        largura AS (
+            SELECT COALESCE(MAX(faturamento), 0) / ? + 0.01 AS valor FROM selecao
+        )
+        SELECT s.quantidade, s.categoria, CAST(ROUND(s.faturamento / l.valor + 0.5) AS INTEGER) - 1 AS faixa,
+               AVG(s.faturamento) AS faturamento, COUNT(*) AS transacoes
+        FROM selecao s, largura l
+        GROUP BY s.quantidade, s.categoria, faixa
+        """, params + [int(faixas)]
+
+
+# SQL das visões linha a linha
+def dsa_sql_linhas(filtros, colunas = None, ordenar_por = None, limite = None, id_apos = None, id_ate = None):
+
+    colunas = colunas or DSA_COLUNAS_VENDAS
+
+    # Valida os nomes de coluna antes de interpolá-los no SQL
+    if any(c not in DSA_COLUNAS_VENDAS for c in colunas):
+        raise ValueError(f"Colunas inválidas: {colunas}")
+
+    where, params = dsa_monta_where(filtros)
+
+    # Faixa de ids (usada pelo cache incremental para buscar apenas as linhas novas)
+    if id_apos is not None:
+        where += " AND id > ?"
+        params = params + [int(id_apos)]
+
+    if id_ate is not None:
+        where += " AND id <= ?"
+        params = params + [int(id_ate)]
+
+    sql = f"SELECT {', '.join(colunas)} FROM tb_vendas WHERE {where}"
+
+    if ordenar_por:
+        coluna, _, direcao = ordenar_por.partition(" ")
+        if coluna not in DSA_COLUNAS_VENDAS or direcao.upper() not in ("", "ASC", "DESC"):
+            raise ValueError(f"Ordenação inválida: {ordenar_por}")
+        sql += f" ORDER BY {ordenar_por}"
+
+    if limite is not None:
+        sql += " LIMIT ?"
+        params = params + [int(limite)]
+
+    return sql, params
+
+
+# Colunas aceitas na ordenação da tabela paginada.
+# Cada uma tem um índice que já entrega as linhas na ordem (coluna, id): 'date' no índice
+# de cobertura, 'faturamento' e 'quantidade' nos índices da migração 6.
+DSA_ORDENACOES_PAGINA = ["date", "faturamento", "quantidade"]
+
+# Fração mínima da tabela selecionada para percorrer o índice de ordenação (ver 'dsa_prefere_indice_ordem')
+DSA_FRACAO_INDICE_ORDEM = 0.2
+
+# Varreduras aceitas pela verificação de planos: percorrer um índice de ordenação na ordem do
+# ORDER BY, parando no LIMIT da página (lê algumas dezenas de entradas, não a tabela inteira)
+DSA_VARREDURAS_ORDENADAS = tuple(
+    f"SCAN tb_vendas USING INDEX ix_tb_vendas_{coluna}" for coluna in DSA_ORDENACOES_PAGINA if coluna != "date"
+)
+
+
+# Função que escapa os curingas do LIKE em um texto de busca
+def dsa_escapa_like(texto):
+
+    """Escapa '\\', '%' e '_' para que o texto seja buscado literalmente (com ESCAPE '\\')."""
+
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# SQL de uma página da tabela de transações (paginação por chave, "keyset")
+def dsa_sql_pagina(filtros, ordenar_por = "date", decrescente = False, busca = None, apos = None, tamanho = 50, indice_ordem = False):
+
+    """
+    Em vez de OFFSET (que lê e descarta todas as linhas das páginas anteriores), a página
+    seguinte começa logo depois da última linha vista: WHERE (coluna, id) > (valor, id_visto).
+    O 'id' desempata linhas com o mesmo valor. Custo de cada página: uma busca no índice + 'tamanho' linhas.
+
+    Parâmetros:
+    ordenar_por (str): Uma coluna de DSA_ORDENACOES_PAGINA.
+    decrescente (bool): Ordem decrescente.
+    busca (str): Texto opcional procurado no nome do produto.
+    apos (tuple): (valor, id) da última linha da página anterior; None na primeira página.
+    tamanho (int): Linhas por página. O SQL pede uma linha a mais para saber se há próxima página.
+    indice_ordem (bool): Força o índice de ordenação da coluna (ver 'dsa_prefere_indice_ordem').
+    """
+
+    if ordenar_por not in DSA_ORDENACOES_PAGINA:
+        raise ValueError(f"Ordenação inválida: {ordenar_por}")
+
+    where, params = dsa_monta_where(filtros)
+
+    if busca:
+        where += " AND produto LIKE ? ESCAPE '\\'"
+        params = params + [f"%{dsa_escapa_like(busca)}%"]
+
+    direcao, comparacao = ("DESC", "<") if decrescente else ("ASC", ">")
+
+    if apos is not None:
+        where += f" AND ({ordenar_por}, id) {comparacao} (?, ?)"
+        params = params + list(apos)
+
+    # Sem estatísticas de distribuição, o SQLite prefere o índice de cobertura (filtra e ordena
+    # a seleção inteira); com seleções grandes, percorrer o índice da coluna já na ordem é muito mais barato
+    tabela = f"tb_vendas INDEXED BY ix_tb_vendas_{ordenar_por}" if indice_ordem and ordenar_por != "date" else "tb_vendas"
+
+    return f"""
+        SELECT {', '.join(DSA_COLUNAS_VENDAS)}
+        FROM {tabela}
+        WHERE {where}
+        ORDER BY {ordenar_por} {direcao}, id {direcao}
+        LIMIT ?
+        """, params + [int(tamanho) + 1]
+
+
+# Função que decide se a página deve percorrer o índice de ordenação
+def dsa_prefere_indice_ordem(filtros, dimensoes, fracao, busca = None):
+
+    """
+    Percorrer o índice de 'faturamento' (ou 'quantidade') na ordem do ORDER BY lê poucas entradas
+    quando boa parte da tabela está selecionada. Mas o preço depende do produto: com categorias,
+    produtos ou busca restritos, as linhas do topo do índice podem não pertencer à seleção e a
+    leitura percorreria muitas entradas. Nesses casos a ordenação da seleção é mais barata.
+
+    Parâmetros:
+    filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+    dimensoes (dict): Os valores distintos (ver 'dsa_consulta_dimensoes').
+    fracao (float): Fração da tabela selecionada pelos filtros.
+    busca (str): Texto da busca por produto.
+    """
+
+    completas = all(set(dimensoes[chave]) <= set(filtros[chave]) for chave in ("categorias", "produtos"))
+
+    return completas and not busca and fracao >= DSA_FRACAO_INDICE_ORDEM
+
+
+# SQL do número de transações da tabela paginada (com a busca por produto)
+def dsa_sql_total_pagina(filtros, busca = None):
+
+    where, params = dsa_monta_where(filtros)
+
+    if busca:
+        where += " AND produto LIKE ? ESCAPE '\\'"
+        params = params + [f"%{dsa_escapa_like(busca)}%"]
+
+    # A contagem vem da tabela agregada, que também tem a coluna 'produto'
+    return f"""
+        SELECT COALESCE(SUM(transacoes), 0) FROM {DSA_TABELA_DIARIA} WHERE {where}
+        """, params
+
+
+# SQL da tabela agregada filtrada, no nível de detalhe do dia (dia x região x categoria x produto)
+def dsa_sql_agregado_diario(filtros):
+
+    where, params = dsa_monta_where(filtros)
+
+    return f"""
+        SELECT date, regiao, categoria, produto,
+               SUM(faturamento) AS faturamento, SUM(quantidade) AS quantidade, SUM(transacoes) AS transacoes
+        FROM {DSA_TABELA_DIARIA}
+        WHERE {where}
+        GROUP BY date, regiao, categoria, produto
+        """, params
+
+
+# SQL das combinações distintas de dimensões presentes na seleção
+def dsa_sql_grupos(filtros, grupos):
+
+    if any(c not in DSA_DIMENSOES.values() for c in grupos):
+        raise ValueError(f"Grupos inválidos: {grupos}")
+
+    where, params = dsa_monta_where(filtros)
+
+    return f"""
+        SELECT DISTINCT {', '.join(grupos)} FROM {DSA_TABELA_DIARIA} WHERE {where}
+        """, params
+
+
+# SQL das transações filtradas em ordem decrescente de faturamento
+def dsa_sql_maiores_vendas(filtros):
+
+    where, params = dsa_monta_where(filtros)
+
+    # Percorre o índice de 'faturamento' já na ordem: quem lê pode parar a qualquer momento,
+    # sem que o SQLite precise ordenar a seleção inteira antes de entregar a primeira linha
+    return f"""
+        SELECT {', '.join(DSA_COLUNAS_VENDAS)}
+        FROM tb_vendas INDEXED BY ix_tb_vendas_faturamento
+        WHERE {where}
+        ORDER BY faturamento DESC, id DESC
+        """, params
+
+
+# --- Execução das Consultas ---
+
+# Função que executa uma consulta e retorna um DataFrame
+def dsa_le_sql(conn, sql, params):
+
+    """
+    Executa 'sql' com 'params' na conexão e retorna um DataFrame do Pandas.
+    Conexões do SQLite usam 'pd.read_sql_query'; as de outros motores (ex: DuckDB)
+    entregam o resultado direto em DataFrame com '.execute(...).df()'.
+    """
+
+    if isinstance(conn, sqlite3.Connection):
+        return pd.read_sql_query(sql, conn, params = params)
+
+    return conn.execute(sql, params).df()
+
+
+# Função que lê a versão atual dos dados
+def dsa_consulta_versao(conn):
+
+    """
+    Retorna a "versão" dos dados de vendas: a tupla (maior id, contador de alterações).
+
+    Inserts aumentam o maior id (AUTOINCREMENT nunca reutiliza ids) e UPDATE/DELETE
+    aumentam o contador (gatilhos da migração 5). Se a tupla não mudou, os dados não mudaram.
+    """
+
+    return tuple(conn.execute(*dsa_sql_versao()).fetchone())
+
+
+# Função que lê as opções disponíveis para os filtros
+def dsa_consulta_dimensoes(conn):
+
+    """
+    Consulta os limites de data e os valores distintos de cada dimensão,
+    usados para montar os widgets da sidebar.
+
+    Retorna:
+    (dict): 'min_date', 'max_date' (objetos date) e as listas ordenadas
+            'regioes', 'categorias' e 'produtos'.
+    """
+
+    # MIN/MAX sobre a primeira coluna do índice de cobertura: uma busca em cada ponta do índice
+    min_dia, max_dia = conn.execute(*dsa_sql_min_max_datas()).fetchone()
+
+    dimensoes = {
+        "min_date": dsa_dia_para_data(min_dia),
+        "max_date": dsa_dia_para_data(max_dia),
+    }
+
+    # Valores distintos de cada coluna, já em ordem alfabética (ordem do índice)
+    for chave, coluna in DSA_DIMENSOES.items():
+        rows = conn.execute(*dsa_sql_distintos(coluna)).fetchall()
+        dimensoes[chave] = [r[0] for r in rows]
+
+    return dimensoes
+
+
+# Função que monta o dicionário de KPIs a partir das somas
+def dsa_monta_kpis(total_faturamento, total_qty, transacoes):
+
+    """
+    Monta os KPIs do dashboard a partir de SUM(faturamento), SUM(quantidade) e do número de transações.
+    Usada pela consulta do dashboard e por quem já tem as somas em mãos (ex: relatórios em lote).
+
+    Retorna:
+    (dict): 'total_faturamento', 'total_qty', 'avg_ticket' e 'transacoes'.
+    """
+
+    # Ticket Médio (Faturamento / Quantidade), com proteção contra Divisão por Zero
+    avg_ticket = total_faturamento / total_qty if total_qty > 0 else 0
+
+    return {
+        "total_faturamento": total_faturamento,
+        "total_qty": total_qty,
+        "avg_ticket": avg_ticket,
+        "transacoes": transacoes,
+    }
+
+
+# Função que calcula os KPIs no banco de dados
+def dsa_consulta_kpis(conn, filtros):
+
+    """
+    Calcula os KPIs do dashboard com uma única consulta agregada.
+
+    Retorna:
+    (dict): 'total_faturamento', 'total_qty', 'avg_ticket' e 'transacoes'.
+    """
+
+    return dsa_monta_kpis(*conn.execute(*dsa_sql_kpis(filtros)).fetchone())
+
+
+# Função da receita diária (gráfico de linha)
+def dsa_consulta_receita_diaria(conn, filtros):
+
+    """Retorna um DataFrame com as colunas 'date' e 'faturamento' (soma por dia)."""
+
+    sql, params = dsa_sql_receita_diaria(filtros)
+
+    return dsa_converte_datas(dsa_le_sql(conn, sql, params))
+
+
+# Função da receita agrupada por uma dimensão (gráficos de pizza e de barras)
+def dsa_consulta_receita_por(conn, filtros, dimensao):
+
+    """
+    Retorna a soma do faturamento agrupada por uma dimensão.
+
+    Parâmetros:
+    dimensao (str): 'regiao', 'categoria' ou 'produto'.
+    """
+
+    sql, params = dsa_sql_receita_por(filtros, dimensao)
+
+    return dsa_le_sql(conn, sql, params)
+
+
+# Função da receita média por dia da semana
+def dsa_consulta_receita_dia_semana(conn, filtros):
+
+    """
+    Retorna a receita média por transação para cada dia da semana.
+
+    A coluna 'weekday_num' segue a convenção do Pandas (Segunda=0, Domingo=6).
+    """
+
+    sql, params = dsa_sql_receita_dia_semana(filtros)
+
+    return dsa_le_sql(conn, sql, params)
+
+
+# Função da dispersão agregada em faixas
+def dsa_consulta_dispersao_faixas(conn, filtros, faixas):
+
+    """
+    Retorna a dispersão quantidade x faturamento agregada no SQLite: um ponto por
+    (quantidade, categoria, faixa de faturamento), com o número de transações de cada ponto.
+    O resultado tem no máximo (quantidades x categorias x faixas) linhas, qualquer que seja o volume.
+    """
+
+    sql, params = dsa_sql_dispersao_faixas(filtros, faixas)
+
+    return dsa_le_sql(conn, sql, params)
+
+
+# Função para as visões que precisam de linhas individuais (tabela, dispersão, PDF)
+def dsa_consulta_linhas(conn, filtros, colunas = None, ordenar_por = None, limite = None, id_apos = None, id_ate = None):
+
+    """
+    Retorna as transações que atendem aos filtros.
+
+    Parâmetros:
+    colunas (list): Colunas a projetar (padrão: todas).
+    ordenar_por (str): Coluna de ordenação, opcionalmente seguida de 'DESC'.
+    limite (int): Número máximo de linhas.
+    id_apos, id_ate (int): Restringe às linhas com id_apos < id <= id_ate.
+    """
+
+    sql, params = dsa_sql_linhas(filtros, colunas, ordenar_por, limite, id_apos, id_ate)
+
+    return dsa_converte_datas(dsa_le_sql(conn, sql, params))
+
+
+# Função que lê uma página da tabela de transações
+def dsa_consulta_pagina(conn, filtros, ordenar_por = "date", decrescente = False, busca = None, apos = None, tamanho = 50, indice_ordem = False):
+
+    """
+    Retorna uma página de transações (ver 'dsa_sql_pagina').
+
+    Retorna:
+    (tuple): O DataFrame da página e o cursor (valor, id) da próxima página, ou None se esta for a última.
+    """
+
+    sql, params = dsa_sql_pagina(filtros, ordenar_por, decrescente, busca, apos, tamanho, indice_ordem)
+    df = dsa_le_sql(conn, sql, params)
+
+    proxima = None
+
+    # Veio a linha extra: existe uma próxima página, que começa depois da última linha desta
+    if len(df) > tamanho:
+        df = df.iloc[:tamanho]
+        ultima = df.iloc[-1]
+        proxima = (ultima[ordenar_por].item() if hasattr(ultima[ordenar_por], "item") else ultima[ordenar_por], int(ultima["id"]))
+
+    # O cursor usa o valor gravado no banco (epoch days); só a exibição converte a data
+    return dsa_converte_datas(df), proxima
+
+
+# Função que conta as transações da tabela paginada
+def dsa_consulta_total_pagina(conn, filtros, busca = None):
+
+    """Retorna o número de transações que atendem aos filtros e à busca por produto."""
+
+    sql, params = dsa_sql_total_pagina(filtros, busca)
+
+    return int(conn.execute(sql, params).fetchone()[0])
+
+
+# --- Consultas dos Relatórios em Lote ---
+
+# Função da tabela agregada filtrada (base dos relatórios em lote)
+def dsa_consulta_agregado_diario(conn, filtros):
+
+    """
+    Retorna um DataFrame com 'date', 'regiao', 'categoria', 'produto', 'faturamento',
+    'quantidade' e 'transacoes': as somas de cada dia e combinação das dimensões.
+    KPIs e gráficos de qualquer recorte saem deste DataFrame sem novas consultas.
+    """
+
+    sql, params = dsa_sql_agregado_diario(filtros)
+
+    return dsa_converte_datas(dsa_le_sql(conn, sql, params))
+
+
+# Função das maiores vendas de cada grupo
+def dsa_consulta_maiores_por_grupo(conn, filtros, grupos, limite):
+
+    """
+    Retorna as 'limite' transações de maior faturamento de cada grupo, em uma única leitura.
+
+    O índice de 'faturamento' é percorrido do maior para o menor valor e cada linha vai para o
+    seu grupo; a leitura para assim que todos os grupos estiverem completos. A memória usada é a
+    das linhas guardadas (grupos x limite), não a da seleção.
+
+    Parâmetros:
+    conn (sqlite3.Connection): A conexão com o banco.
+    filtros (dict): O dicionário de filtros (ver 'dsa_monta_where').
+    grupos (list): Colunas que formam o grupo (ex: ["regiao", "categoria"]).
+    limite (int): Transações por grupo.
+
+    Retorna:
+    (pd.DataFrame): As transações (mesmas colunas de 'dsa_consulta_linhas'), por faturamento decrescente.
+    """
+
+    posicoes = [DSA_COLUNAS_VENDAS.index(c) for c in grupos]
+
+    # Grupos existentes na seleção (a tabela agregada responde sem ler as transações)
+    faltam = {tuple(linha) for linha in conn.execute(*dsa_sql_grupos(filtros, grupos))}
+
+    contagem = dict.fromkeys(faltam, 0)
+    linhas = []
+
+    for linha in conn.execute(*dsa_sql_maiores_vendas(filtros)):
+
+        if not faltam:
+            break
+
+        grupo = tuple(linha[i] for i in posicoes)
+
+        if contagem[grupo] < limite:
+
+            linhas.append(linha)
+            contagem[grupo] += 1
+
+            if contagem[grupo] == limite:
+                faltam.discard(grupo)
+
+    return dsa_converte_datas(pd.DataFrame(linhas, columns = DSA_COLUNAS_VENDAS))
+
+
+# --- Verificação dos Planos de Consulta ---
+
+# Função que lista todas as consultas que o dashboard executa
+def dsa_consultas_dashboard(filtros):
+
+    """Retorna um dicionário {nome: (sql, params)} com as consultas do dashboard."""
+
+    consultas = {
+        "min_max_datas": dsa_sql_min_max_datas(),
+        "versao": dsa_sql_versao(),
+        "kpis": dsa_sql_kpis(filtros),
+        "receita_diaria": dsa_sql_receita_diaria(filtros),
+        "totais_diarios": dsa_sql_totais_diarios(filtros),
+        "receita_dia_semana": dsa_sql_receita_dia_semana(filtros),
+        "linhas": dsa_sql_linhas(filtros),
+        "linhas_dispersao": dsa_sql_linhas(filtros, ["quantidade", "faturamento", "categoria", "produto"]),
+        "dispersao_faixas": dsa_sql_dispersao_faixas(filtros, 60),
+        "top_15": dsa_sql_linhas(filtros, ordenar_por = "faturamento DESC", limite = 15),
+        "linhas_novas": dsa_sql_linhas(filtros, id_apos = 0, id_ate = 0),
+        "total_pagina": dsa_sql_total_pagina(filtros, busca = "a"),
+    }
+
+    for coluna in DSA_ORDENACOES_PAGINA:
+        consultas[f"pagina_{coluna}"] = dsa_sql_pagina(filtros, coluna, busca = "a")
+        consultas[f"pagina_{coluna}_seguinte"] = dsa_sql_pagina(filtros, coluna, decrescente = True, apos = (0, 0))
+        consultas[f"pagina_{coluna}_indice"] = dsa_sql_pagina(filtros, coluna, indice_ordem = True)
+
+    for dimensao in DSA_DIMENSOES.values():
+        consultas[f"distintos_{dimensao}"] = dsa_sql_distintos(dimensao)
+        consultas[f"receita_por_{dimensao}"] = dsa_sql_receita_por(filtros, dimensao)
+
+    return consultas
+
+
+# Função que confere o plano de execução de cada consulta
+def dsa_verifica_planos(conn, filtros):
+
+    """
+    Executa 'EXPLAIN QUERY PLAN' em todas as consultas do dashboard.
+
+    Retorna:
+    (list): Tuplas (nome da consulta, linha do plano) para cada consulta que faz
+            um SCAN (varredura completa) em 'tb_vendas' ou 'tb_vendas_diario'. Lista vazia = tudo certo.
+            Os índices de ordenação da tabela paginada (DSA_VARREDURAS_ORDENADAS) são aceitos.
+    """
+
+    falhas = []
+
+    for nome, (sql, params) in dsa_consultas_dashboard(filtros).items():
+
+        # Cada linha do plano é (id, parent, notused, detail); 'detail' descreve o acesso.
+        # 'SEARCH tb_vendas USING ... INDEX' é uma busca no índice; 'SCAN tb_vendas' percorre tudo.
+        # O prefixo 'SCAN tb_vendas' também cobre a tabela agregada ('SCAN tb_vendas_diario').
+        for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall():
+            if linha[3].startswith("SCAN tb_vendas") and not linha[3].startswith(DSA_VARREDURAS_ORDENADAS):
+                falhas.append((nome, linha[3]))
+
+    return falhas
+
+
+# Permite rodar a verificação pelo terminal: python dsa_consultas.py [caminho_do_banco]
+# O código de saída é 1 se alguma consulta varrer a tabela (útil em pipelines de CI).
+if __name__ == "__main__":
+
+    conn = dsa_cria_conexao(sys.argv[1] if len(sys.argv) > 1 else "dsa_database.db")
+    dsa_init_db(conn)
+
+    # Verifica com todos os valores selecionados (padrão da sidebar) e com uma seleção estreita
+    dimensoes = dsa_consulta_dimensoes(conn)
+    filtros_completos = {"data_inicio": dimensoes["min_date"], "data_fim": dimensoes["max_date"]}
+    filtros_completos.update({chave: dimensoes[chave] for chave in DSA_DIMENSOES})
+    filtros_estreitos = {"data_inicio": dimensoes["max_date"], "data_fim": dimensoes["max_date"]}
+    filtros_estreitos.update({chave: dimensoes[chave][:1] for chave in DSA_DIMENSOES})
+
+    falhas = dsa_verifica_planos(conn, filtros_completos) + dsa_verifica_planos(conn, filtros_estreitos)
+    conn.close()
+
+    for nome, detalhe in falhas:
+        print(f"FALHA: consulta '{nome}' -> {detalhe}")
+
+    print("Nenhuma consulta do dashboard varre as tabelas de vendas." if not falhas else f"{len(falhas)} varredura(s) encontrada(s).")
+    sys.exit(1 if falhas else 0)
@@ -0,0 +1,258 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de exportação das transações filtradas (CSV, CSV compactado e Parquet).
+# As linhas são lidas do SQLite em blocos e gravadas bloco a bloco no destino:
+# o pico de memória é o de um bloco, qualquer que seja o número de linhas exportadas.
+# Os arquivos prontos podem ser servidos direto do disco por um servidor de downloads local
+# (ver 'dsa_cria_servidor_downloads'), lidos e enviados em pedaços, sem passar pela memória do Streamlit.
+
+# Para ler os parâmetros da linha de comando
+import argparse
+
+# Para a compressão gzip
+import gzip
+
+# Para a pasta de downloads
+import os
+
+# Para medir o tempo da exportação e a validade dos downloads
+import time
+
+# Para o nome dos arquivos de download (um token aleatório, que é o próprio endereço do download)
+import uuid
+
+# Para o servidor HTTP dos downloads
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Para o endereço e o nome do arquivo no cabeçalho do download
+from urllib.parse import parse_qs, quote, urlsplit
+
+# Importa módulos de data e hora
+from datetime import date
+
+# Importa o Pandas para ler o SQLite em blocos
+import pandas as pd
+
+# Importa o gravador de Parquet do PyArrow
+import pyarrow.parquet as pq
+
+# Importa a montagem do SQL e a conversão de datas
+from dsa_consultas import dsa_consulta_dimensoes, dsa_consulta_versao, dsa_converte_datas, dsa_sql_linhas
+
+# Importa a leitura em blocos no formato do Arrow (para o Parquet)
+from dsa_parquet import DSA_ESQUEMA_PARQUET, dsa_le_blocos_arrow
+
+
+# Linhas lidas do SQLite por bloco
+DSA_LINHAS_POR_BLOCO = 100_000
+
+# Pedaço (bytes) lido do disco e enviado por vez pelo servidor de downloads
+DSA_PEDACO_DOWNLOAD = 1024**2
+
+# Tempo (segundos) que um arquivo exportado fica disponível para download
+DSA_VALIDADE_DOWNLOAD = 3600
+
+# Formatos de exportação: rótulo -> (formato, compressão, extensão, tipo MIME)
+DSA_FORMATOS_EXPORTACAO = {
+    "CSV": ("csv", None, ".csv", "text/csv"),
+    "CSV (gzip)": ("csv", "gzip", ".csv.gz", "application/gzip"),
+    "CSV (zstd)": ("csv", "zstd", ".csv.zst", "application/zstd"),
+    "Parquet": ("parquet", None, ".parquet", "application/vnd.apache.parquet"),
+}
+
+
+# Função geradora dos blocos de CSV
+def dsa_gera_csv(conn, filtros, id_ate = None):
+
+    """
+    Gera o CSV das transações filtradas em pedaços de bytes (UTF-8), um por bloco lido do banco.
+    O primeiro pedaço traz o cabeçalho. As datas saem como AAAA-MM-DD, como no CSV original.
+
+    Parâmetros:
+    conn (sqlite3.Connection): A conexão com o banco.
+    filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+    id_ate (int): Limite opcional de 'id' (para exportar uma versão estável dos dados).
+    """
+
+    sql, params = dsa_sql_linhas(filtros, id_ate = id_ate)
+
+    cabecalho = True
+
+    for bloco in pd.read_sql_query(sql, conn, params = params, chunksize = DSA_LINHAS_POR_BLOCO):
+
+        yield dsa_converte_datas(bloco).to_csv(index = False, header = cabecalho).encode("utf-8")
+        cabecalho = False
+
+    # Nenhuma linha: o arquivo ainda recebe o cabeçalho
+    if cabecalho:
+        yield ",".join(DSA_ESQUEMA_PARQUET.names).encode("utf-8") + b"\n"
+
+
+# Função que abre o destino com a compressão escolhida
+def dsa_abre_compressor(arquivo, compressao):
+
+    """Retorna um objeto de escrita que compacta (gzip ou zstd) os bytes gravados em 'arquivo'."""
+
+    if compressao is None:
+        return None
+
+    if compressao == "gzip":
+        return gzip.GzipFile(fileobj = arquivo, mode = "wb", compresslevel = 6)
+
+    if compressao == "zstd":
+
+        # Dependência opcional: só é necessária para exportar em zstd
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("A compressão zstd requer o pacote 'zstandard' (pip install zstandard).")
+
+        return zstandard.ZstdCompressor(level = 3).stream_writer(arquivo, closefd = False)
+
+    raise ValueError(f"Compressão inválida: {compressao}")
+
+
+# Função que exporta as transações filtradas para um arquivo
+def dsa_exporta(conn, filtros, arquivo, formato = "csv", compressao = None):
+
+    """
+    Grava as transações filtradas em 'arquivo', bloco a bloco.
+
+    Parâmetros:
+    conn (sqlite3.Connection): A conexão com o banco.
+    filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+    arquivo (file): Arquivo binário aberto para escrita (ex: tempfile.TemporaryFile()).
+    formato (str): "csv" ou "parquet".
+    compressao (str): None, "gzip" ou "zstd" (apenas CSV; o Parquet já é compactado por coluna).
+
+    Retorna:
+    (int): O número de bytes gravados em 'arquivo'.
+    """
+
+    # Exporta até o maior id atual: vendas gravadas durante a exportação ficam de fora
+    max_id = dsa_consulta_versao(conn)[0]
+
+    inicio = arquivo.tell()
+
+    if formato == "csv":
+
+        compressor = dsa_abre_compressor(arquivo, compressao)
+        destino = compressor or arquivo
+
+        for pedaco in dsa_gera_csv(conn, filtros, id_ate = max_id):
+            destino.write(pedaco)
+
+        if compressor is not None:
+            compressor.close()
+
+    elif formato == "parquet":
+
+        with pq.ParquetWriter(arquivo, DSA_ESQUEMA_PARQUET, compression = "zstd") as gravador:
+            for tabela in dsa_le_blocos_arrow(conn, id_ate = max_id, filtros = filtros, linhas_por_bloco = DSA_LINHAS_POR_BLOCO):
+                gravador.write_table(tabela)
+
+    else:
+        raise ValueError(f"Formato inválido: {formato}")
+
+    return arquivo.tell() - inicio
+
+
+# Função que reserva um arquivo na pasta de downloads
+def dsa_novo_download(pasta, extensao, validade = DSA_VALIDADE_DOWNLOAD):
+
+    """
+    Remove os arquivos vencidos (mais antigos que 'validade' segundos) e retorna o nome de um
+    arquivo novo, com um token aleatório (quem não recebeu o endereço não consegue adivinhá-lo).
+    """
+
+    agora = time.time()
+
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        try:
+            if agora - os.path.getmtime(caminho) > validade:
+                os.remove(caminho)
+        except OSError:
+            pass
+
+    return f"{uuid.uuid4().hex}{extensao}"
+
+
+# Função que cria o servidor HTTP dos downloads
+def dsa_cria_servidor_downloads(pasta, porta = 9109, host = "127.0.0.1"):
+
+    """
+    Cria (sem iniciar) um servidor HTTP que entrega os arquivos de 'pasta' (GET /<nome>?nome=<arquivo>),
+    lidos do disco em pedaços de DSA_PEDACO_DOWNLOAD bytes: a memória não cresce com o tamanho do arquivo.
+    Só atende nomes de arquivos da própria pasta. Por padrão só atende conexões locais (host 127.0.0.1).
+    """
+
+    class DsaManipulador(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            endereco = urlsplit(self.path)
+            nome = endereco.path.lstrip("/")
+
+            # Só arquivos da pasta (sem subpastas nem '..')
+            caminho = os.path.join(pasta, nome)
+            if not nome or os.path.basename(nome) != nome or not os.path.isfile(caminho):
+                self.send_error(404)
+                return
+
+            # Nome sugerido para o arquivo baixado (parâmetro 'nome'; padrão: o próprio token)
+            sugerido = parse_qs(endereco.query).get("nome", [nome])[0]
+
+            with open(caminho, "rb") as arquivo:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(os.fstat(arquivo.fileno()).st_size))
+                self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(sugerido)}")
+                self.end_headers()
+                while pedaco := arquivo.read(DSA_PEDACO_DOWNLOAD):
+                    self.wfile.write(pedaco)
+
+        # Sem o log de cada requisição no terminal
+        def log_message(self, formato, *args):
+            pass
+
+    return ThreadingHTTPServer((host, porta), DsaManipulador)
+
+
+# Permite exportar pelo terminal, por exemplo (todas as transações do 1º trimestre em CSV gzip):
+# python dsa_exportacao.py --db dsa_database.db --inicio 2026-01-01 --fim 2026-03-31 --saida vendas.csv.gz
+if __name__ == "__main__":
+
+    from dsa_banco import dsa_cria_conexao, dsa_init_db
+
+    parser = argparse.ArgumentParser(description = "Exporta as transações de tb_vendas em blocos.")
+    parser.add_argument("--db", default = "dsa_database.db", help = "Arquivo SQLite de origem")
+    parser.add_argument("--inicio", type = date.fromisoformat, help = "Primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--fim", type = date.fromisoformat, help = "Último dia (AAAA-MM-DD)")
+    parser.add_argument("--formato", choices = list(DSA_FORMATOS_EXPORTACAO), default = "CSV (gzip)")
+    parser.add_argument("--saida", required = True, help = "Arquivo de destino")
+    args = parser.parse_args()
+
+    conn = dsa_cria_conexao(args.db)
+    dsa_init_db(conn)
+
+    # Sem filtros de dimensão: exporta todas as regiões, categorias e produtos do período
+    dimensoes = dsa_consulta_dimensoes(conn)
+    filtros = {
+        "data_inicio": args.inicio or dimensoes["min_date"],
+        "data_fim": args.fim or dimensoes["max_date"],
+        "regioes": dimensoes["regioes"],
+        "categorias": dimensoes["categorias"],
+        "produtos": dimensoes["produtos"],
+    }
+
+    formato, compressao, _, _ = DSA_FORMATOS_EXPORTACAO[args.formato]
+
+    inicio = time.perf_counter()
+
+    with open(args.saida, "wb") as arquivo:
+        tamanho = dsa_exporta(conn, filtros, arquivo, formato = formato, compressao = compressao)
+
+    conn.close()
+
+    print(f"{tamanho / 1024**2:,.1f} MB gravados em '{args.saida}' em {time.perf_counter() - inicio:.1f}s")
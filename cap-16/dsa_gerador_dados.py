@@ -0,0 +1,212 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo gerador de dados fictícios para a tabela 'tb_vendas'.
+# Gera as vendas em lotes vetorizados com NumPy (sem loops por linha), o que permite
+# criar milhões de linhas em segundos para testes de carga e planejamento de capacidade.
+
+# Para ler os parâmetros da linha de comando
+import argparse
+
+# Para medir o tempo da carga
+import time
+
+# Para as operações vetorizadas e a geração de números aleatórios
+import numpy as np
+
+# Importa módulos de data e hora
+from datetime import date
+
+
+# --- Catálogo de Dimensões ---
+
+# Regiões de venda
+DSA_REGIOES = ["Norte", "Nordeste", "Sul", "Sudeste", "Centro-Oeste"]
+
+# Dicionário aninhado para mapear produtos e seus preços base por categoria
+# Isso é crucial para criar a correlação positiva entre quantidade e faturamento
+DSA_PRODUTOS = {
+    "Eletrônicos": {"Smartphone": 1200, "Laptop": 3500, "Tablet": 800},
+    "Roupas": {"Camiseta": 50, "Terno": 150, "Casaco": 300},
+    "Alimentos": {"Congelados": 40, "Bebidas": 15, "Limpeza": 25},
+    "Serviços": {"Consultoria": 1000, "Instalação": 400, "Suporte": 200}
+}
+
+# Número de linhas geradas por lote.
+# É fixo (e não um parâmetro) porque cada lote usa um gerador aleatório próprio,
+# derivado da semente e do número do lote: com a mesma semente e os mesmos parâmetros,
+# os dados gerados são sempre os mesmos.
+DSA_LINHAS_POR_LOTE = 200_000
+
+
+# Função que normaliza um dicionário de pesos em probabilidades
+def dsa_probabilidades(nomes, pesos = None):
+
+    """
+    Converte um dicionário {nome: peso} em um vetor de probabilidades na ordem de 'nomes'.
+    Sem pesos, a distribuição é uniforme. Nomes ausentes do dicionário recebem peso 0.
+    """
+
+    if not pesos:
+        return np.full(len(nomes), 1 / len(nomes))
+
+    desconhecidos = set(pesos) - set(nomes)
+    if desconhecidos:
+        raise ValueError(f"Nomes desconhecidos na distribuição: {sorted(desconhecidos)}")
+
+    p = np.array([float(pesos.get(n, 0)) for n in nomes])
+
+    if (p < 0).any() or p.sum() <= 0:
+        raise ValueError("Os pesos devem ser não negativos e somar um valor positivo.")
+
+    return p / p.sum()
+
+
+# Função geradora dos lotes de vendas
+def dsa_gera_lotes(dias = 180,
+                   vendas_min = 5,
+                   vendas_max = 14,
+                   data_inicio = date(2026, 1, 1),
+                   pesos_regioes = None,
+                   pesos_produtos = None,
+                   seed = 42):
+
+    """
+    Gera vendas fictícias em lotes, prontos para o 'executemany' do SQLite.
+
+    Parâmetros:
+    dias (int): Quantidade de dias consecutivos a partir de 'data_inicio'.
+    vendas_min, vendas_max (int): Intervalo (inclusivo) de vendas por dia.
+    data_inicio (date): Primeiro dia dos dados.
+    pesos_regioes (dict): Distribuição das regiões, ex: {"Sudeste": 4, "Norte": 1}. Padrão: uniforme.
+    pesos_produtos (dict): Distribuição dos produtos. Padrão: categoria uniforme e,
+                           dentro dela, produto uniforme (o mesmo modelo do seed original).
+    seed (int): Semente para tornar os dados reprodutíveis.
+
+    Gera (yield):
+    (list): Lotes de até DSA_LINHAS_POR_LOTE tuplas (date, regiao, categoria, produto, faturamento, quantidade),
+            com 'date' em epoch days.
+    """
+
+    if vendas_min < 0 or vendas_max < vendas_min:
+        raise ValueError("Intervalo de vendas por dia inválido.")
+
+    # --- 1. Tabelas de consulta (lookup) do catálogo ---
+
+    # Vetores "planos" com um item por produto: nome, categoria e preço base
+    produtos = [p for itens in DSA_PRODUTOS.values() for p in itens]
+    categorias_do_produto = np.array([c for c, itens in DSA_PRODUTOS.items() for _ in itens], dtype = object)
+    precos = np.array([preco for itens in DSA_PRODUTOS.values() for preco in itens.values()], dtype = np.float64)
+    nomes_produtos = np.array(produtos, dtype = object)
+    nomes_regioes = np.array(DSA_REGIOES, dtype = object)
+
+    # Probabilidades de cada região e de cada produto
+    p_regioes = dsa_probabilidades(DSA_REGIOES, pesos_regioes)
+
+    if pesos_produtos:
+        p_produtos = dsa_probabilidades(produtos, pesos_produtos)
+    else:
+        # P(produto) = P(categoria) * P(produto | categoria), ambas uniformes
+        p_produtos = np.array([1 / len(DSA_PRODUTOS) / len(itens) for itens in DSA_PRODUTOS.values() for _ in itens])
+
+    # --- 2. Quantidade de vendas de cada dia ---
+
+    # Gerador exclusivo para as contagens diárias (não depende do tamanho dos lotes)
+    rng_dias = np.random.default_rng([seed, 0])
+    vendas_por_dia = rng_dias.integers(vendas_min, vendas_max + 1, size = dias)
+
+    # Soma acumulada: a venda de número global 'i' pertence ao dia 'searchsorted(acumulado, i)'
+    acumulado = np.cumsum(vendas_por_dia)
+    total = int(acumulado[-1]) if dias > 0 else 0
+
+    # Epoch day do primeiro dia (datetime64[D] convertido para inteiro = dias desde 1970-01-01)
+    dia_inicial = int(np.datetime64(data_inicio, "D").astype(np.int64))
+
+    # --- 3. Geração vetorizada, lote a lote ---
+
+    for numero_lote, inicio in enumerate(range(0, total, DSA_LINHAS_POR_LOTE)):
+
+        fim = min(inicio + DSA_LINHAS_POR_LOTE, total)
+        n = fim - inicio
+
+        # Gerador aleatório próprio do lote (semente + número do lote)
+        rng = np.random.default_rng([seed, 1, numero_lote])
+
+        # Dia de cada venda do lote
+        dias_lote = dia_inicial + np.searchsorted(acumulado, np.arange(inicio, fim), side = "right")
+
+        # Sorteia todos os atributos do lote de uma vez (um vetor por coluna)
+        idx_regiao = rng.choice(len(DSA_REGIOES), size = n, p = p_regioes)
+        idx_produto = rng.choice(len(produtos), size = n, p = p_produtos)
+        quantidade = rng.integers(1, 25, size = n)
+
+        # Faturamento = preço base * quantidade, com "ruído" de +/- 20% e nunca negativo
+        ruido = rng.uniform(-0.20, 0.20, size = n)
+        faturamento = np.round(np.maximum(0, precos[idx_produto] * quantidade * (1 + ruido)), 2)
+
+        # Monta as tuplas na ordem das colunas do INSERT.
+        # '.tolist()' converte cada vetor para tipos nativos do Python de uma só vez.
+        yield list(zip(
+            dias_lote.tolist(),
+            nomes_regioes[idx_regiao].tolist(),
+            categorias_do_produto[idx_produto].tolist(),
+            nomes_produtos[idx_produto].tolist(),
+            faturamento.tolist(),
+            quantidade.tolist(),
+        ))
+
+
+# Função que converte "Nome=peso,Nome=peso" (linha de comando) em dicionário
+def dsa_le_pesos(texto):
+
+    """Converte o texto 'Sudeste=4,Sul=2' no dicionário {'Sudeste': 4.0, 'Sul': 2.0}."""
+
+    if not texto:
+        return None
+
+    pesos = {}
+    for item in texto.split(","):
+        nome, _, peso = item.partition("=")
+        pesos[nome.strip()] = float(peso)
+
+    return pesos
+
+
+# Permite gerar uma base de teste pelo terminal, por exemplo (10 milhões de linhas):
+# python dsa_gerador_dados.py --db dsa_carga.db --dias 1000 --vendas-min 9000 --vendas-max 11000
+if __name__ == "__main__":
+
+    # Importado aqui porque dsa_banco.py também importa este módulo (para o seed inicial)
+    from dsa_banco import dsa_carrega_lotes, dsa_cria_conexao, dsa_migra_banco
+
+    parser = argparse.ArgumentParser(description = "Gera vendas fictícias em massa na tabela tb_vendas.")
+    parser.add_argument("--db", default = "dsa_database.db", help = "Arquivo SQLite de destino")
+    parser.add_argument("--dias", type = int, default = 180, help = "Quantidade de dias")
+    parser.add_argument("--vendas-min", type = int, default = 5, help = "Mínimo de vendas por dia")
+    parser.add_argument("--vendas-max", type = int, default = 14, help = "Máximo de vendas por dia")
+    parser.add_argument("--inicio", type = date.fromisoformat, default = date(2026, 1, 1), help = "Primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--pesos-regioes", help = "Distribuição das regiões, ex: Sudeste=4,Sul=2,Norte=1")
+    parser.add_argument("--pesos-produtos", help = "Distribuição dos produtos, ex: Laptop=1,Camiseta=5")
+    parser.add_argument("--seed", type = int, default = 42, help = "Semente aleatória")
+    args = parser.parse_args()
+
+    conn = dsa_cria_conexao(args.db)
+
+    # Garante o esquema atual (tabelas, índices e gatilhos) sem popular a tabela
+    dsa_migra_banco(conn)
+
+    inicio = time.perf_counter()
+
+    total = dsa_carrega_lotes(conn, dsa_gera_lotes(
+        dias = args.dias,
+        vendas_min = args.vendas_min,
+        vendas_max = args.vendas_max,
+        data_inicio = args.inicio,
+        pesos_regioes = dsa_le_pesos(args.pesos_regioes),
+        pesos_produtos = dsa_le_pesos(args.pesos_produtos),
+        seed = args.seed,
+    ))
+
+    duracao = time.perf_counter() - inicio
+    conn.close()
+
+    print(f"{total:,} linhas gravadas em {duracao:.1f}s ({total / max(duracao, 1e-9) * 60:,.0f} linhas/minuto)")
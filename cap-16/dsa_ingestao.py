@@ -0,0 +1,601 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de ingestão contínua de vendas em 'tb_vendas'.
+# Aceita registros de arquivos (JSON lines ou CSV), de JSON lines na entrada padrão ou de um
+# endpoint HTTP local. Os registros são validados e enfileirados; uma única thread escritora,
+# com a sua própria conexão, agrupa-os em transações grandes ('executemany').
+# A fila tem tamanho máximo: quando o escritor fica para trás, quem envia espera (arquivos e stdin)
+# ou recebe HTTP 503 (endpoint), em vez de a memória crescer sem limite.
+
+# Para ler os parâmetros da linha de comando
+import argparse
+
+# Para ler arquivos CSV
+import csv
+
+# Para ler e responder JSON
+import json
+
+# Para validar os valores numéricos (NaN e infinito)
+import math
+
+# Para a fila entre os produtores e o escritor
+import queue
+
+# Para a entrada padrão
+import sys
+
+# Para a thread escritora e a proteção das métricas
+import threading
+
+# Para medir a latência dos commits e as taxas
+import time
+
+# Para guardar as últimas latências
+from collections import deque
+
+# Importa módulos de data e hora
+from datetime import date
+
+# Importa o servidor HTTP da biblioteca padrão
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Importa a conexão, o INSERT e a conversão de datas
+from dsa_banco import DSA_SQL_INSERE_VENDA, dsa_cria_conexao, dsa_data_para_dia, dsa_dia_para_data, dsa_init_db
+
+
+# Linhas por transação do escritor
+DSA_LINHAS_POR_LOTE_INGESTAO = 5_000
+
+# Tempo máximo (segundos) que um lote incompleto espera por mais linhas antes do commit
+DSA_ESPERA_LOTE = 0.5
+
+# Máximo de envios aguardando na fila (cada chamada de 'envia' ocupa uma posição)
+DSA_MAX_ITENS_FILA = 20
+
+# Tamanho máximo do corpo de um POST no endpoint HTTP (bytes)
+DSA_MAX_CORPO_HTTP = 16 * 1024**2
+
+# Tamanho máximo de texto das dimensões
+DSA_MAX_TEXTO = 100
+
+# Latências de commit guardadas para as métricas (as mais recentes)
+DSA_JANELA_LATENCIAS = 1_000
+
+# Espera máxima (ms) do escritor por um banco travado por outro escritor (ex: uma carga em massa)
+DSA_BUSY_TIMEOUT_ESCRITOR_MS = 30_000
+
+# Tentativas de gravar um lote antes de desviá-lo para o arquivo de pendentes, e a espera entre elas
+# (dobra a cada tentativa, até o máximo)
+DSA_TENTATIVAS_LOTE = 5
+DSA_ESPERA_RETENTATIVA = 1.0
+DSA_ESPERA_RETENTATIVA_MAX = 30.0
+
+# Intervalo (segundos) em que quem espera por espaço na fila confere se o escritor continua ativo
+DSA_INTERVALO_VERIFICA_ESCRITOR = 1.0
+
+
+# Função que valida um registro de venda
+def dsa_valida_registro(registro):
+
+    """
+    Valida um registro (dicionário) e o converte na tupla gravada em 'tb_vendas'.
+
+    Campos: 'date' (AAAA-MM-DD), 'regiao', 'categoria', 'produto' (textos não vazios),
+    'faturamento' (número >= 0) e 'quantidade' (inteiro > 0). Campos extras (ex: 'id') são ignorados.
+
+    Retorna:
+    (tuple): (date em epoch days, regiao, categoria, produto, faturamento, quantidade).
+    Lança ValueError com a descrição do problema se o registro for inválido.
+    """
+
+    if not isinstance(registro, dict):
+        raise ValueError("o registro deve ser um objeto JSON")
+
+    # Linha que nem chegou a ser lida como JSON (ver 'dsa_le_jsonl')
+    if "_erro" in registro:
+        raise ValueError(registro["_erro"])
+
+    try:
+        dia = registro["date"]
+        dia = dia if isinstance(dia, date) else date.fromisoformat(str(dia)[:10])
+    except KeyError:
+        raise ValueError("campo 'date' ausente")
+    except ValueError:
+        raise ValueError(f"data inválida: {registro['date']!r}")
+
+    textos = []
+    for campo in ("regiao", "categoria", "produto"):
+        valor = registro.get(campo)
+        if not isinstance(valor, str) or not valor.strip() or len(valor) > DSA_MAX_TEXTO:
+            raise ValueError(f"campo '{campo}' deve ser um texto de 1 a {DSA_MAX_TEXTO} caracteres")
+        textos.append(valor.strip())
+
+    # JSON true/false viraria 1/0 na conversão abaixo (bool é subclasse de int no Python)
+    for campo in ("faturamento", "quantidade"):
+        if isinstance(registro.get(campo), bool):
+            raise ValueError(f"'{campo}' deve ser um número, não {str(registro[campo]).lower()}")
+
+    try:
+        faturamento = float(registro["faturamento"])
+        quantidade_bruta = registro["quantidade"]
+        quantidade = int(float(quantidade_bruta))
+    except KeyError as erro:
+        raise ValueError(f"campo {erro} ausente")
+    except (TypeError, ValueError):
+        raise ValueError("'faturamento' e 'quantidade' devem ser números")
+
+    if not math.isfinite(faturamento) or faturamento < 0:
+        raise ValueError(f"faturamento inválido: {faturamento}")
+
+    if quantidade <= 0 or quantidade != float(quantidade_bruta):
+        raise ValueError(f"quantidade inválida: {quantidade_bruta}")
+
+    return (dsa_data_para_dia(dia), *textos, round(faturamento, 2), quantidade)
+
+
+# Classe do ingestor
+class DsaIngestor:
+
+    """
+    Recebe registros de vendas de várias fontes e os grava com um único escritor.
+
+    - 'envia' valida os registros e coloca os válidos na fila (um item por chamada), devolvendo os rejeitados.
+    - A thread escritora junta os itens em lotes de até 'linhas_por_lote' linhas e grava cada lote
+      em uma transação ('executemany'); um lote incompleto é gravado após 'espera_lote' segundos.
+    - A fila guarda no máximo 'max_itens' itens: com a fila cheia, 'envia' espera até 'timeout'
+      segundos e então lança queue.Full (contrapressão).
+    - Um registro aceito nunca é descartado: se o commit falha (ex: banco travado), o escritor tenta
+      de novo o mesmo lote com espera crescente, sem tirar nada da fila (que enche e aciona a
+      contrapressão). Depois de 'tentativas' falhas, o lote vai para 'arquivo_pendentes' (JSON lines,
+      que pode ser reenviado com este mesmo módulo). Se nem o arquivo puder ser gravado (ex: disco cheio),
+      as linhas são contadas como perdidas e o erro fica em 'ultimo_erro'; o escritor continua.
+    - Se a thread escritora parar, 'envia' e 'encerra' não ficam esperando por espaço na fila:
+      'envia' lança RuntimeError.
+    - Os gatilhos da migração 3 mantêm a tabela agregada em dia a cada lote, então a app vê as novas
+      vendas assim que a versão dos dados muda (ver 'dsa_consulta_versao').
+    """
+
+    # Construtor da classe
+    def __init__(self, db_path, linhas_por_lote = DSA_LINHAS_POR_LOTE_INGESTAO, espera_lote = DSA_ESPERA_LOTE, max_itens = DSA_MAX_ITENS_FILA,
+                 tentativas = DSA_TENTATIVAS_LOTE, espera_retentativa = DSA_ESPERA_RETENTATIVA, arquivo_pendentes = None):
+
+        self.db_path = db_path
+        self.linhas_por_lote = linhas_por_lote
+        self.espera_lote = espera_lote
+        self.tentativas = tentativas
+        self.espera_retentativa = espera_retentativa
+        self.arquivo_pendentes = arquivo_pendentes or f"{db_path}.pendentes.jsonl"
+
+        self._fila = queue.Queue(maxsize = max_itens)
+
+        # Métricas (protegidas por uma trava: produtores e escritor atualizam ao mesmo tempo)
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self._recebidas = 0
+        self._rejeitadas = 0
+        self._gravadas = 0
+        self._lotes = 0
+        self._falhas = 0
+        self._pendentes = 0
+        self._perdidas = 0
+        self._latencias = deque(maxlen = DSA_JANELA_LATENCIAS)
+        self._ultimo_erro = None
+
+        # Thread escritora: a única que escreve no banco
+        self._escritor = threading.Thread(target = self._escreve, name = "dsa-ingestao-escritor", daemon = True)
+        self._escritor.start()
+
+    # Método que valida e enfileira registros
+    def envia(self, registros, timeout = None):
+
+        """
+        Valida e enfileira registros.
+
+        Parâmetros:
+        registros (iterable): Dicionários de vendas (ver 'dsa_valida_registro').
+        timeout (float): Espera máxima por espaço na fila (None = espera o quanto for preciso).
+
+        Retorna:
+        (tuple): (número de registros aceitos, lista de (posição, erro) dos rejeitados).
+        Lança queue.Full se a fila continuar cheia após 'timeout' segundos (nada é enfileirado)
+        e RuntimeError se a thread escritora tiver parado.
+        """
+
+        validos, rejeitados = [], []
+
+        for posicao, registro in enumerate(registros):
+            try:
+                validos.append(dsa_valida_registro(registro))
+            except ValueError as erro:
+                rejeitados.append((posicao, str(erro)))
+
+        # Um único item na fila: ou todos os válidos entram, ou nenhum (com a fila cheia, queue.Full).
+        # Assim quem recebe o erro pode reenviar o mesmo conteúdo sem duplicar vendas.
+        if validos:
+            self._enfileira(validos, timeout)
+
+        aceitos = len(validos)
+
+        with self._lock:
+            self._recebidas += aceitos + len(rejeitados)
+            self._rejeitadas += len(rejeitados)
+
+        return aceitos, rejeitados
+
+    # Método que coloca um item na fila, conferindo se o escritor continua ativo enquanto espera
+    def _enfileira(self, item, timeout = None):
+
+        limite = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+
+            if not self._escritor.is_alive():
+                raise RuntimeError(f"o escritor da ingestão parou (último erro: {self._ultimo_erro})")
+
+            espera = DSA_INTERVALO_VERIFICA_ESCRITOR if limite is None else min(max(limite - time.monotonic(), 0), DSA_INTERVALO_VERIFICA_ESCRITOR)
+
+            try:
+                self._fila.put(item, timeout = espera)
+                return
+            except queue.Full:
+                if limite is not None and time.monotonic() >= limite:
+                    raise
+
+    # Método executado pela thread escritora
+    def _escreve(self):
+
+        # A conexão é criada na própria thread escritora e só é usada por ela.
+        # Com o banco travado por outro escritor, o SQLite espera até o busy_timeout antes de falhar
+        try:
+            conn = dsa_cria_conexao(self.db_path)
+            conn.execute(f"PRAGMA busy_timeout = {DSA_BUSY_TIMEOUT_ESCRITOR_MS}")
+        except Exception as erro:
+            # Sem conexão não há escritor: o erro fica nas métricas e 'envia' passa a lançar RuntimeError
+            with self._lock:
+                self._ultimo_erro = f"{type(erro).__name__}: {erro}"
+            return
+
+        encerrar = False
+
+        while not encerrar:
+
+            pedaco = self._fila.get()
+
+            if pedaco is None:
+                break
+
+            lote = list(pedaco)
+            limite = time.monotonic() + self.espera_lote
+
+            # Junta mais pedaços até completar o lote ou esgotar a espera
+            while len(lote) < self.linhas_por_lote:
+                try:
+                    pedaco = self._fila.get(timeout = max(limite - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if pedaco is None:
+                    encerrar = True
+                    break
+                lote.extend(pedaco)
+
+            self._grava_lote(conn, lote)
+
+        conn.close()
+
+    # Método que grava um lote, tentando de novo até 'tentativas' vezes
+    def _grava_lote(self, conn, lote):
+
+        espera = self.espera_retentativa
+
+        for tentativa in range(1, self.tentativas + 1):
+
+            inicio = time.perf_counter()
+
+            try:
+                with conn:
+                    conn.executemany(DSA_SQL_INSERE_VENDA, lote)
+            except Exception as erro:
+                # A transação foi desfeita; o lote fica com o escritor (a fila não anda e enche)
+                with self._lock:
+                    self._falhas += 1
+                    self._ultimo_erro = f"{type(erro).__name__}: {erro}"
+                if tentativa < self.tentativas:
+                    time.sleep(espera)
+                    espera = min(espera * 2, DSA_ESPERA_RETENTATIVA_MAX)
+                continue
+
+            with self._lock:
+                self._latencias.append(time.perf_counter() - inicio)
+                self._gravadas += len(lote)
+                self._lotes += 1
+            return
+
+        # Esgotadas as tentativas: o lote vai para o arquivo de pendentes, no formato de entrada
+        self._grava_pendentes(lote)
+
+    # Método que acrescenta um lote ao arquivo de pendentes (JSON lines)
+    def _grava_pendentes(self, lote):
+
+        campos = ("regiao", "categoria", "produto", "faturamento", "quantidade")
+
+        try:
+            with open(self.arquivo_pendentes, "a", encoding = "utf-8") as f:
+                for dia, *valores in lote:
+                    registro = {"date": dsa_dia_para_data(dia).isoformat(), **dict(zip(campos, valores))}
+                    f.write(json.dumps(registro, ensure_ascii = False) + "\n")
+                f.flush()
+        except OSError as erro:
+            # Sem banco e sem arquivo (ex: disco cheio): o lote é perdido, mas o escritor continua com os próximos
+            with self._lock:
+                self._perdidas += len(lote)
+                self._ultimo_erro = f"{type(erro).__name__} ao gravar {self.arquivo_pendentes}: {erro}"
+            print(f"{len(lote):,} linhas perdidas: {self._ultimo_erro}", file = sys.stderr)
+            return
+
+        with self._lock:
+            self._pendentes += len(lote)
+
+    # Método que informa as métricas
+    def metricas(self):
+
+        """
+        Retorna um dicionário com as contagens, a taxa de gravação (linhas/s desde o início),
+        a latência dos commits (média, p95 e máxima, em ms, das últimas DSA_JANELA_LATENCIAS) e a fila.
+        """
+
+        with self._lock:
+
+            latencias = sorted(self._latencias)
+            decorrido = time.perf_counter() - self._inicio
+
+            def ms(valor):
+                return round(valor * 1000, 2)
+
+            return {
+                "recebidas": self._recebidas,
+                "rejeitadas": self._rejeitadas,
+                "gravadas": self._gravadas,
+                "lotes": self._lotes,
+                "lotes_com_falha": self._falhas,
+                "linhas_pendentes": self._pendentes,
+                "arquivo_pendentes": self.arquivo_pendentes,
+                "linhas_perdidas": self._perdidas,
+                "escritor_ativo": self._escritor.is_alive(),
+                "ultimo_erro": self._ultimo_erro,
+                "linhas_por_segundo": round(self._gravadas / decorrido, 1) if decorrido > 0 else 0.0,
+                "commit_ms_medio": ms(sum(latencias) / len(latencias)) if latencias else None,
+                "commit_ms_p95": ms(latencias[int(0.95 * (len(latencias) - 1))]) if latencias else None,
+                "commit_ms_max": ms(latencias[-1]) if latencias else None,
+                "itens_na_fila": self._fila.qsize(),
+                "capacidade_fila": self._fila.maxsize,
+            }
+
+    # Método que grava o que falta e encerra o escritor
+    def encerra(self):
+
+        # Com o escritor parado, não há o que gravar (e a fila cheia nunca esvaziaria)
+        try:
+            self._enfileira(None)
+        except RuntimeError:
+            pass
+
+        self._escritor.join()
+
+
+# Função que lê registros de JSON lines
+def dsa_le_jsonl(linhas):
+
+    """Gera um dicionário por linha não vazia; linhas com JSON inválido geram {'_erro': ...} (rejeitadas na validação)."""
+
+    for linha in linhas:
+
+        linha = linha.strip()
+
+        if not linha:
+            continue
+
+        try:
+            yield json.loads(linha)
+        except json.JSONDecodeError as erro:
+            yield {"_erro": f"JSON inválido: {erro}"}
+
+
+# Função que lê registros de um arquivo (JSON lines ou CSV, pela extensão)
+def dsa_le_arquivo(caminho):
+
+    with open(caminho, encoding = "utf-8", newline = "") as f:
+
+        if caminho.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            yield from dsa_le_jsonl(f)
+
+
+# Função que envia uma fonte em blocos, para que o arquivo inteiro não fique em memória
+def dsa_envia_em_blocos(ingestor, registros, tamanho = DSA_LINHAS_POR_LOTE_INGESTAO):
+
+    """Envia os registros de um iterável em blocos; retorna (aceitos, rejeitados) somados."""
+
+    aceitos, rejeitados, bloco, deslocamento = 0, 0, [], 0
+
+    for registro in registros:
+
+        bloco.append(registro)
+
+        if len(bloco) >= tamanho:
+            a, r = ingestor.envia(bloco)
+            aceitos, rejeitados = aceitos + a, rejeitados + len(r)
+            for posicao, erro in r[:5]:
+                print(f"registro {deslocamento + posicao + 1} rejeitado: {erro}", file = sys.stderr)
+            deslocamento += len(bloco)
+            bloco = []
+
+    if bloco:
+        a, r = ingestor.envia(bloco)
+        aceitos, rejeitados = aceitos + a, rejeitados + len(r)
+        for posicao, erro in r[:5]:
+            print(f"registro {deslocamento + posicao + 1} rejeitado: {erro}", file = sys.stderr)
+
+    return aceitos, rejeitados
+
+
+# Função que cria o servidor HTTP local do ingestor
+def dsa_cria_servidor(ingestor, porta = 8502, host = "127.0.0.1", timeout_fila = 2.0):
+
+    """
+    Cria (sem iniciar) um servidor HTTP com dois endpoints:
+
+    POST /vendas    corpo em JSON lines (um registro por linha) ou uma lista JSON.
+                    202 com {"aceitos", "rejeitados"}; 400 se o corpo ou o Content-Length for inválido;
+                    411 sem Content-Length; 413 se o corpo passar de DSA_MAX_CORPO_HTTP;
+                    503 (com Retry-After) se a fila continuar cheia após 'timeout_fila' segundos;
+                    500 se o escritor tiver parado.
+    GET /metricas   as métricas do ingestor em JSON.
+    """
+
+    class DsaManipulador(BaseHTTPRequestHandler):
+
+        def _responde(self, status, corpo, cabecalhos = None):
+            dados = json.dumps(corpo, ensure_ascii = False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            for nome, valor in (cabecalhos or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path == "/metricas":
+                self._responde(200, ingestor.metricas())
+            else:
+                self._responde(404, {"erro": "não encontrado"})
+
+        def do_POST(self):
+
+            if self.path != "/vendas":
+                self._responde(404, {"erro": "não encontrado"})
+                return
+
+            # O tamanho é validado antes da leitura: sem ele, 'rfile.read' leria até o cliente fechar a conexão
+            if self.headers.get("Content-Length") is None:
+                self._responde(411, {"erro": "cabeçalho Content-Length obrigatório"})
+                return
+
+            try:
+                tamanho = int(self.headers["Content-Length"])
+                if tamanho < 0:
+                    raise ValueError
+            except ValueError:
+                self._responde(400, {"erro": f"Content-Length inválido: {self.headers['Content-Length']!r}"})
+                return
+
+            if tamanho > DSA_MAX_CORPO_HTTP:
+                self._responde(413, {"erro": f"corpo maior que {DSA_MAX_CORPO_HTTP} bytes; divida o envio"})
+                return
+
+            texto = self.rfile.read(tamanho).decode("utf-8", "replace")
+
+            # Uma lista JSON ou JSON lines
+            if texto.lstrip().startswith("["):
+                try:
+                    registros = json.loads(texto)
+                    if not isinstance(registros, list):
+                        raise json.JSONDecodeError("esperada uma lista", texto, 0)
+                except json.JSONDecodeError as erro:
+                    self._responde(400, {"erro": f"JSON inválido: {erro}"})
+                    return
+            else:
+                registros = list(dsa_le_jsonl(texto.splitlines()))
+
+            try:
+                aceitos, rejeitados = ingestor.envia(registros, timeout = timeout_fila)
+            except queue.Full:
+                # Contrapressão: o cliente deve tentar de novo mais tarde
+                self._responde(503, {"erro": "fila cheia, tente novamente"}, {"Retry-After": "1"})
+                return
+            except RuntimeError as erro:
+                self._responde(500, {"erro": str(erro)})
+                return
+
+            self._responde(202, {"aceitos": aceitos, "rejeitados": [{"posicao": p, "erro": e} for p, e in rejeitados]})
+
+        # Sem o log de cada requisição no terminal
+        def log_message(self, formato, *args):
+            pass
+
+    return ThreadingHTTPServer((host, porta), DsaManipulador)
+
+
+# Permite ingerir pelo terminal, por exemplo:
+# python dsa_ingestao.py --db dsa_database.db vendas.jsonl vendas.csv   (arquivos)
+# cat vendas.jsonl | python dsa_ingestao.py --db dsa_database.db -        (entrada padrão)
+# python dsa_ingestao.py --db dsa_database.db --http 8502                 (endpoint HTTP local)
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Ingestão de vendas em tb_vendas (arquivos, stdin ou HTTP).")
+    parser.add_argument("--db", default = "dsa_database.db", help = "Arquivo SQLite de destino")
+    parser.add_argument("arquivos", nargs = "*", help = "Arquivos .jsonl ou .csv ('-' para a entrada padrão)")
+    parser.add_argument("--http", type = int, metavar = "PORTA", help = "Inicia o endpoint HTTP local nesta porta")
+    parser.add_argument("--linhas-por-lote", type = int, default = DSA_LINHAS_POR_LOTE_INGESTAO, help = "Linhas por transação")
+    args = parser.parse_args()
+
+    if not args.arquivos and args.http is None:
+        parser.error("informe arquivos, '-' (entrada padrão) ou --http PORTA")
+
+    # Garante o esquema atual antes de iniciar o escritor
+    conn = dsa_cria_conexao(args.db)
+    dsa_init_db(conn)
+    conn.close()
+
+    ingestor = DsaIngestor(args.db, linhas_por_lote = args.linhas_por_lote)
+
+    inicio = time.perf_counter()
+    aceitos = rejeitados = 0
+
+    interrompida = False
+
+    try:
+        for caminho in args.arquivos:
+            registros = dsa_le_jsonl(sys.stdin) if caminho == "-" else dsa_le_arquivo(caminho)
+            a, r = dsa_envia_em_blocos(ingestor, registros, args.linhas_por_lote)
+            aceitos, rejeitados = aceitos + a, rejeitados + r
+    except RuntimeError as erro:
+        # O escritor parou: o que já estava na fila não será gravado
+        print(f"Ingestão interrompida: {erro}", file = sys.stderr)
+        interrompida = True
+
+    if args.http is not None and not interrompida:
+
+        servidor = dsa_cria_servidor(ingestor, porta = args.http)
+        print(f"Recebendo vendas em http://127.0.0.1:{args.http}/vendas (métricas em /metricas). Ctrl+C para sair.")
+
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+
+    ingestor.encerra()
+
+    metricas = ingestor.metricas()
+    duracao = time.perf_counter() - inicio
+
+    print(
+        f"{metricas['gravadas']:,} linhas gravadas em {metricas['lotes']} lotes em {duracao:.1f}s "
+        f"({metricas['gravadas'] / max(duracao, 1e-9):,.0f} linhas/s), {metricas['rejeitadas']:,} rejeitadas, "
+        f"commit médio {metricas['commit_ms_medio']} ms (p95 {metricas['commit_ms_p95']} ms)"
+    )
+
+    if metricas["linhas_pendentes"]:
+        print(f"{metricas['linhas_pendentes']:,} linhas não puderam ser gravadas e estão em {metricas['arquivo_pendentes']} "
+              f"(último erro: {metricas['ultimo_erro']}); reenvie com: python dsa_ingestao.py --db {args.db} {metricas['arquivo_pendentes']}")
+
+    if metricas["linhas_perdidas"]:
+        print(f"{metricas['linhas_perdidas']:,} linhas perdidas: nem o banco nem {metricas['arquivo_pendentes']} puderam ser gravados "
+              f"(último erro: {metricas['ultimo_erro']})", file = sys.stderr)
+
+    if interrompida or metricas["linhas_perdidas"]:
+        sys.exit(1)
@@ -0,0 +1,195 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de instrumentação das etapas do dashboard.
+# Cada etapa (consulta SQL, gráfico, carga, exportação, relatório) é medida com 'metricas.etapa(nome)':
+# tempo de relógio, linhas processadas e bytes enviados ao navegador. Os números ficam acumulados
+# por etapa (com um histograma dos tempos) e também guardados por execução do script, para o painel
+# de desempenho da app. O acumulado pode ser lido no formato texto do Prometheus (ver 'dsa_cria_servidor_metricas').
+
+# Para o servidor HTTP do endpoint de métricas
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Para as etapas de cada execução (uma lista por thread) e a trava do acumulado
+import threading
+
+# Para medir os tempos
+import time
+
+# Para o gerenciador de contexto das etapas
+from contextlib import contextmanager
+
+
+# Limites (segundos) dos baldes do histograma de tempos
+DSA_LIMITES_HISTOGRAMA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Classe do registro de uma etapa
+class DsaRegistroEtapa:
+
+    """
+    Uma execução de uma etapa. Dentro do 'with', a app preenche 'linhas' e 'bytes'; 'desconto'
+    é o tempo (segundos) gasto só para medir, que não entra em 'segundos'.
+    """
+
+    __slots__ = ("nome", "segundos", "linhas", "bytes", "desconto")
+
+    # Construtor da classe
+    def __init__(self, nome, segundos = 0.0, linhas = 0, bytes = 0):
+
+        self.nome = nome
+        self.segundos = segundos
+        self.linhas = linhas
+        self.bytes = bytes
+        self.desconto = 0.0
+
+
+# Classe das métricas
+class DsaMetricas:
+
+    """
+    Registro das métricas das etapas, compartilhado por todas as sessões.
+
+    - 'etapa(nome)' mede o bloco 'with' e entrega o registro para a app informar linhas e bytes.
+    - 'registra' soma uma medida feita fora de um 'with' (ex: o tempo de um processo trabalhador).
+    - 'inicia_execucao' e 'execucao' delimitam e devolvem as etapas da execução atual do script
+      (cada execução roda em uma thread, então a lista é por thread).
+    - 'resumo' e 'prometheus' devolvem o acumulado desde o início do servidor.
+    """
+
+    # Construtor da classe
+    def __init__(self, limites = DSA_LIMITES_HISTOGRAMA):
+
+        self.limites = tuple(limites)
+
+        # Acumulado por etapa: nome -> [execuções, segundos, linhas, bytes, contagens dos baldes]
+        self._etapas = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # Método que inicia a lista de etapas da execução atual
+    def inicia_execucao(self):
+
+        self._local.execucao = []
+
+    # Método que devolve as etapas da execução atual
+    def execucao(self):
+
+        return list(getattr(self._local, "execucao", []))
+
+    # Método que mede uma etapa
+    @contextmanager
+    def etapa(self, nome):
+
+        """Uso: 'with metricas.etapa("grafico.receita_diaria") as r: ...; r.linhas = len(df)'."""
+
+        registro = DsaRegistroEtapa(nome)
+        inicio = time.perf_counter()
+
+        # 'finally': st.stop() e st.rerun() interrompem o script com exceções, e a etapa conta mesmo assim
+        try:
+            yield registro
+        finally:
+            registro.segundos = time.perf_counter() - inicio - registro.desconto
+            self.registra(registro)
+
+    # Método que soma uma medida ao acumulado (e à execução atual)
+    def registra(self, registro):
+
+        # Índice do primeiro balde que comporta o tempo (len(limites) = acima de todos, só no "+Inf")
+        balde = next((i for i, limite in enumerate(self.limites) if registro.segundos <= limite), len(self.limites))
+
+        with self._lock:
+
+            acumulado = self._etapas.get(registro.nome)
+
+            if acumulado is None:
+                acumulado = self._etapas[registro.nome] = [0, 0.0, 0, 0, [0] * (len(self.limites) + 1)]
+
+            acumulado[0] += 1
+            acumulado[1] += registro.segundos
+            acumulado[2] += registro.linhas
+            acumulado[3] += registro.bytes
+            acumulado[4][balde] += 1
+
+        execucao = getattr(self._local, "execucao", None)
+
+        if execucao is not None:
+            execucao.append(registro)
+
+    # Método que resume o acumulado por etapa
+    def resumo(self):
+
+        """Retorna uma lista de dicionários (uma linha por etapa) com execuções, tempo médio e totais."""
+
+        with self._lock:
+            etapas = {nome: (n, s, l, b) for nome, (n, s, l, b, _) in self._etapas.items()}
+
+        return [
+            {"etapa": nome, "execucoes": n, "ms_medio": s / n * 1000, "segundos_total": s, "linhas_total": l, "bytes_total": b}
+            for nome, (n, s, l, b) in sorted(etapas.items())
+        ]
+
+    # Método que escreve o acumulado no formato texto do Prometheus
+    def prometheus(self):
+
+        """Retorna o texto da exposição (histograma dos tempos e contadores de linhas e bytes por etapa)."""
+
+        with self._lock:
+            etapas = {nome: (n, s, l, b, list(baldes)) for nome, (n, s, l, b, baldes) in sorted(self._etapas.items())}
+
+        def rotulo(nome):
+            return nome.replace("\\", "\\\\").replace('"', '\\"')
+
+        linhas = [
+            "# HELP dsa_etapa_segundos Tempo de relógio das etapas do dashboard.",
+            "# TYPE dsa_etapa_segundos histogram",
+        ]
+
+        for nome, (n, s, _, _, baldes) in etapas.items():
+            acumulado = 0
+            for limite, contagem in zip((*self.limites, "+Inf"), baldes):
+                acumulado += contagem
+                linhas.append(f'dsa_etapa_segundos_bucket{{etapa="{rotulo(nome)}",le="{limite}"}} {acumulado}')
+            linhas.append(f'dsa_etapa_segundos_sum{{etapa="{rotulo(nome)}"}} {s:.6f}')
+            linhas.append(f'dsa_etapa_segundos_count{{etapa="{rotulo(nome)}"}} {n}')
+
+        for metrica, posicao, ajuda in (
+            ("dsa_etapa_linhas_total", 2, "Linhas processadas pelas etapas do dashboard."),
+            ("dsa_etapa_bytes_total", 3, "Bytes enviados ao navegador pelas etapas do dashboard."),
+        ):
+            linhas.append(f"# HELP {metrica} {ajuda}")
+            linhas.append(f"# TYPE {metrica} counter")
+            for nome, valores in etapas.items():
+                linhas.append(f'{metrica}{{etapa="{rotulo(nome)}"}} {valores[posicao]}')
+
+        return "\n".join(linhas) + "\n"
+
+
+# Função que cria o servidor HTTP do endpoint de métricas
+def dsa_cria_servidor_metricas(metricas, porta = 9108, host = "127.0.0.1"):
+
+    """
+    Cria (sem iniciar) um servidor HTTP com o endpoint GET /metrics no formato texto do Prometheus.
+    Por padrão só atende conexões locais (host 127.0.0.1).
+    """
+
+    class DsaManipulador(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+
+            dados = metricas.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        # Sem o log de cada requisição no terminal
+        def log_message(self, formato, *args):
+            pass
+
+    return ThreadingHTTPServer((host, porta), DsaManipulador)
@@ -0,0 +1,360 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo do backend colunar (opcional): snapshots da tabela 'tb_vendas' em Parquet,
+# particionados por mês, lidos com projeção de colunas, filtros empurrados para a leitura
+# (predicate pushdown) e arquivos mapeados em memória (mmap).
+#
+# Cada exportação grava uma subpasta nova dentro do destino (ex: vendas_parquet/snapshot_<ns>/) e, só
+# quando ela está completa, troca o arquivo ATUAL (que contém o nome da subpasta) com 'os.replace',
+# uma operação atômica: quem lê encontra sempre o snapshot anterior ou o novo, inteiros. As subpastas
+# antigas são apagadas depois da troca, mantendo as DSA_SNAPSHOTS_MANTIDOS mais recentes (uma leitura
+# que começou no snapshot anterior termina sem perder arquivos).
+
+# Para ler os parâmetros da linha de comando
+import argparse
+
+# Para gravar os metadados do snapshot
+import json
+
+# Para manipular os diretórios do snapshot
+import os
+import shutil
+
+# Para medir o tempo da exportação
+import time
+
+# Importa o Pandas para ler o SQLite em blocos e devolver DataFrames ao dashboard
+import pandas as pd
+
+# Importa o PyArrow (formato colunar em memória) e seus módulos de datasets e sistema de arquivos
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+# Importa a conversão de filtros e a versão dos dados
+from dsa_consultas import DSA_COLUNAS_VENDAS, DSA_DIMENSOES, dsa_consulta_versao, dsa_sql_linhas
+
+
+# Esquema do snapshot. 'date' é date32, que no Arrow/Parquet já é "dias desde 1970-01-01":
+# o mesmo epoch day gravado no SQLite, sem conversão.
+DSA_ESQUEMA_PARQUET = pa.schema([
+    ("id", pa.int64()),
+    ("date", pa.date32()),
+    ("regiao", pa.string()),
+    ("categoria", pa.string()),
+    ("produto", pa.string()),
+    ("faturamento", pa.float64()),
+    ("quantidade", pa.int64()),
+])
+
+# Particionamento "hive" por mês (ex: mes=202601/): filtros de período descartam pastas inteiras
+DSA_PARTICIONAMENTO = ds.partitioning(pa.schema([("mes", pa.int32())]), flavor = "hive")
+
+# Arquivo com os metadados do snapshot (versão dos dados e total de linhas)
+DSA_ARQUIVO_SNAPSHOT = "_snapshot.json"
+
+# Arquivo do destino com o nome da subpasta do snapshot atual
+DSA_ARQUIVO_ATUAL = "ATUAL"
+
+# Prefixo das subpastas dos snapshots
+DSA_PREFIXO_SNAPSHOT = "snapshot_"
+
+# Snapshots completos mantidos no destino (o atual e o anterior)
+DSA_SNAPSHOTS_MANTIDOS = 2
+
+# Linhas lidas do SQLite por bloco durante a exportação
+DSA_LINHAS_POR_BLOCO = 500_000
+
+
+# Função que lê a tabela de vendas do SQLite em blocos do Arrow
+def dsa_le_blocos_arrow(conn, id_apos = None, id_ate = None, filtros = None, linhas_por_bloco = DSA_LINHAS_POR_BLOCO):
+
+    """
+    Lê 'tb_vendas' em blocos de até 'linhas_por_bloco' linhas (memória constante).
+
+    Parâmetros:
+    conn (sqlite3.Connection): A conexão com o banco.
+    id_apos, id_ate (int): Limites opcionais de 'id' (id > id_apos e id <= id_ate).
+    filtros (dict): Filtros opcionais da sidebar (ver 'dsa_monta_where').
+    linhas_por_bloco (int): Tamanho de cada bloco.
+
+    Gera (yield):
+    (pa.Table): Blocos no esquema DSA_ESQUEMA_PARQUET ('date' como date32).
+    """
+
+    if filtros is not None:
+
+        sql, params = dsa_sql_linhas(filtros, id_apos = id_apos, id_ate = id_ate)
+
+    else:
+
+        condicoes, params = [], []
+
+        if id_apos is not None:
+            condicoes.append("id > ?")
+            params.append(id_apos)
+
+        if id_ate is not None:
+            condicoes.append("id <= ?")
+            params.append(id_ate)
+
+        where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        sql = f"SELECT id, date, regiao, categoria, produto, faturamento, quantidade FROM tb_vendas{where}"
+
+    blocos = pd.read_sql_query(sql, conn, params = params, chunksize = linhas_por_bloco)
+
+    # Esquema de leitura: 'date' chega do SQLite como inteiro (epoch days)
+    esquema_leitura = DSA_ESQUEMA_PARQUET.set(1, pa.field("date", pa.int32()))
+
+    for bloco in blocos:
+
+        # Epoch days (inteiros) -> date32 sem conversão de calendário
+        tabela = pa.Table.from_pandas(bloco, schema = esquema_leitura, preserve_index = False)
+        yield tabela.set_column(1, "date", tabela.column("date").cast(pa.date32()))
+
+
+# Função que converte uma tabela do Arrow para o formato de DataFrame do dashboard
+def dsa_tabela_para_pandas(tabela):
+
+    """Converte para Pandas com 'date' em datetime64[ns], a mesma resolução de 'dsa_converte_datas'."""
+
+    # date_as_object=False: date32 vira datetime64 (e não objetos date do Python)
+    df = tabela.to_pandas(date_as_object = False)
+
+    if "date" in df.columns:
+        df["date"] = df["date"].astype("datetime64[ns]")
+
+    return df
+
+
+# Função que exporta a tabela de vendas para Parquet
+def dsa_exporta_parquet(conn, destino):
+
+    """
+    Grava um snapshot de 'tb_vendas' em Parquet particionado por mês.
+
+    A leitura do SQLite é feita em blocos (memória constante) e o snapshot é gravado
+    em uma subpasta nova de 'destino', que só passa a ser a atual (troca atômica do
+    arquivo ATUAL) quando está completa: o dashboard nunca lê um snapshot pela metade.
+
+    Retorna:
+    (int): Número de linhas exportadas.
+    """
+
+    # Versão dos dados no momento da exportação (gravada nos metadados do snapshot)
+    versao = dsa_consulta_versao(conn)
+    max_id = versao[0]
+
+    # Subpasta do novo snapshot (o nome cresce com o tempo: a ordem alfabética é a ordem das exportações)
+    os.makedirs(destino, exist_ok = True)
+    nome = f"{DSA_PREFIXO_SNAPSHOT}{time.time_ns():020d}"
+    pasta = os.path.join(destino, nome)
+
+    total = 0
+
+    # Gerador de RecordBatches do Arrow, um por bloco lido do SQLite, com a coluna de partição
+    def dsa_blocos():
+
+        nonlocal total
+
+        for tabela in dsa_le_blocos_arrow(conn, id_ate = max_id):
+
+            # Coluna de partição: AAAAMM
+            datas = tabela.column("date")
+            mes = pc.add(pc.multiply(pc.year(datas), 100), pc.month(datas)).cast(pa.int32())
+            tabela = tabela.append_column("mes", mes)
+
+            total += tabela.num_rows
+            yield from tabela.to_batches()
+
+    ds.write_dataset(
+        dsa_blocos(),
+        pasta,
+        schema = DSA_ESQUEMA_PARQUET.append(pa.field("mes", pa.int32())),
+        format = "parquet",
+        partitioning = DSA_PARTICIONAMENTO,
+        existing_data_behavior = "overwrite_or_ignore",
+    )
+
+    # Metadados: versão dos dados e total de linhas
+    with open(os.path.join(pasta, DSA_ARQUIVO_SNAPSHOT), "w", encoding = "utf-8") as f:
+        json.dump({"versao": list(versao), "linhas": total}, f)
+
+    # Troca atômica: o arquivo ATUAL passa a apontar para a nova subpasta
+    temporario = os.path.join(destino, f"{DSA_ARQUIVO_ATUAL}.tmp")
+    with open(temporario, "w", encoding = "utf-8") as f:
+        f.write(nome)
+    os.replace(temporario, os.path.join(destino, DSA_ARQUIVO_ATUAL))
+
+    # Só depois da troca: apaga os snapshots antigos
+    dsa_limpa_parquet(destino, nome)
+
+    return total
+
+
+# Função que apaga os snapshots antigos do destino
+def dsa_limpa_parquet(destino, atual):
+
+    """
+    Mantém a subpasta 'atual' e as mais recentes, até DSA_SNAPSHOTS_MANTIDOS snapshots completos,
+    e apaga o restante: snapshots antigos, exportações interrompidas e o formato anterior
+    (partições e metadados gravados direto no destino).
+    """
+
+    completos = sorted(
+        (n for n in os.listdir(destino)
+         if n.startswith(DSA_PREFIXO_SNAPSHOT) and n != atual and os.path.exists(os.path.join(destino, n, DSA_ARQUIVO_SNAPSHOT))),
+        reverse = True,
+    )
+    manter = {atual, DSA_ARQUIVO_ATUAL, *completos[:DSA_SNAPSHOTS_MANTIDOS - 1]}
+
+    for nome in os.listdir(destino):
+
+        # Exportação mais nova que a atual (outro processo gravando agora): fica
+        if nome in manter or (nome.startswith(DSA_PREFIXO_SNAPSHOT) and nome > atual):
+            continue
+
+        caminho = os.path.join(destino, nome)
+        if os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors = True)
+        else:
+            os.remove(caminho)
+
+
+# Função que localiza a pasta do snapshot atual
+def dsa_pasta_parquet(origem):
+
+    """
+    Retorna a subpasta do snapshot atual de 'origem' (indicada pelo arquivo ATUAL),
+    ou None se não houver snapshot. Um snapshot no formato anterior (gravado direto
+    em 'origem') é devolvido como está.
+    """
+
+    try:
+        with open(os.path.join(origem, DSA_ARQUIVO_ATUAL), encoding = "utf-8") as f:
+            return os.path.join(origem, f.read().strip())
+    except FileNotFoundError:
+        return origem if os.path.exists(os.path.join(origem, DSA_ARQUIVO_SNAPSHOT)) else None
+
+
+# Função que lê os metadados do snapshot
+def dsa_versao_parquet(origem):
+
+    """Retorna a versão dos dados gravada no snapshot (ou None se não houver snapshot).
+
+    'origem' é a pasta de destino da exportação ou a subpasta de um snapshot (ver 'dsa_pasta_parquet').
+    """
+
+    pasta = dsa_pasta_parquet(origem)
+
+    if pasta is None:
+        return None
+
+    try:
+        with open(os.path.join(pasta, DSA_ARQUIVO_SNAPSHOT), encoding = "utf-8") as f:
+            return tuple(json.load(f)["versao"])
+    except FileNotFoundError:
+        return None
+
+
+# Função que converte os filtros da sidebar em uma expressão do Arrow
+def dsa_expressao_filtros(filtros, particao = True):
+
+    """
+    Equivalente ao 'dsa_monta_where' para o backend Parquet.
+
+    Com 'particao = True', inclui um filtro sobre a coluna de partição 'mes', que permite
+    ao Arrow descartar pastas inteiras antes de abrir qualquer arquivo
+    (tabelas em memória não têm essa coluna: use 'particao = False').
+    """
+
+    inicio, fim = filtros["data_inicio"], filtros["data_fim"]
+
+    expressao = (
+        (ds.field("date") >= pa.scalar(inicio, pa.date32())) &
+        (ds.field("date") <= pa.scalar(fim, pa.date32()))
+    )
+
+    if particao:
+        expressao = expressao & (
+            (ds.field("mes") >= inicio.year * 100 + inicio.month) &
+            (ds.field("mes") <= fim.year * 100 + fim.month)
+        )
+
+    for chave, coluna in DSA_DIMENSOES.items():
+
+        valores = list(filtros[chave])
+
+        # Multiselect vazio não retorna nenhuma linha (mesmo comportamento do SQL)
+        if not valores:
+            return ds.scalar(False)
+
+        expressao = expressao & ds.field(coluna).isin(valores)
+
+    return expressao
+
+
+# Função que lê as transações filtradas do snapshot Parquet
+def dsa_le_parquet(origem, filtros, colunas = None):
+
+    """
+    Lê as transações que atendem aos filtros a partir do snapshot Parquet.
+
+    - Projeção: apenas as colunas pedidas são lidas do disco.
+    - Predicate pushdown: partições e row groups fora do filtro são descartados
+      pelas estatísticas do Parquet antes da leitura.
+    - Os arquivos são mapeados em memória (mmap) em vez de copiados para buffers.
+    - regiao, categoria e produto chegam como colunas de dicionário (category no Pandas).
+
+    'origem' é a pasta de destino da exportação (lê o snapshot atual) ou a subpasta de um snapshot.
+    Lança FileNotFoundError se não houver snapshot.
+
+    Retorna:
+    (pd.DataFrame): Mesmo formato de 'dsa_consulta_linhas' (coluna 'date' como datetime).
+    """
+
+    colunas = colunas or DSA_COLUNAS_VENDAS
+
+    if any(c not in DSA_COLUNAS_VENDAS for c in colunas):
+        raise ValueError(f"Colunas inválidas: {colunas}")
+
+    formato = ds.ParquetFileFormat(read_options = {"dictionary_columns": list(DSA_DIMENSOES.values())})
+
+    pasta = dsa_pasta_parquet(origem)
+
+    if pasta is None:
+        raise FileNotFoundError(f"Nenhum snapshot Parquet em '{origem}'")
+
+    dataset = ds.dataset(
+        pasta,
+        format = formato,
+        partitioning = DSA_PARTICIONAMENTO,
+        filesystem = pafs.LocalFileSystem(use_mmap = True),
+        exclude_invalid_files = True,
+    )
+
+    tabela = dataset.to_table(columns = colunas, filter = dsa_expressao_filtros(filtros))
+
+    return dsa_tabela_para_pandas(tabela)
+
+
+# Permite gerar o snapshot pelo terminal, por exemplo (rodar periodicamente, ex: cron):
+# python dsa_parquet.py --db dsa_database.db --destino vendas_parquet
+if __name__ == "__main__":
+
+    from dsa_banco import dsa_cria_conexao, dsa_init_db
+
+    parser = argparse.ArgumentParser(description = "Exporta tb_vendas para um snapshot Parquet particionado por mês.")
+    parser.add_argument("--db", default = "dsa_database.db", help = "Arquivo SQLite de origem")
+    parser.add_argument("--destino", default = "vendas_parquet", help = "Pasta do snapshot")
+    args = parser.parse_args()
+
+    conn = dsa_cria_conexao(args.db)
+    dsa_init_db(conn)
+
+    inicio = time.perf_counter()
+    total = dsa_exporta_parquet(conn, args.destino)
+    conn.close()
+
+    print(f"{total:,} linhas exportadas para '{args.destino}' em {time.perf_counter() - inicio:.1f}s")
@@ -0,0 +1,344 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de geração do relatório PDF (sem dependência do Streamlit).
+# Pode ser usado pela app, por processos trabalhadores em segundo plano (ver dsa_tarefas.py)
+# e por scripts de linha de comando.
+
+# Para gravar o arquivo final de forma atômica
+import os
+
+# Importa módulos de data e hora
+from datetime import datetime
+
+# Importa a biblioteca de geração de PDF e seus componentes
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos  # Enumerações para posicionamento no PDF
+
+# Importa a redução de pontos da série diária
+from dsa_amostragem import dsa_reduz_serie
+
+# Importa a conexão e as consultas usadas no relatório
+from dsa_banco import dsa_cria_conexao
+from dsa_consultas import (
+    dsa_consulta_kpis,
+    dsa_consulta_linhas,
+    dsa_consulta_receita_diaria,
+    dsa_consulta_receita_por,
+)
+
+
+# Número padrão de transações na tabela do relatório (a tabela continua nas páginas seguintes)
+DSA_LINHAS_RELATORIO = 100
+
+# Máximo de pontos da linha de receita diária no PDF
+DSA_PONTOS_GRAFICO_PDF = 300
+
+# Cor das barras e da linha dos gráficos (o mesmo verde do dashboard)
+DSA_COR_GRAFICO = (0, 204, 150)
+
+# Máximo de barras por gráfico (as de maior receita)
+DSA_MAX_BARRAS = 12
+
+# Gráficos de barras aceitos em 'graficos': chave -> (título, coluna do rótulo).
+# São desenhados dois por linha, na ordem abaixo, apenas os que estiverem presentes.
+DSA_GRAFICOS_BARRAS = {
+    "receita_categoria": ("Receita por Categoria", "categoria"),
+    "receita_regiao": ("Receita por Regiao", "regiao"),
+    "receita_produto": ("Receita por Produto", "produto"),
+}
+
+
+# Função que prepara um texto para as fontes padrão do PDF
+def dsa_texto_pdf(serie):
+
+    """
+    As fontes padrão do FPDF (Helvetica) usam Latin-1: caracteres fora dele viram '?'.
+    Recebe uma Series do Pandas e converte a coluna inteira de uma vez (sem laço por célula).
+    """
+
+    return serie.astype(str).str.encode("latin-1", "replace").str.decode("latin-1")
+
+
+# Função que desenha um gráfico de linha (vetorial) no PDF
+def dsa_desenha_linha(pdf, titulo, df, coluna_x, coluna_y, altura = 55):
+
+    """
+    Desenha a série 'coluna_y' x 'coluna_x' como uma polilinha dentro de uma moldura.
+    O gráfico é desenhado com as primitivas do próprio FPDF: não precisa gerar imagens.
+    """
+
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, titulo, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    x0, y0, largura = pdf.l_margin, pdf.get_y() + 2, pdf.epw
+
+    # Moldura do gráfico
+    pdf.set_draw_color(200, 200, 200)
+    pdf.rect(x0, y0, largura, altura)
+
+    if len(df) >= 2:
+
+        # Escala os valores para a área do gráfico (x pelo índice, já que os dias são consecutivos)
+        y = df[coluna_y].to_numpy(dtype = float)
+        minimo, maximo = float(y.min()), float(y.max())
+        faixa = (maximo - minimo) or 1.0
+
+        n = len(y)
+        pontos = [
+            (x0 + 2 + i * (largura - 4) / (n - 1), y0 + altura - 2 - (valor - minimo) / faixa * (altura - 4))
+            for i, valor in enumerate(y)
+        ]
+
+        pdf.set_draw_color(*DSA_COR_GRAFICO)
+        pdf.set_line_width(0.4)
+        pdf.polyline(pontos)
+        pdf.set_line_width(0.2)
+
+        # Legendas: período e valores mínimo/máximo
+        pdf.set_font("Helvetica", "", 7)
+        pdf.set_xy(x0, y0 + altura + 1)
+        pdf.cell(largura / 2, 4, f"{df[coluna_x].iloc[0]:%d/%m/%Y}")
+        pdf.cell(largura / 2, 4, f"{df[coluna_x].iloc[-1]:%d/%m/%Y}", align="R")
+        pdf.set_xy(x0 + 2, y0 + 1)
+        pdf.cell(0, 4, f"max R$ {maximo:,.0f}   min R$ {minimo:,.0f}")
+
+    pdf.set_draw_color(0, 0, 0)
+    pdf.set_y(y0 + altura + 8)
+
+
+# Função que desenha um gráfico de barras horizontais (vetorial) no PDF
+def dsa_desenha_barras(pdf, titulo, df, coluna_rotulo, coluna_valor, x0, largura):
+
+    """Desenha uma barra por linha de 'df' (até 'DSA_MAX_BARRAS'), com o rótulo à esquerda e o valor à direita."""
+
+    y0 = pdf.get_y()
+
+    pdf.set_font("Helvetica", "B", 11)
+    pdf.set_xy(x0, y0)
+    pdf.cell(largura, 7, titulo)
+
+    df = df.sort_values(coluna_valor, ascending = False).head(DSA_MAX_BARRAS)
+    maximo = float(df[coluna_valor].max()) if len(df) else 0.0
+    rotulos = dsa_texto_pdf(df[coluna_rotulo]).tolist()
+
+    largura_rotulo, largura_valor = 28, 24
+    largura_barra = largura - largura_rotulo - largura_valor
+
+    pdf.set_font("Helvetica", "", 8)
+    pdf.set_fill_color(*DSA_COR_GRAFICO)
+
+    for i, (rotulo, valor) in enumerate(zip(rotulos, df[coluna_valor].tolist())):
+
+        y = y0 + 9 + i * 6
+        pdf.set_xy(x0, y)
+        pdf.cell(largura_rotulo, 5, rotulo[:16])
+
+        if maximo > 0:
+            pdf.rect(x0 + largura_rotulo, y + 0.5, max(largura_barra * valor / maximo, 0.3), 4, "F")
+
+        pdf.set_xy(x0 + largura - largura_valor, y)
+        pdf.cell(largura_valor, 5, f"{valor / 1e6:,.2f} mi", align="R")
+
+    return y0 + 9 + len(rotulos) * 6
+
+
+# Função para gerar o relatório em pdf
+def dsa_gera_pdf_report(df_top, total_faturamento, total_quantidade, avg_ticket, graficos = None, progresso = None, subtitulo = None):
+
+    """
+    Gera um relatório PDF customizado usando a biblioteca FPDF.
+
+    Parâmetros:
+    df_top (pd.DataFrame): As transações da tabela, já ordenadas (ex: maiores receitas).
+    total_faturamento (float): O valor do KPI de faturamento.
+    total_quantidade (int): O valor do KPI de quantidade.
+    avg_ticket (float): O valor do KPI de ticket médio.
+    graficos (dict): Opcional. DataFrames dos gráficos: 'receita_diaria' e as barras de 'DSA_GRAFICOS_BARRAS'.
+    progresso (function): Opcional. Chamada como progresso(fracao, mensagem) a cada etapa.
+    subtitulo (str): Opcional. Texto exibido ao lado da data de geração (ex: o recorte do relatório).
+
+    Retorna:
+    (bytes): Os bytes brutos do arquivo PDF gerado.
+    """
+
+    progresso = progresso or (lambda fracao, mensagem: None)
+
+    # --- 1. Configuração Inicial do PDF ---
+
+    # Inicializa o objeto FPDF
+    pdf = FPDF()
+
+    # Habilita a quebra de página automática com 15mm de margem inferior
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    # Adiciona uma nova página ao documento
+    pdf.add_page()
+
+    # --- 2. Título e Metadados ---
+
+    # Define a fonte ("Helvetica", Negrito, Tamanho 16)
+    # A fonte "Helvetica" é a substituta moderna da "Arial" para evitar warnings.
+    pdf.set_font("Helvetica", "B", 16)
+
+    # Cria a célula do título.
+    # Parâmetros: (largura, altura, texto, alinhamento)
+    # new_x/new_y são a sintaxe moderna para substituir o 'ln=True' (quebra de linha)
+    pdf.cell(0, 10, "Relatorio Executivo de Vendas", align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    # Adiciona um espaço vertical (quebra de linha) de 5 pontos
+    pdf.ln(5)
+
+    # Adiciona o carimbo de data/hora da geração
+    pdf.set_font("Helvetica", "", 10)
+    gerado_em = f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    if subtitulo:
+        gerado_em = f"{gerado_em}   |   {subtitulo}".encode("latin-1", "replace").decode("latin-1")
+    pdf.cell(0, 8, gerado_em, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    # --- 3. Bloco de Resumo de KPIs (com fundo cinza) ---
+
+    # Define a cor de preenchimento (cinza claro) e desenha um retângulo
+    pdf.set_fill_color(240, 240, 240)
+    pdf.rect(10, 35, 190, 25, 'F')
+
+    # Define a posição Y (vertical) do cursor para 40,
+    # para que o texto seja escrito EM CIMA do retângulo
+    pdf.set_y(40)
+
+    # Escreve os cabeçalhos dos KPIs
+    pdf.set_font("Helvetica", "B", 12)
+
+    # new_x=XPos.RIGHT, new_y=YPos.TOP: move o cursor para a direita, mas mantém na mesma linha
+    pdf.cell(60, 8, f"Receita Total", align="C", new_x=XPos.RIGHT, new_y=YPos.TOP)
+    pdf.cell(60, 8, f"Quantidade", align="C", new_x=XPos.RIGHT, new_y=YPos.TOP)
+
+    # new_x=XPos.LMARGIN, new_y=YPos.NEXT: quebra a linha após esta célula
+    pdf.cell(60, 8, f"Ticket Medio", align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    # Escreve os valores dos KPIs (logo abaixo dos cabeçalhos)
+    pdf.set_font("Helvetica", "", 12)
+    pdf.cell(60, 8, f"R$ {total_faturamento:,.2f}", align="C", new_x=XPos.RIGHT, new_y=YPos.TOP)
+    pdf.cell(60, 8, f"{total_quantidade:,}", align="C", new_x=XPos.RIGHT, new_y=YPos.TOP)
+    pdf.cell(60, 8, f"R$ {avg_ticket:,.2f}", align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    # Adiciona um espaço vertical grande após o bloco de KPIs
+    pdf.ln(15)
+
+    # --- 4. Gráficos (opcionais) ---
+
+    if graficos:
+
+        progresso(0.3, "Desenhando os gráficos")
+
+        # Receita diária (linha), reduzida para não desenhar milhares de segmentos
+        diaria, _ = dsa_reduz_serie(graficos["receita_diaria"], max_pontos = DSA_PONTOS_GRAFICO_PDF)
+        dsa_desenha_linha(pdf, "Evolucao da Receita Diaria", diaria, "date", "faturamento")
+
+        # Barras, duas por linha (esquerda e direita)
+        barras = [(chave, titulo, rotulo) for chave, (titulo, rotulo) in DSA_GRAFICOS_BARRAS.items() if chave in graficos]
+
+        for i in range(0, len(barras), 2):
+
+            y, fim = pdf.get_y(), pdf.get_y()
+
+            for (chave, titulo, rotulo), x0 in zip(barras[i:i + 2], (10, 108)):
+                pdf.set_y(y)
+                fim = max(fim, dsa_desenha_barras(pdf, titulo, graficos[chave], rotulo, "faturamento", x0, 92))
+
+            pdf.set_xy(pdf.l_margin, fim + 6)
+
+    # --- 5. Tabela das Maiores Vendas ---
+
+    progresso(0.6, "Montando a tabela")
+
+    # Adiciona o subtítulo da tabela
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, f"Top {len(df_top)} Vendas (por receita):", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    # Prepara as células coluna a coluna (operações vetorizadas do Pandas, sem 'iterrows'):
+    # trunca o produto para caber na célula e converte cada coluna de texto para Latin-1 de uma vez
+    celulas = [
+        df_top["date"].dt.strftime("%Y-%m-%d"),
+        dsa_texto_pdf(df_top["regiao"]),
+        dsa_texto_pdf(df_top["categoria"]),
+        dsa_texto_pdf(df_top["produto"]).str.slice(0, 20),
+        df_top["quantidade"].astype(str),
+        "R$ " + df_top["faturamento"].map("{:,.2f}".format),
+    ]
+    linhas = list(zip(*(coluna.tolist() for coluna in celulas)))
+
+    # Tabela do FPDF: quebra de página automática, repetindo o cabeçalho em cada página
+    pdf.set_font("Helvetica", "", 9)
+    with pdf.table(
+        col_widths = (30, 30, 30, 40, 25, 30),
+        text_align = ("LEFT", "LEFT", "LEFT", "LEFT", "CENTER", "RIGHT"),
+        line_height = 7,
+        repeat_headings = 1,
+    ) as tabela:
+
+        tabela.row(["Data", "Regiao", "Categoria", "Produto", "Qtd", "Receita"])
+
+        for linha in linhas:
+            tabela.row(linha)
+
+    # --- 6. Geração e Retorno do PDF ---
+
+    progresso(0.9, "Gerando o arquivo")
+
+    # .output() sem parâmetros retorna o conteúdo do PDF como bytes (substitui o antigo 'dest="S"')
+    result = pdf.output()
+
+    # Retorna os bytes brutos do PDF, prontos para o botão de download
+    return result.encode("latin-1") if isinstance(result, str) else bytes(result)
+
+
+# Função que consulta os dados e grava o relatório em um arquivo
+def dsa_renderiza_relatorio(db_path, filtros, destino, limite = DSA_LINHAS_RELATORIO, progresso = None):
+
+    """
+    Gera o relatório completo (KPIs, gráficos e tabela) para os filtros e grava em 'destino'.
+
+    Abre a sua própria conexão (somente consultas), então pode rodar em outro processo.
+    O arquivo é gravado com outro nome e renomeado no final: quem vê 'destino' vê o PDF completo.
+
+    Parâmetros:
+    db_path (str): Caminho do arquivo SQLite.
+    filtros (dict): O dicionário de filtros (ver 'dsa_monta_where').
+    destino (str): Caminho do arquivo PDF.
+    limite (int): Número de transações da tabela (maiores receitas).
+    progresso (function): Opcional. Chamada como progresso(fracao, mensagem).
+
+    Retorna:
+    (str): O caminho do arquivo gravado.
+    """
+
+    progresso = progresso or (lambda fracao, mensagem: None)
+
+    progresso(0.05, "Consultando o banco de dados")
+
+    conn = dsa_cria_conexao(db_path)
+
+    try:
+        kpis = dsa_consulta_kpis(conn, filtros)
+        graficos = {
+            "receita_diaria": dsa_consulta_receita_diaria(conn, filtros),
+            "receita_categoria": dsa_consulta_receita_por(conn, filtros, "categoria"),
+            "receita_regiao": dsa_consulta_receita_por(conn, filtros, "regiao"),
+        }
+        df_top = dsa_consulta_linhas(conn, filtros, ordenar_por = "faturamento DESC", limite = limite)
+    finally:
+        conn.close()
+
+    pdf_bytes = dsa_gera_pdf_report(
+        df_top, kpis["total_faturamento"], kpis["total_qty"], kpis["avg_ticket"],
+        graficos = graficos, progresso = progresso,
+    )
+
+    temporario = f"{destino}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(temporario, destino)
+
+    progresso(1.0, "Concluído")
+
+    return destino
@@ -0,0 +1,264 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo de geração de relatórios PDF em lote (linha de comando, sem Streamlit).
+# Gera um relatório para cada combinação região x categoria do período, em paralelo,
+# e grava os PDFs em um diretório junto com um manifesto (manifesto.json).
+#
+# Os dados são consultados uma única vez no processo principal: a tabela agregada do período
+# (KPIs e gráficos de todas as combinações) e as maiores vendas de cada combinação.
+# Cada processo trabalhador recebe esse conjunto uma vez, ao iniciar, e depois só recebe os nomes
+# da região e da categoria de cada relatório.
+#
+# Exemplo (agendado no cron para rodar toda noite, com o mês corrente; aqui, o último mês da base de exemplo):
+# python dsa_relatorios_lote.py --db dsa_database.db --destino relatorios_lote --inicio 2026-06-01 --fim 2026-06-29
+
+# Para ler os parâmetros da linha de comando
+import argparse
+
+# Para o sufixo dos nomes de arquivo
+import hashlib
+
+# Para o manifesto
+import json
+
+# Para o diretório de destino e o número de processadores
+import os
+
+# Para medir o tempo de cada relatório e do lote
+import time
+
+# Para gerar nomes de arquivo sem acentos
+import unicodedata
+
+# Importa o pool de processos
+from concurrent.futures import ProcessPoolExecutor
+
+# Importa módulos de data e hora
+from datetime import date, datetime
+
+# Importa a conexão com o banco
+from dsa_banco import dsa_cria_conexao, dsa_init_db
+
+# Importa as consultas e o cálculo dos KPIs
+from dsa_consultas import (
+    dsa_consulta_agregado_diario,
+    dsa_consulta_dimensoes,
+    dsa_consulta_maiores_por_grupo,
+    dsa_consulta_versao,
+    dsa_monta_kpis,
+)
+
+# Importa a geração do PDF
+from dsa_relatorio import DSA_LINHAS_RELATORIO, dsa_gera_pdf_report
+
+
+# Dimensões de cada relatório do lote
+DSA_GRUPOS_LOTE = ["regiao", "categoria"]
+
+# Nome do manifesto gravado no diretório de destino
+DSA_ARQUIVO_MANIFESTO = "manifesto.json"
+
+# Dados compartilhados do processo trabalhador: (região, categoria) -> DataFrames do recorte
+_dsa_dados_trabalhador = {}
+
+
+# Função que converte um texto em um nome de arquivo seguro
+def dsa_nome_arquivo(texto):
+
+    """Remove acentos e troca tudo o que não for letra ou número por '_' (ex: 'Sudeste/Sul' -> 'Sudeste_Sul')."""
+
+    ascii_ = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+
+    return "".join(c if c.isalnum() else "_" for c in ascii_).strip("_") or "vazio"
+
+
+# Função que monta o nome do PDF de uma combinação região x categoria
+def dsa_nome_relatorio(regiao, categoria):
+
+    """
+    Retorna 'relatorio_<regiao>_<categoria>_<hash>.pdf'. Nomes diferentes podem virar o mesmo texto
+    em 'dsa_nome_arquivo' (ex: 'São Paulo' e 'Sao Paulo'); o hash curto dos nomes originais mantém
+    um arquivo por combinação, sempre com o mesmo nome de um lote para outro.
+    """
+
+    sufixo = hashlib.sha256(json.dumps([regiao, categoria], ensure_ascii = False).encode("utf-8")).hexdigest()[:8]
+
+    return f"relatorio_{dsa_nome_arquivo(regiao)}_{dsa_nome_arquivo(categoria)}_{sufixo}.pdf"
+
+
+# Função que monta o conjunto de dados compartilhado do lote
+def dsa_prepara_dados_lote(conn, filtros, limite):
+
+    """
+    Consulta o banco uma única vez e separa os dados por combinação região x categoria.
+
+    Retorna:
+    (dict): (região, categoria) -> {'agregado': DataFrame do recorte na tabela agregada,
+            'maiores': DataFrame das 'limite' maiores vendas do recorte}.
+    """
+
+    agregado = dsa_consulta_agregado_diario(conn, filtros)
+    maiores = dsa_consulta_maiores_por_grupo(conn, filtros, DSA_GRUPOS_LOTE, limite)
+
+    grupos_maiores = dict(tuple(maiores.groupby(DSA_GRUPOS_LOTE, sort = False)))
+
+    return {
+        grupo: {"agregado": recorte, "maiores": grupos_maiores.get(grupo, maiores.iloc[:0])}
+        for grupo, recorte in agregado.groupby(DSA_GRUPOS_LOTE, sort = True)
+    }
+
+
+# Função que inicializa o processo trabalhador
+def dsa_inicia_trabalhador(dados):
+
+    # Executada uma vez por processo: os dados chegam uma vez, e não a cada relatório
+    _dsa_dados_trabalhador.update(dados)
+
+
+# Função que gera o relatório de uma combinação (executada no processo trabalhador)
+def dsa_gera_relatorio_grupo(grupo, destino, periodo):
+
+    """
+    Gera o PDF da combinação 'grupo' (região, categoria) e o grava em 'destino'.
+
+    Retorna:
+    (dict): A entrada do manifesto (combinação, arquivo, KPIs, tamanho e tempo).
+    """
+
+    inicio = time.perf_counter()
+
+    regiao, categoria = grupo
+    recorte = _dsa_dados_trabalhador[grupo]
+    agregado = recorte["agregado"]
+
+    # Os mesmos KPIs do dashboard, a partir das somas da tabela agregada
+    kpis = dsa_monta_kpis(
+        float(agregado["faturamento"].sum()),
+        int(agregado["quantidade"].sum()),
+        int(agregado["transacoes"].sum()),
+    )
+
+    graficos = {
+        "receita_diaria": agregado.groupby("date", as_index = False)["faturamento"].sum(),
+        "receita_produto": agregado.groupby("produto", as_index = False)["faturamento"].sum(),
+    }
+
+    pdf_bytes = dsa_gera_pdf_report(
+        recorte["maiores"], kpis["total_faturamento"], kpis["total_qty"], kpis["avg_ticket"],
+        graficos = graficos,
+        subtitulo = f"{regiao} / {categoria} / {periodo[0]:%d/%m/%Y} a {periodo[1]:%d/%m/%Y}",
+    )
+
+    # Grava com outro nome e renomeia (como o manifesto): quem lê o PDF nunca vê um arquivo pela metade
+    with open(f"{destino}.tmp", "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(f"{destino}.tmp", destino)
+
+    return {
+        "regiao": regiao,
+        "categoria": categoria,
+        "arquivo": os.path.basename(destino),
+        "bytes": len(pdf_bytes),
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "kpis": kpis,
+    }
+
+
+# Função que gera todos os relatórios do lote
+def dsa_gera_lote(db_path, destino, filtros, limite = DSA_LINHAS_RELATORIO, processos = None):
+
+    """
+    Gera um PDF por combinação região x categoria dos filtros e grava o manifesto.
+
+    Parâmetros:
+    db_path (str): Caminho do arquivo SQLite.
+    destino (str): Diretório dos PDFs e do manifesto (criado se não existir).
+    filtros (dict): O dicionário de filtros (ver 'dsa_monta_where').
+    limite (int): Transações da tabela de cada relatório.
+    processos (int): Número de processos trabalhadores (padrão: número de CPUs).
+
+    Retorna:
+    (dict): O manifesto gravado.
+    """
+
+    inicio = time.perf_counter()
+
+    os.makedirs(destino, exist_ok = True)
+
+    conn = dsa_cria_conexao(db_path)
+
+    try:
+        versao = dsa_consulta_versao(conn)
+        dados = dsa_prepara_dados_lote(conn, filtros, limite)
+    finally:
+        conn.close()
+
+    segundos_consulta = time.perf_counter() - inicio
+
+    periodo = (filtros["data_inicio"], filtros["data_fim"])
+    tarefas = [
+        (grupo, os.path.join(destino, dsa_nome_relatorio(*grupo)), periodo)
+        for grupo in dados
+    ]
+
+    # Cada trabalhador recebe o conjunto de dados uma vez (initargs); as tarefas levam só os nomes
+    with ProcessPoolExecutor(max_workers = processos or os.cpu_count(), initializer = dsa_inicia_trabalhador, initargs = (dados,)) as pool:
+        relatorios = list(pool.map(dsa_gera_relatorio_grupo, *zip(*tarefas), chunksize = 4)) if tarefas else []
+
+    segundos = time.perf_counter() - inicio
+
+    manifesto = {
+        "gerado_em": datetime.now().isoformat(timespec = "seconds"),
+        "banco": os.path.abspath(db_path),
+        "versao_dados": {"max_id": versao[0], "alteracoes": versao[1]},
+        "periodo": {"inicio": periodo[0].isoformat(), "fim": periodo[1].isoformat()},
+        "limite": limite,
+        "relatorios": relatorios,
+        "total_relatorios": len(relatorios),
+        "segundos_consulta": round(segundos_consulta, 3),
+        "segundos_total": round(segundos, 3),
+        "relatorios_por_segundo": round(len(relatorios) / segundos, 2) if segundos > 0 else None,
+    }
+
+    # Grava com outro nome e renomeia: quem lê o manifesto nunca vê um arquivo pela metade
+    arquivo = os.path.join(destino, DSA_ARQUIVO_MANIFESTO)
+    with open(f"{arquivo}.tmp", "w", encoding = "utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii = False, indent = 2)
+    os.replace(f"{arquivo}.tmp", arquivo)
+
+    return manifesto
+
+
+# Permite gerar o lote pelo terminal (ou por um agendador, como o cron)
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Gera um relatório PDF por região x categoria.")
+    parser.add_argument("--db", default = "dsa_database.db", help = "Arquivo SQLite de origem")
+    parser.add_argument("--destino", default = "relatorios_lote", help = "Diretório dos PDFs e do manifesto")
+    parser.add_argument("--inicio", type = date.fromisoformat, help = "Primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--fim", type = date.fromisoformat, help = "Último dia (AAAA-MM-DD)")
+    parser.add_argument("--limite", type = int, default = DSA_LINHAS_RELATORIO, help = "Transações por relatório")
+    parser.add_argument("--processos", type = int, default = os.cpu_count(), help = "Processos trabalhadores")
+    args = parser.parse_args()
+
+    # Garante que o banco esteja migrado antes de abrir os trabalhadores
+    conn = dsa_cria_conexao(args.db)
+    dsa_init_db(conn)
+    dimensoes = dsa_consulta_dimensoes(conn)
+    conn.close()
+
+    # Todas as regiões, categorias e produtos do período
+    filtros = {
+        "data_inicio": args.inicio or dimensoes["min_date"],
+        "data_fim": args.fim or dimensoes["max_date"],
+        "regioes": dimensoes["regioes"],
+        "categorias": dimensoes["categorias"],
+        "produtos": dimensoes["produtos"],
+    }
+
+    manifesto = dsa_gera_lote(args.db, args.destino, filtros, limite = args.limite, processos = args.processos)
+
+    print(
+        f"{manifesto['total_relatorios']} relatórios gravados em '{args.destino}' em {manifesto['segundos_total']:.1f}s "
+        f"(consulta: {manifesto['segundos_consulta']:.1f}s) - {manifesto['relatorios_por_segundo']} relatórios/s"
+    )
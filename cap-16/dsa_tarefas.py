@@ -0,0 +1,211 @@
+# Data Science Academy
+# Mini-Projeto 10 - Data App Para Dashboard Interativo de Sales Analytics em Python com Streamlit
+# Módulo da fila de relatórios PDF em segundo plano.
+# Os relatórios são gerados por processos trabalhadores: a app apenas enfileira o pedido e
+# acompanha o progresso, sem travar a interface. Cada PDF pronto fica gravado em disco com uma
+# chave (hash dos filtros + versão dos dados) e é reaproveitado enquanto os dados não mudarem.
+
+# Para ler e gravar os arquivos de progresso e listar os PDFs do cache
+import os
+
+# Para a proteção do dicionário de tarefas (várias sessões usam a mesma fila)
+import threading
+
+# Para medir o tempo de geração de cada relatório
+import time
+
+# Para o contexto 'spawn' dos processos trabalhadores
+import multiprocessing
+
+# Importa o pool de processos
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Importa a chave dos filtros e a geração do relatório
+from dsa_consultas import dsa_hash_filtros
+from dsa_relatorio import DSA_LINHAS_RELATORIO, dsa_renderiza_relatorio
+
+
+# Estados de uma tarefa
+DSA_ESTADO_FILA = "na fila"
+DSA_ESTADO_GERANDO = "gerando"
+DSA_ESTADO_CONCLUIDO = "concluido"
+DSA_ESTADO_ERRO = "erro"
+
+
+# Função executada no processo trabalhador
+def dsa_trabalho_relatorio(db_path, filtros, destino, limite):
+
+    """
+    Gera o relatório em 'destino', gravando o progresso em '<destino>.progresso'.
+    Precisa estar no nível do módulo para ser enviada a outro processo.
+
+    Retorna:
+    (float): O tempo de geração, em segundos.
+    """
+
+    arquivo_progresso = f"{destino}.progresso"
+
+    # O progresso vai para um arquivo pequeno (fração e mensagem) lido pela app a cada consulta
+    def progresso(fracao, mensagem):
+        temporario = f"{arquivo_progresso}.tmp"
+        with open(temporario, "w", encoding = "utf-8") as f:
+            f.write(f"{fracao:.2f}\t{mensagem}")
+        os.replace(temporario, arquivo_progresso)
+
+    inicio = time.perf_counter()
+
+    try:
+        dsa_renderiza_relatorio(db_path, filtros, destino, limite = limite, progresso = progresso)
+        return time.perf_counter() - inicio
+    finally:
+        if os.path.exists(arquivo_progresso):
+            os.remove(arquivo_progresso)
+
+
+# Classe da fila de relatórios
+class DsaFilaRelatorios:
+
+    """
+    Fila de relatórios PDF com um pool de processos e um cache em disco.
+
+    - 'submete' devolve a chave do relatório; se o PDF dessa chave já existe, nada é gerado.
+    - Pedidos iguais (mesma chave) feitos enquanto o relatório é gerado reaproveitam a mesma tarefa.
+    - 'estado' informa a situação, o progresso e, ao final, o caminho do arquivo.
+    - Ao passar de 'max_arquivos' PDFs no diretório, os mais antigos são apagados.
+    """
+
+    # Construtor da classe
+    def __init__(self, diretorio, max_trabalhadores = 2, max_arquivos = 50):
+
+        self.diretorio = diretorio
+        self.max_arquivos = max_arquivos
+        self.max_trabalhadores = max_trabalhadores
+
+        os.makedirs(diretorio, exist_ok = True)
+
+        self._pool = self._cria_pool()
+
+        # Tarefas em andamento (ou com erro): chave -> Future
+        self._tarefas = {}
+        self._lock = threading.Lock()
+
+    # Método que cria o pool de processos
+    def _cria_pool(self):
+
+        # 'spawn': o trabalhador começa limpo, sem herdar as threads do servidor do Streamlit
+        return ProcessPoolExecutor(max_workers = self.max_trabalhadores, mp_context = multiprocessing.get_context("spawn"))
+
+    # Método que monta o caminho do PDF de uma chave
+    def caminho(self, chave):
+
+        return os.path.join(self.diretorio, f"relatorio_{chave}.pdf")
+
+    # Método que enfileira um relatório
+    def submete(self, db_path, filtros, versao, limite = DSA_LINHAS_RELATORIO):
+
+        """
+        Enfileira o relatório dos filtros na versão dos dados informada.
+
+        Parâmetros:
+        db_path (str): Caminho do arquivo SQLite (cada trabalhador abre a sua conexão).
+        filtros (dict): O dicionário retornado por 'dsa_filtros_sidebar'.
+        versao (tuple): A versão dos dados (ver 'dsa_consulta_versao').
+        limite (int): Número de transações da tabela do relatório.
+
+        Retorna:
+        (str): A chave do relatório.
+        """
+
+        chave = f"{dsa_hash_filtros(filtros)}_{versao[0]}_{versao[1]}_{limite}"
+
+        with self._lock:
+
+            if os.path.exists(self.caminho(chave)):
+                return chave
+
+            tarefa = self._tarefas.get(chave)
+
+            # Nova tarefa (ou nova tentativa após um erro)
+            if tarefa is None or (tarefa.done() and tarefa.exception() is not None):
+
+                argumentos = (dsa_trabalho_relatorio, db_path, filtros, self.caminho(chave), limite)
+
+                try:
+                    self._tarefas[chave] = self._pool.submit(*argumentos)
+                except BrokenProcessPool:
+                    # Um trabalhador morreu (ex: falta de memória): o pool não aceita mais tarefas e é recriado
+                    self._pool = self._cria_pool()
+                    self._tarefas[chave] = self._pool.submit(*argumentos)
+
+        return chave
+
+    # Método que informa a situação de um relatório
+    def estado(self, chave):
+
+        """
+        Retorna um dicionário com 'estado', 'progresso' (0 a 1), 'mensagem', 'arquivo' e 'erro'.
+        Na primeira consulta após o término da geração, traz também 'segundos' (o tempo de geração).
+        """
+
+        destino = self.caminho(chave)
+        segundos = None
+
+        with self._lock:
+            tarefa = self._tarefas.get(chave)
+
+        if tarefa is not None and tarefa.done():
+
+            erro = tarefa.exception()
+
+            if erro is not None:
+                return {"estado": DSA_ESTADO_ERRO, "progresso": 0.0, "mensagem": "", "arquivo": None, "erro": str(erro)}
+
+            # Só quem retira a tarefa recebe o tempo de geração (as consultas seguintes não o repetem)
+            with self._lock:
+                if self._tarefas.pop(chave, None) is not None:
+                    segundos = tarefa.result()
+
+            self._limpa()
+
+        if os.path.exists(destino):
+            estado = {"estado": DSA_ESTADO_CONCLUIDO, "progresso": 1.0, "mensagem": "Concluído", "arquivo": destino, "erro": None}
+            if segundos is not None:
+                estado["segundos"] = segundos
+            return estado
+
+        if tarefa is None:
+            return {"estado": DSA_ESTADO_ERRO, "progresso": 0.0, "mensagem": "", "arquivo": None, "erro": "Relatório não encontrado."}
+
+        # Em andamento: o progresso vem do arquivo gravado pelo trabalhador
+        try:
+            with open(f"{destino}.progresso", encoding = "utf-8") as f:
+                fracao, mensagem = f.read().split("\t", 1)
+            return {"estado": DSA_ESTADO_GERANDO, "progresso": float(fracao), "mensagem": mensagem, "arquivo": None, "erro": None}
+        except (OSError, ValueError):
+            return {"estado": DSA_ESTADO_FILA, "progresso": 0.0, "mensagem": "Aguardando um trabalhador", "arquivo": None, "erro": None}
+
+    # Método que apaga os PDFs mais antigos além do limite
+    def _limpa(self):
+
+        arquivos = [
+            os.path.join(self.diretorio, nome)
+            for nome in os.listdir(self.diretorio)
+            if nome.startswith("relatorio_") and nome.endswith(".pdf")
+        ]
+
+        if len(arquivos) <= self.max_arquivos:
+            return
+
+        arquivos.sort(key = os.path.getmtime)
+
+        for arquivo in arquivos[:len(arquivos) - self.max_arquivos]:
+            try:
+                os.remove(arquivo)
+            except OSError:
+                pass
+
+    # Método que encerra os trabalhadores
+    def encerra(self):
+
+        self._pool.shutdown(wait = False, cancel_futures = True)